@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Discovery time against a local stand-in Roku: neighbour table and SSDP.
+
+    python benchmarks/bench_discovery.py [--rounds 20] [--json]
+
+Measures reading this machine's neighbour (ARP) table, picking a Roku
+out of a 32-entry table and confirming it with confirm_roku(),
+ssdp_discover() stopping at the first answer, a full collection
+window, and how quickly SSDPListener reports a NOTIFY.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from roku_ecp import (  # noqa: E402
+    SSDPListener, confirm_roku, neighbour_table, roku_neighbours, ssdp_discover,
+)
+from fake_roku import FakeRoku  # noqa: E402
+
+
+def report(name, samples):
+    print(f"{name:22s} mean {statistics.mean(samples) * 1000:8.2f} ms   "
+          f"max {max(samples) * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    # A LAN's worth of neighbours, one of them a Roku (b0:a7:37 is a Roku OUI)
+    table = [{'ip': f"192.0.2.{n}", 'mac': f"02:00:00:00:00:{n:02x}"} for n in range(1, 32)]
+    table.append({'ip': "127.0.0.1", 'mac': "b0:a7:37:12:34:56"})
+
+    with FakeRoku(ssdp=True) as roku:
+        responder = roku.ssdp
+        read, neighbour = [], []
+        for _ in range(args.rounds):
+            t0 = time.perf_counter()
+            neighbour_table()
+            read.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            candidates = roku_neighbours(table=table)
+            info = confirm_roku(candidates[0]['ip'], roku.port)
+            neighbour.append(time.perf_counter() - t0)
+            assert info is not None, candidates
+
+        first, full = [], []
+        for _ in range(args.rounds):
+            t0 = time.perf_counter()
+            found = ssdp_discover(target=responder.address, limit=1)
+            first.append(time.perf_counter() - t0)
+            assert found and found[0]['port'] == roku.port, found
+
+            t0 = time.perf_counter()
+            ssdp_discover(target=responder.address)
+            full.append(time.perf_counter() - t0)
+
+        heard = threading.Event()
+        listener = SSDPListener(on_device=lambda device: heard.set(),
+                                bind=("127.0.0.1", 0), group=None).start()
+        notify = []
+        for _ in range(args.rounds):
+            heard.clear()
+            t0 = time.perf_counter()
+            responder.notify(listener.address)
+            if not heard.wait(1.0):
+                sys.exit("listener never saw the NOTIFY")
+            notify.append(time.perf_counter() - t0)
+        listener.stop()
+
+    if args.json:
+        print(json.dumps({
+            "neighbour_table_read_ms": statistics.mean(read) * 1000,
+            "neighbour_to_confirmed_ms": statistics.mean(neighbour) * 1000,
+            "msearch_first_answer_ms": statistics.mean(first) * 1000,
+            "msearch_full_window_ms": statistics.mean(full) * 1000,
+            "notify_to_callback_ms": statistics.mean(notify) * 1000,
+        }))
+        return
+    report("neighbour table read", read)
+    report("neighbour to confirmed", neighbour)
+    report("M-SEARCH first answer", first)
+    report("M-SEARCH full window", full)
+    report("NOTIFY to callback", notify)
+
+
+if __name__ == "__main__":
+    main()
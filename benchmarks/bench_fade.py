@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Cost of dragging the remote window: animation objects and event-loop time.
+
+    python benchmarks/bench_fade.py [--moves 500] [--rate 250] [--json]
+
+Drags the window with synthetic mouse moves at 'rate' per second. Every
+move calls reset_idle_timer. "per-move" is the old behaviour: a new
+QPropertyAnimation per button on every call. "shared" is
+FadeController, one timer for all buttons that ignores a fade already
+under way. Set QT_QPA_PLATFORM=offscreen to run without a display.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ["XDG_CONFIG_HOME"] = os.environ["APPDATA"] = tempfile.mkdtemp()  # keep the real cache out of it
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+from PyQt5.QtCore import QEasingCurve, QEvent, QPoint, QPropertyAnimation, Qt  # noqa: E402
+from PyQt5.QtGui import QMouseEvent  # noqa: E402
+from remote import RokuRemote  # noqa: E402
+
+
+class PerMoveRemote(RokuRemote):
+    """The fade logic as it was: fresh animations on every reset_idle_timer."""
+    def reset_idle_timer(self):
+        self.fade_in_buttons()
+        self.idle_timer.start()
+
+    def fade_in_buttons(self):
+        for btn in self.remote_buttons:
+            anim = QPropertyAnimation(btn, b"glowStrength", self)
+            anim.setDuration(500)
+            anim.setStartValue(btn.glowStrength)
+            anim.setEndValue(1.0)
+            anim.setEasingCurve(QEasingCurve.InOutQuad)
+            anim.start()
+            btn._currentAnim = anim
+
+
+def mouse(kind, pos, buttons):
+    return QMouseEvent(kind, pos, pos, Qt.LeftButton, buttons, Qt.NoModifier)
+
+
+def drag(app, window_class, moves, rate):
+    window = window_class()
+    window.show()
+    app.processEvents()
+    # Start from dim buttons, the way the remote sits when idle
+    window.fade_out_buttons(instant=True)
+
+    start = QPoint(100, 100)
+    window.mousePressEvent(mouse(QEvent.MouseButtonPress, start, Qt.LeftButton))
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    for i in range(moves):
+        pos = start + QPoint(i % 50, i % 30)
+        window.mouseMoveEvent(mouse(QEvent.MouseMove, pos, Qt.LeftButton))
+        app.processEvents()
+        time.sleep(1.0 / rate)
+    window.mouseReleaseEvent(mouse(QEvent.MouseButtonRelease, start, Qt.NoButton))
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+
+    animations = len(window.findChildren(QPropertyAnimation))
+    window.close()
+    return cpu, wall, animations, window
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--moves", type=int, default=500)
+    parser.add_argument("--rate", type=float, default=250, help="mouse moves per second")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    if args.json:
+        summary = {}
+        for name, window_class in (("per_move", PerMoveRemote), ("shared", RokuRemote)):
+            cpu, _wall, animations, _window = drag(app, window_class, args.moves, args.rate)
+            summary[f"{name}_cpu_per_move_us"] = cpu / args.moves * 1e6
+            summary[f"{name}_animations"] = animations
+        print(json.dumps(summary))
+        return
+    print(f"{args.moves} mouse moves at {args.rate:.0f}/s")
+    for name, window_class in (("per-move", PerMoveRemote), ("shared", RokuRemote)):
+        cpu, wall, animations, window = drag(app, window_class, args.moves, args.rate)
+        line = (f"{name:9s} CPU {cpu * 1000:7.1f} ms over {wall:.1f} s   "
+                f"{cpu / args.moves * 1e6:6.0f} us per move   QPropertyAnimations {animations:5d}")
+        if window_class is RokuRemote:
+            line += f"   fades {window.fader.fades_started}, timer ticks {window.fader.ticks}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
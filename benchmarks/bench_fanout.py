@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Broadcast one key press to many Rokus through CommandPipeline.
+
+    python benchmarks/bench_fanout.py [--devices 12] [--latency 0.05] [--json]
+
+Starts one FakeRoku per device on 127.0.0.2, 127.0.0.3, ... (all on the
+same port, like real Rokus on 8060), each answering after 'latency'
+seconds, and compares one fan-out press with sending the same press to
+each device in turn.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from roku_ecp import CommandPipeline, ECPConnectionPool  # noqa: E402
+from fake_roku import FakeRoku  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--devices", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--presses", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    first = FakeRoku(host="127.0.0.2", latency=args.latency).start()
+    rokus = [first] + [
+        FakeRoku(host=f"127.0.0.{i + 2}", port=first.port, latency=args.latency).start()
+        for i in range(1, args.devices)
+    ]
+    ips = [roku.host for roku in rokus]
+    pool = ECPConnectionPool(port=first.port)
+
+    done = threading.Event()
+    results = []
+
+    def on_result(command, per_device):
+        results.append(per_device)
+        done.set()
+
+    pipeline = CommandPipeline(pool, on_result=on_result)
+    try:
+        # One warm-up press so both runs use open connections
+        pipeline.submit(ips, "/keypress/down")
+        done.wait(5)
+
+        fanout = []
+        for _ in range(args.presses):
+            done.clear()
+            t0 = time.perf_counter()
+            pipeline.submit(ips, "/keypress/down")
+            done.wait(5)
+            fanout.append(time.perf_counter() - t0)
+
+        serial = []
+        for _ in range(args.presses):
+            t0 = time.perf_counter()
+            for ip in ips:
+                pool.post(ip, "/keypress/down")
+            serial.append(time.perf_counter() - t0)
+    finally:
+        pipeline.stop()
+        pool.close()
+        for roku in rokus:
+            roku.stop()
+
+    failures = sum(1 for per_device in results for r in per_device if not r[1])
+    if args.json:
+        print(json.dumps({
+            "fanout_press_ms": sum(fanout) / len(fanout) * 1000,
+            "one_by_one_press_ms": sum(serial) / len(serial) * 1000,
+            "fanout_failures": failures,
+        }))
+        return
+    print(f"{args.devices} devices, {args.latency * 1000:.0f} ms each")
+    print(f"fan-out     {sum(fanout) / len(fanout) * 1000:8.1f} ms per press   failures {failures}")
+    print(f"one by one  {sum(serial) / len(serial) * 1000:8.1f} ms per press")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Overhead of per-command latency instrumentation in CommandPipeline.
+
+    python benchmarks/bench_latency.py [--presses 2000] [--rounds 3] [--json]
+
+Sends presses one at a time through a CommandPipeline against a local
+FakeRoku, with latency=None ("off") and with a LatencyStats ("on"),
+alternating rounds so both see the same machine noise. Reports p50 and
+p95 from submit() to the result and the CPU time per press of the whole process,
+then what the recorder itself costs per command and the p50/p95/p99 it
+collected.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from roku_ecp import CommandPipeline, ECPConnectionPool, LatencyStats  # noqa: E402
+from fake_roku import FakeRoku  # noqa: E402
+
+
+def run(roku, presses, latency):
+    """(sorted key-to-ack seconds, CPU seconds per press) for 'presses' sequential presses."""
+    pool = ECPConnectionPool(port=roku.port)
+    done = threading.Event()
+    pipeline = CommandPipeline(pool, on_result=lambda *_: done.set(), latency=latency)
+    samples = []
+    cpu = time.process_time()
+    for _ in range(presses):
+        done.clear()
+        t0 = time.perf_counter()
+        pipeline.submit(roku.host, "/keypress/select")
+        done.wait(3)
+        samples.append(time.perf_counter() - t0)
+    cpu = time.process_time() - cpu
+    pipeline.stop()
+    pool.close()
+    return sorted(samples), cpu / presses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--presses", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = {"off": [], "on": []}
+    stats = LatencyStats()
+    with FakeRoku() as roku:
+        for _ in range(args.rounds):
+            results["off"].append(run(roku, args.presses, None))
+            results["on"].append(run(roku, args.presses, stats))
+
+    scratch = LatencyStats()
+    n = 100000
+    cost = timeit.timeit(lambda: scratch.record("10.0.0.2", "/keypress/select", 1e-4, 0.0, 2e-3), number=n)
+
+    summary = {}
+    for name, runs in results.items():
+        summary[f"ack_p50_{name}_us"] = statistics.median(r[0][len(r[0]) // 2] for r in runs) * 1e6
+        summary[f"ack_p95_{name}_us"] = statistics.median(r[0][int(len(r[0]) * 0.95)] for r in runs) * 1e6
+        summary[f"cpu_per_press_{name}_us"] = statistics.median(r[1] for r in runs) * 1e6
+    summary["record_us"] = cost / n * 1e6
+    if args.json:
+        print(json.dumps(summary))
+        return
+
+    print(f"{args.rounds} rounds of {args.presses} presses")
+    for name in results:
+        print(f"{name:4s} key to ack p50 {summary[f'ack_p50_{name}_us']:7.1f} us   "
+              f"p95 {summary[f'ack_p95_{name}_us']:7.1f} us   "
+              f"CPU {summary[f'cpu_per_press_{name}_us']:6.1f} us per press")
+    print(f"LatencyStats.record {summary['record_us']:.2f} us per command")
+
+    row = stats.snapshot()[0]
+    for phase in ("queued", "connect", "server"):
+        s = row[phase]
+        print(f"  {phase:8s} p50 {s['p50'] * 1e6:7.1f} us   p95 {s['p95'] * 1e6:7.1f} us   "
+              f"p99 {s['p99'] * 1e6:7.1f} us   (n={s['count']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+CPU time per frame of the button glow fade, with and without GlowCache.
+
+    python benchmarks/bench_paint.py [--fades 20] [--frames 30] [--json]
+
+Builds a RokuRemote to copy the text, size and stylesheet of every
+text button on its Remote tab (the app buttons show icons, not glow
+text), lays out copies of those, then runs full fade-ins and fade-outs: each frame sets glowStrength on every button and lets Qt
+repaint whatever is dirty, as QPropertyAnimation would at 60 fps. The
+"direct" run redraws the nine-pass glow text on every frame like the
+old paintEvent; "cached" blits it from GlowButton.glow_cache. Set
+QT_QPA_PLATFORM=offscreen to run without a display.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from PyQt5.QtWidgets import QApplication, QGridLayout, QPushButton, QWidget  # noqa: E402
+from PyQt5.QtGui import QPainter  # noqa: E402
+from remote import GlowButton, RokuRemote  # noqa: E402
+
+
+def remote_buttons():
+    """(label, width, height, stylesheet) of each text button the remote window has."""
+    remote = RokuRemote()
+    buttons = [(btn.text(), btn.width(), btn.height(), btn.styleSheet())
+               for btn in remote.remote_buttons if btn.text()]
+    remote.close()
+    return buttons
+
+
+class DirectGlowButton(GlowButton):
+    """GlowButton as it painted before the cache: repaint and redraw every frame."""
+    def setGlowStrength(self, value):
+        self._glowStrength = value
+        self.update()
+
+    def paintEvent(self, event):
+        QPushButton.paintEvent(self, event)
+        if self._glowStrength > 0 and self.text():
+            painter = QPainter(self)
+            self.drawGlow(painter, self._glowStrength)
+            painter.end()
+
+
+def run(app, layout, button_class, fades, frames):
+    window = QWidget()
+    grid = QGridLayout(window)
+    buttons = []
+    for i, (label, w, h, style) in enumerate(layout):
+        btn = button_class(label)
+        btn.setFixedSize(w, h)
+        btn.setStyleSheet(style)
+        grid.addWidget(btn, i // 4, i % 4)
+        buttons.append(btn)
+    window.show()
+    app.processEvents()
+
+    GlowButton.glow_cache.clear()
+    GlowButton.glow_cache.hits = GlowButton.glow_cache.misses = 0
+    samples = []
+    for fade in range(fades):
+        for frame in range(frames + 1):
+            t = frame / frames
+            strength = t if fade % 2 == 0 else 1.0 - t
+            start = time.process_time()
+            for btn in buttons:
+                btn.glowStrength = strength
+            app.processEvents()
+            samples.append(time.process_time() - start)
+    window.close()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fades", type=int, default=20, help="fade-ins and fade-outs to run")
+    parser.add_argument("--frames", type=int, default=30, help="frames per fade (500 ms at 60 fps)")
+    parser.add_argument("--json", action="store_true", help="print CPU per frame as JSON")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    layout = remote_buttons()
+    if args.json:
+        print(json.dumps({
+            f"{name}_frame_ms": sum(samples) / len(samples) * 1000
+            for name, samples in (("direct", run(app, layout, DirectGlowButton, args.fades, args.frames)),
+                                  ("cached", run(app, layout, GlowButton, args.fades, args.frames)))
+        }))
+        return
+    print(f"{len(layout)} buttons ({' '.join(label for label, *_ in layout)}), "
+          f"{args.fades} fades of {args.frames} frames")
+    for name, button_class in (("direct", DirectGlowButton), ("cached", GlowButton)):
+        samples = run(app, layout, button_class, args.fades, args.frames)
+        mean = sum(samples) / len(samples) * 1000
+        line = f"{name:7s} {mean:6.3f} ms CPU per frame   {sum(samples) * 1000:7.1f} ms total"
+        if button_class is GlowButton:
+            cache = GlowButton.glow_cache
+            line += f"   cache {cache.hits} hits / {cache.misses} misses, {len(cache)} pixmaps"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""
+Parse time and memory per ECP /query/ reply: old dicts, roku_ecp records and cached.
+
+    python benchmarks/bench_parse.py [--number 2000] [--json]
+
+Parses the sample replies in benchmarks/samples/ (a Roku Ultra's
+device-info, apps, active-app and media-player). "tree" is the old way:
+ET.fromstring and findtext into a dict. "records" is roku_ecp's parsers,
+into __slots__ records; device-info is streamed in chunks and stops
+once it has its fields, the rest use ET.fromstring. "cached" is a
+ReplyCache hit, the same bytes seen again. "kept" is the memory held by
+one parsed result; "peak" is the most allocated at once while parsing.
+--json reports all three per reply and parser, as <reply>_<parser>_us,
+_kept_bytes and _peak_bytes.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from roku_ecp import (  # noqa: E402
+    DEVICE_INFO_FIELDS, ReplyCache, parse_active_app, parse_apps, parse_device_info,
+    parse_media_player,
+)
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "samples")
+
+
+# The parsers as they were: whole tree, then dicts
+def tree_device_info(xml_bytes):
+    root = ET.fromstring(xml_bytes)
+    return {field: (root.findtext(field) or "").strip() for field in DEVICE_INFO_FIELDS}
+
+
+def tree_apps(xml_bytes):
+    root = ET.fromstring(xml_bytes)
+    return [{"id": app.get("id", ""), "name": (app.text or "").strip(),
+             "type": app.get("type", ""), "version": app.get("version", "")}
+            for app in root.iter("app") if app.get("id")]
+
+
+def tree_active_app(xml_bytes):
+    app = ET.fromstring(xml_bytes).find("app")
+    info = {k: app.get(k, "") for k in ("id", "type", "version")}
+    info["name"] = (app.text or "").strip()
+    return info
+
+
+def tree_media_player(xml_bytes):
+    root = ET.fromstring(xml_bytes)
+    plugin = root.find("plugin")
+    return {"state": root.get("state", ""), "plugin": plugin.get("name", "") if plugin is not None else "",
+            "position": (root.findtext("position") or "").strip(),
+            "duration": (root.findtext("duration") or "").strip()}
+
+
+PARSERS = {
+    "device-info": (tree_device_info, parse_device_info),
+    "apps": (tree_apps, parse_apps),
+    "active-app": (tree_active_app, parse_active_app),
+    "media-player": (tree_media_player, parse_media_player),
+}
+
+
+def per_call(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def memory(func):
+    """(bytes still held by the result, peak bytes while producing it)."""
+    tracemalloc.start()
+    result = func()
+    kept, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return kept, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000, help="parses per timing")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for name, (tree, records) in PARSERS.items():
+        with open(os.path.join(SAMPLES, f"{name}.xml"), "rb") as f:
+            data = f.read()
+        cache = ReplyCache()
+        cache.parse(name, data, records)
+        runs = {
+            "tree": lambda: tree(data),
+            "records": lambda: records(data),
+            "cached": lambda: cache.parse(name, data, records),
+        }
+        for kind, func in runs.items():
+            kept, peak = memory(func)
+            results.append({"reply": name, "bytes": len(data), "parser": kind,
+                            "us": per_call(func, args.number) * 1e6, "kept": kept, "peak": peak})
+
+    if args.json:
+        summary = {}
+        for row in results:
+            prefix = f"{row['reply']}_{row['parser']}"
+            summary[f"{prefix}_us"] = row["us"]
+            summary[f"{prefix}_kept_bytes"] = row["kept"]
+            summary[f"{prefix}_peak_bytes"] = row["peak"]
+        print(json.dumps(summary))
+        return
+    for row in results:
+        print(f"{row['reply']:13s} {row['bytes']:5d} B  {row['parser']:7s} "
+              f"{row['us']:8.2f} us   kept {row['kept']:6d} B   peak {row['peak']:6d} B")
+
+
+if __name__ == "__main__":
+    main()
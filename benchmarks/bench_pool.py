@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Key-press latency with and without the keep-alive ECPConnectionPool.
+
+    python benchmarks/bench_pool.py [--presses 500] [--json]
+
+Runs against a local FakeRoku, so the numbers show the per-press cost
+of the TCP handshake and session setup rather than real Wi-Fi latency.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from roku_ecp import ECPConnectionPool  # noqa: E402
+from fake_roku import FakeRoku  # noqa: E402
+
+
+def summarize(name, samples, connections):
+    """{metric: value} for one run, keys prefixed with 'name'."""
+    samples = sorted(samples)
+    return {
+        f"{name}_mean_ms": statistics.mean(samples) * 1000,
+        f"{name}_p50_ms": statistics.median(samples) * 1000,
+        f"{name}_p95_ms": samples[int(len(samples) * 0.95) - 1] * 1000,
+        f"{name}_connections": connections,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--presses", type=int, default=500)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    summary = {}
+
+    with FakeRoku() as roku:
+        url = f"http://{roku.host}:{roku.port}/keypress/down"
+        samples = []
+        for _ in range(args.presses):
+            t0 = time.perf_counter()
+            requests.post(url, timeout=3)
+            samples.append(time.perf_counter() - t0)
+        summary.update(summarize("unpooled", samples, roku.connections))
+
+    with FakeRoku() as roku:
+        pool = ECPConnectionPool(port=roku.port)
+        samples = []
+        for _ in range(args.presses):
+            t0 = time.perf_counter()
+            pool.post(roku.host, "/keypress/down")
+            samples.append(time.perf_counter() - t0)
+        pool.close()
+        summary.update(summarize("pooled", samples, roku.connections))
+
+    if args.json:
+        print(json.dumps(summary))
+        return
+    for name in ("unpooled", "pooled"):
+        print(f"{name:10s} mean {summary[f'{name}_mean_ms']:7.3f} ms   "
+              f"p50 {summary[f'{name}_p50_ms']:7.3f} ms   "
+              f"p95 {summary[f'{name}_p95_ms']:7.3f} ms   "
+              f"connections {summary[f'{name}_connections']}")
+
+
+if __name__ == "__main__":
+    main()
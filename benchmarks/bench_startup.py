@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+Cold-start time of the remote window: first paint and first command.
+
+    python benchmarks/bench_startup.py [--runs 10] [--json]
+
+Launches remote.py with --startup-report against a local FakeRoku, so
+each run paints the window, presses Home as soon as it can and exits.
+The marks are measured from when remote.py starts executing; 'process'
+is the wall time of the whole run, interpreter start-up included.
+Set QT_QPA_PLATFORM=offscreen to run without a display.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fake_roku import FakeRoku  # noqa: E402
+
+REMOTE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "remote.py")
+MARK = re.compile(r"startup: (.+?)\s+([\d.]+) ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print median times as JSON")
+    args = parser.parse_args()
+
+    marks = {}
+    with FakeRoku() as roku, tempfile.TemporaryDirectory() as config:
+        # A throwaway config dir so the real device cache is left alone
+        env = dict(os.environ, XDG_CONFIG_HOME=config, APPDATA=config)
+        for _ in range(args.runs):
+            t0 = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, REMOTE, "--ip", roku.host, "--port", str(roku.port),
+                 "--startup-report", "/keypress/home"],
+                env=env, capture_output=True, text=True, timeout=30,
+            )
+            marks.setdefault("process", []).append((time.perf_counter() - t0) * 1000)
+            for name, ms in MARK.findall(proc.stderr):
+                marks.setdefault(name, []).append(float(ms))
+        delivered = roku.commands.count("/keypress/home")
+
+    if args.json:
+        print(json.dumps({f"{name.replace(' ', '_')}_ms": statistics.median(samples)
+                          for name, samples in marks.items()}))
+        return
+    print(f"{args.runs} runs, {delivered} presses delivered")
+    for name, samples in marks.items():
+        print(f"{name:14s} median {statistics.median(samples):7.1f} ms   max {max(samples):7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Command throughput of CommandPipeline against a fake Roku, by network condition.
+
+    python benchmarks/bench_throughput.py [--presses 500] [--seed 1] [--json]
+
+Submits a burst of presses at once and times how long CommandPipeline
+takes to deliver them all to one FakeRoku. The queue limits are lifted
+so nothing is merged or dropped. Three FakeRoku settings are used:
+"local" answers at once; "wifi" adds 2 ms +0-4 ms of jitter per reply;
+"lossy" is wifi with 5% of requests failing with 503. Jitter and
+failures come from a seeded RNG, so runs are repeatable.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from roku_ecp import CommandPipeline, ECPConnectionPool  # noqa: E402
+from fake_roku import FakeRoku  # noqa: E402
+
+CONDITIONS = {
+    "local": {},
+    "wifi": {"latency": 0.002, "jitter": 0.004},
+    "lossy": {"latency": 0.002, "jitter": 0.004, "error_rate": 0.05},
+}
+KEYS = ("select", "info", "play", "instantreplay")  # not merged by the pipeline
+
+
+def run(presses, seed, **fake):
+    """(commands per second, fraction acknowledged) for one burst."""
+    with FakeRoku(seed=seed, **fake) as roku:
+        pool = ECPConnectionPool(port=roku.port)
+        acked = []
+        all_done = threading.Event()
+
+        def on_result(command, results):
+            acked.append(results[0][1])
+            if len(acked) == presses:
+                all_done.set()
+
+        pipeline = CommandPipeline(pool, on_result=on_result, maxsize=presses, deadline=0)
+        t0 = time.perf_counter()
+        for i in range(presses):
+            pipeline.submit(roku.host, f"/keypress/{KEYS[i % len(KEYS)]}")
+        all_done.wait(120)
+        elapsed = time.perf_counter() - t0
+        pipeline.stop()
+        pool.close()
+    return len(acked) / elapsed, sum(acked) / presses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--presses", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for name, fake in CONDITIONS.items():
+        rate, ok = run(args.presses, args.seed, **fake)
+        results[f"{name}_commands_per_s"] = rate
+        results[f"{name}_ok_fraction"] = ok
+
+    if args.json:
+        print(json.dumps(results))
+        return
+    print(f"{args.presses} presses per burst, seed {args.seed}")
+    for name in CONDITIONS:
+        print(f"{name:6s} {results[f'{name}_commands_per_s']:8.0f} commands/s   "
+              f"{results[f'{name}_ok_fraction'] * 100:5.1f}% acknowledged")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Typing throughput of TextStreamer against a local FakeRoku.
+
+    python benchmarks/bench_typing.py [--chars 60] [--latency 0] [--json]
+
+Types a Wi-Fi-password-sized string (including non-ASCII characters)
+three ways: one requests.post per character, one keep-alive press at a
+time (window=1), and pipelined (window=8). Checks that the fake Roku
+received exactly the text that was typed.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.parse
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from roku_ecp import TextStreamer, literal_paths  # noqa: E402
+from fake_roku import FakeRoku  # noqa: E402
+
+SAMPLE = "Tr0ub4dor&3-correct horse battery staple-ñé€✓"
+
+
+def typed_text(commands):
+    return "".join(
+        urllib.parse.unquote(path[len("/keypress/Lit_"):])
+        for path in commands if path.startswith("/keypress/Lit_")
+    )
+
+
+def run(text, latency, send):
+    """Seconds 'send' took to type 'text' on a fresh FakeRoku."""
+    with FakeRoku(latency=latency) as roku:
+        t0 = time.perf_counter()
+        send(roku)
+        elapsed = time.perf_counter() - t0
+        assert typed_text(roku.commands) == text, "fake Roku received different text"
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chars", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    text = (SAMPLE * (args.chars // len(SAMPLE) + 1))[:args.chars]
+
+    def naive(roku):
+        for path in literal_paths(text):
+            requests.post(f"http://{roku.host}:{roku.port}{path}", timeout=3)
+
+    def streamer(window):
+        return lambda roku: TextStreamer(roku.host, port=roku.port, window=window).type(text)
+
+    runs = (
+        ("requests.post per char", "per_request", naive),
+        ("keep-alive, window=1", "window1", streamer(1)),
+        ("pipelined, window=8", "window8", streamer(8)),
+    )
+    elapsed = {key: run(text, args.latency, send) for _label, key, send in runs}
+    if args.json:
+        print(json.dumps({f"{key}_chars_per_s": len(text) / seconds for key, seconds in elapsed.items()}))
+        return
+    print(f"{len(text)} characters, {args.latency * 1000:.0f} ms server latency")
+    for label, key, _send in runs:
+        print(f"{label:22s} {elapsed[key] * 1000:8.1f} ms   {len(text) / elapsed[key]:9.0f} chars/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+A stand-in Roku ECP server for benchmarks.
+
+Listens on localhost (any port), speaks HTTP/1.1 with keep-alive like a
+real Roku, answers POST /keypress/..., /keydown/..., /keyup/... and
+/launch/... with 200 (anything else with 404) and serves canned
+/query/device-info and /query/apps documents plus a generated
+/query/icon/<id> per app. /query/active-app and /query/media-player
+follow along: /launch/<id> starts that app playing, Home goes back to
+the home screen. Every command it receives is recorded in
+FakeRoku.commands, every GET in FakeRoku.queries, and keys held down
+with /keydown in FakeRoku.held.
+
+Latency, jitter and an error rate make it behave like a Roku on a busy
+network; with a seed the same run gets the same delays and failures.
+
+FakeSSDPResponder answers unicast M-SEARCH requests for roku:ecp the way
+a Roku answers the multicast ones, and can send NOTIFY announcements.
+FakeRoku(ssdp=True) runs one pointing at itself.
+
+Run it on its own to point the remote at it:
+
+    python benchmarks/fake_roku.py --port 8060 --latency 0.02 --jitter 0.03
+    python remote.py --ip 127.0.0.1
+"""
+import argparse
+import http.server
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+import zlib
+
+DEVICE_INFO = b"""<?xml version="1.0" encoding="UTF-8" ?>
+<device-info>
+\t<udn>29380007-0800-1025-80a4-d83134a0b1c2</udn>
+\t<serial-number>X00400ABCDEF</serial-number>
+\t<device-id>S00000ABCDEF</device-id>
+\t<vendor-name>Roku</vendor-name>
+\t<model-name>Roku Ultra</model-name>
+\t<model-number>4800X</model-number>
+\t<wifi-mac>d8:31:34:a0:b1:c2</wifi-mac>
+\t<ethernet-mac>d8:31:34:a0:b1:c3</ethernet-mac>
+\t<network-type>wifi</network-type>
+\t<user-device-name>Living Room</user-device-name>
+\t<friendly-device-name>Living Room</friendly-device-name>
+\t<software-version>12.5.0</software-version>
+\t<power-mode>PowerOn</power-mode>
+</device-info>
+"""
+
+
+APPS = b"""<?xml version="1.0" encoding="UTF-8" ?>
+<apps>
+\t<app id="tvinput.dtv" type="tvin" version="1.0.0">Live TV</app>
+\t<app id="12" type="appl" version="5.2.98079015">Netflix</app>
+\t<app id="837" type="appl" version="2.21.140000038">YouTube</app>
+\t<app id="2285" type="appl" version="8.29.1">Hulu</app>
+\t<app id="151908" type="appl" version="8.6.0">The Roku Channel</app>
+</apps>
+"""
+
+
+def active_app_xml(app_id):
+    """/query/active-app for 'app_id' (None = the home screen)."""
+    if app_id is None:
+        app = "<app>Roku</app>"
+    else:
+        app = next(line.strip() for line in APPS.decode().splitlines() if f'id="{app_id}"' in line)
+    return f'<?xml version="1.0" encoding="UTF-8" ?>\n<active-app>\n\t{app}\n</active-app>\n'.encode()
+
+
+def media_player_xml(app_id, position_ms=0):
+    """/query/media-player: 'app_id' playing, or nothing (None)."""
+    if app_id is None:
+        return b'<?xml version="1.0" encoding="UTF-8" ?>\n<player error="false" state="close" />\n'
+    return (
+        '<?xml version="1.0" encoding="UTF-8" ?>\n'
+        '<player error="false" state="play">\n'
+        f'\t<plugin bandwidth="20000000 bps" id="{app_id}" name="{app_id}"/>\n'
+        '\t<format audio="aac" captions="none" drm="none" video="mpeg4_10b"/>\n'
+        f'\t<position>{position_ms} ms</position>\n'
+        '\t<duration>1200000 ms</duration>\n'
+        '\t<is_live>false</is_live>\n'
+        '</player>\n'
+    ).encode()
+
+
+def icon_png(app_id, size=32):
+    """A small solid-colour PNG, a different colour per app."""
+    r, g, b = (sum(map(ord, app_id)) * k % 256 for k in (7, 13, 29))
+    raw = b"".join(b"\x00" + bytes((r, g, b)) * size for _ in range(size))
+
+    def chunk(kind, data):
+        return (struct.pack(">I", len(data)) + kind + data
+                + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=b"", content_type="text/xml; charset=utf-8"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def do_POST(self):
+        fake = self.server.fake
+        action, _, key = self.path[1:].partition("/")
+        if action not in ("keypress", "keydown", "keyup", "launch") or not key:
+            self._reply(404)
+            return
+        if fake.misbehave():
+            self._reply(503)
+            return
+        fake.record(self.path)
+        if action == "launch" and f'id="{key}"'.encode() in APPS:
+            fake.playing = key
+        elif action == "keypress" and key.lower() == "home":
+            fake.playing = None
+        elif action == "keydown":
+            fake.held.add(key)
+        elif action == "keyup":
+            fake.held.discard(key)
+        self._reply(200)
+
+    def do_GET(self):
+        if self.server.fake.misbehave():
+            self._reply(503)
+            return
+        self.server.fake.record_query(self.path)
+        if self.path == "/query/device-info":
+            self._reply(200, DEVICE_INFO)
+        elif self.path == "/query/apps":
+            self._reply(200, APPS)
+        elif self.path == "/query/active-app":
+            self._reply(200, active_app_xml(self.server.fake.playing))
+        elif self.path == "/query/media-player":
+            # The position moves on between polls, like a real player's
+            self._reply(200, media_player_xml(self.server.fake.playing, len(self.server.fake.queries) * 250))
+        elif self.path.startswith("/query/icon/") and f'id="{self.path[12:]}"'.encode() in APPS:
+            self._reply(200, icon_png(self.path[12:]), content_type="image/png")
+        else:
+            self._reply(404)
+
+
+class FakeRoku:
+    """
+    Run with start()/stop() or as a context manager. Every reply waits
+    'latency' seconds plus up to 'jitter' more, to stand in for a slow
+    network or device; 'error_rate' of requests (0.0-1.0) get a 503
+    instead and are not carried out. 'seed' makes the jitter and errors
+    repeat from run to run. ssdp=True also answers SSDP searches at
+    .ssdp_address.
+    """
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 seed=None, ssdp=False):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.commands = []
+        self.queries = []       # GET paths, e.g. /query/apps
+        self.held = set()       # keys between /keydown and /keyup
+        self.playing = None     # app id on screen, None = home
+        self.connections = 0
+        self.errors = 0         # requests answered with 503
+        self.ssdp = None
+        self._ssdp_wanted = ssdp
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        fake = self
+
+        class _Server(http.server.ThreadingHTTPServer):
+            daemon_threads = True
+
+            def get_request(self):
+                sock, addr = super().get_request()
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with fake._lock:
+                    fake.connections += 1
+                return sock, addr
+
+            def handle_error(self, request, client_address):
+                # Clients hanging up on kept-alive connections is business as usual
+                if not isinstance(sys.exc_info()[1], ConnectionError):
+                    super().handle_error(request, client_address)
+
+        self._server = _Server((host, port), _Handler)
+        self._server.fake = self
+        self._thread = None
+
+    @property
+    def host(self):
+        return self._server.server_address[0]
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    @property
+    def ssdp_address(self):
+        return self.ssdp.address if self.ssdp else None
+
+    def misbehave(self):
+        """Wait out latency and jitter; True if this request should fail."""
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            failed = bool(self.error_rate) and self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if delay:
+            time.sleep(delay)
+        return failed
+
+    def record(self, path):
+        with self._lock:
+            self.commands.append(path)
+
+    def record_query(self, path):
+        with self._lock:
+            self.queries.append(path)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        if self._ssdp_wanted:
+            self.ssdp = FakeSSDPResponder(f"http://{self.host}:{self.port}/", host=self.host).start()
+        return self
+
+    def stop(self):
+        if self.ssdp:
+            self.ssdp.stop()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class FakeSSDPResponder:
+    """UDP stand-in for a Roku's SSDP side. Point ssdp_discover(target=...) at .address."""
+    def __init__(self, location, host="127.0.0.1", port=0,
+                 usn="uuid:roku:ecp:X00400ABCDEF"):
+        self.location = location
+        self.usn = usn
+        self.searches = 0
+
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((host, port))
+        self._sock.settimeout(0.2)
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._sock.getsockname()
+
+    def response(self):
+        return (
+            "HTTP/1.1 200 OK\r\n"
+            "Cache-Control: max-age=3600\r\n"
+            "ST: roku:ecp\r\n"
+            f"USN: {self.usn}\r\n"
+            "Ext: \r\n"
+            "Server: Roku/12.5.0 UPnP/1.0 Roku/12.5.0\r\n"
+            f"LOCATION: {self.location}\r\n"
+            "\r\n"
+        ).encode()
+
+    def notify(self, address):
+        """Send one ssdp:alive NOTIFY to 'address' (host, port)."""
+        message = (
+            "NOTIFY * HTTP/1.1\r\n"
+            "HOST: 239.255.255.250:1900\r\n"
+            "Cache-Control: max-age=3600\r\n"
+            "NT: roku:ecp\r\n"
+            "NTS: ssdp:alive\r\n"
+            f"USN: {self.usn}\r\n"
+            f"LOCATION: {self.location}\r\n"
+            "\r\n"
+        ).encode()
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(message, address)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                data, addr = self._sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            text = data.decode("utf-8", "replace")
+            if not text.startswith("M-SEARCH"):
+                continue
+            if "ST: roku:ecp" not in text and "ST: ssdp:all" not in text:
+                continue
+            self.searches += 1
+            self._sock.sendto(self.response(), addr)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(1.0)
+        self._sock.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Roku until Ctrl+C.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8060)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before every reply")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many seconds more")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests to fail")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--ssdp", action="store_true", help="also answer unicast SSDP searches")
+    args = parser.parse_args()
+
+    roku = FakeRoku(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                    error_rate=args.error_rate, seed=args.seed, ssdp=args.ssdp).start()
+    print(f"Fake Roku on {roku.host}:{roku.port}"
+          + (f", SSDP on {roku.ssdp_address[0]}:{roku.ssdp_address[1]}" if roku.ssdp else ""))
+    seen = 0
+    try:
+        while True:
+            time.sleep(0.2)
+            for command in roku.commands[seen:]:
+                print(command)
+            seen = len(roku.commands)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        roku.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+"""
+Run the benchmark suite and save the results as JSON, optionally against a baseline.
+
+    python benchmarks/run_suite.py [--label v1.4] [--repeat 3] [--quick]
+    python benchmarks/run_suite.py --baseline benchmarks/results/v1.3.json
+
+Runs each benchmark below in its own process with --json, the same
+arguments and seeds every time, 'repeat' times, and keeps the median of
+every metric. The results go to benchmarks/results/<label>.json (label
+defaults to the git commit) along with the Python version, platform and
+CPU count, since numbers only compare on the same machine.
+
+With --baseline, every metric is compared with that file: names ending
+in _per_s or _fraction should go up, everything else (times) down. A
+change for the worse beyond --threshold is reported as a regression and
+the exit status is 1.
+
+Qt benchmarks run with QT_QPA_PLATFORM=offscreen unless it is already
+set, and everything runs against a throwaway config directory.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULTS = os.path.join(HERE, "results")
+
+# name: (script, arguments, arguments with --quick)
+SUITE = {
+    "throughput": ("bench_throughput.py", ["--presses", "500", "--seed", "1"], ["--presses", "100"]),
+    "key_to_ack": ("bench_latency.py", ["--presses", "2000", "--rounds", "3"], ["--presses", "200", "--rounds", "1"]),
+    "discovery": ("bench_discovery.py", ["--rounds", "20"], ["--rounds", "3"]),
+    "cold_start": ("bench_startup.py", ["--runs", "10"], ["--runs", "2"]),
+    "glow_paint": ("bench_paint.py", ["--fades", "20", "--frames", "30"], ["--fades", "2"]),
+    "parse": ("bench_parse.py", ["--number", "2000"], ["--number", "200"]),
+    "fade": ("bench_fade.py", ["--moves", "500"], ["--moves", "100"]),
+    "fanout": ("bench_fanout.py", ["--devices", "12", "--presses", "10"], ["--devices", "4", "--presses", "3"]),
+    "pool": ("bench_pool.py", ["--presses", "500"], ["--presses", "100"]),
+    "typing": ("bench_typing.py", ["--chars", "60"], ["--chars", "20"]),
+}
+HIGHER_IS_BETTER = ("_per_s", "_fraction")
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                             capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run_benchmark(script, arguments, env):
+    """The metrics dict one run of 'script' printed."""
+    proc = subprocess.run([sys.executable, os.path.join(HERE, script), *arguments, "--json"],
+                          env=env, capture_output=True, text=True, timeout=600)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{script} failed:\n{proc.stderr.strip()}")
+    # Qt may print warnings first; the JSON is the last line
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline, threshold):
+    """Print how each metric moved; returns the regressions as (benchmark, metric, change)."""
+    regressions = []
+    for name, metrics in results.items():
+        old_metrics = baseline.get(name, {})
+        for metric, value in metrics.items():
+            old = old_metrics.get(metric)
+            if not old:
+                continue
+            change = (value - old) / old
+            worse = -change if metric.endswith(HIGHER_IS_BETTER) else change
+            flag = "  REGRESSION" if worse > threshold else ""
+            print(f"{name:11s} {metric:30s} {old:12.3f} -> {value:12.3f}  {change * 100:+6.1f}%{flag}")
+            if flag:
+                regressions.append((name, metric, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--label", help="name for this run (default: the git commit)")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<label>.json)")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="relative change for the worse counted as a regression (default 0.25)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the median is kept")
+    parser.add_argument("--quick", action="store_true", help="smaller runs, for a smoke test")
+    parser.add_argument("--only", nargs="+", choices=sorted(SUITE), metavar="NAME",
+                        help=f"run just these ({', '.join(SUITE)})")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    label = args.label or commit or "local"
+    output = args.output or os.path.join(RESULTS, f"{label}.json")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as config:
+        env = dict(os.environ, XDG_CONFIG_HOME=config, APPDATA=config)
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+        for name, (script, full, quick) in SUITE.items():
+            if args.only and name not in args.only:
+                continue
+            print(f"{name}: {script}", file=sys.stderr)
+            runs = [run_benchmark(script, quick if args.quick else full, env) for _ in range(args.repeat)]
+            results[name] = {metric: statistics.median(run[metric] for run in runs) for metric in runs[0]}
+
+    report = {
+        "label": label,
+        "git": commit,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "quick": args.quick,
+        "repeat": args.repeat,
+        "benchmarks": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    print(f"Wrote {output}", file=sys.stderr)
+
+    if not args.baseline:
+        for name, metrics in results.items():
+            for metric, value in metrics.items():
+                print(f"{name:11s} {metric:30s} {value:12.3f}")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"Against {baseline.get('label')} ({baseline.get('created')}):")
+    regressions = compare(results, baseline.get("benchmarks", {}), args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
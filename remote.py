@@ -1,21 +1,32 @@
 #!/usr/bin/env python
 
+import argparse
+import collections
+import queue
 import sys
 import re
-import requests
-import socket
-import subprocess
-from scapy.all import ARP, Ether, srp
+import threading
+import time
+
+STARTUP_T0 = time.perf_counter()  # the startup report counts from here
+
+from roku_ecp import (
+    ECP_PORT, ECPConnectionPool, CommandPipeline, DeviceCache, DeviceRegistry, RokuScan,
+    SSDPListener, TextStreamer, MacroLibrary, MacroRecorder, MacroPlayer,
+    AppCatalog, DevicePoller, HealthMonitor, LatencyStats, ECPError, MACRO_PREFIX,
+    device_mac, is_protected_command, local_networks, query_device_info,
+)
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout, QWidget, 
-    QLabel, QTabWidget, QGridLayout, QLineEdit, QMenu
+    QLabel, QTabWidget, QGridLayout, QLineEdit, QMenu, QListWidget, QListWidgetItem, QCheckBox,
+    QInputDialog, QDialog, QTableWidget, QTableWidgetItem, QFileDialog
 )
 from PyQt5.QtCore import (
-    Qt, QRectF, QPropertyAnimation, QEasingCurve, QTimer, QSize
+    Qt, QRectF, QEasingCurve, QTimer, QSize, QObject, pyqtSignal, QEvent
 )
 from PyQt5.QtGui import (
-    QPainter, QColor, QBrush, QFont, QPainterPath, QPen, QLinearGradient, QPixmap, QIcon
+    QPainter, QColor, QBrush, QFont, QPainterPath, QPen, QLinearGradient, QPixmap, QIcon, QImage
 )
 
 # --------------------------------------------------------------------
@@ -32,7 +43,75 @@ def interpolate_color(c1, c2, t):
     b = c1.blue() + (c2.blue() - c1.blue()) * t
     return QColor(int(r), int(g), int(b))
 
+# Glow strength is drawn in this many steps; finer than the eye can tell
+# apart over a 500 ms fade, coarse enough that every step gets cached.
+GLOW_LEVELS = 32
+
+class GlowCache:
+    """
+    Pre-rendered glow-text layers, shared by every GlowButton. Keyed by
+    (text, font, size, device pixel ratio, colors, glow level) and
+    evicted least-recently-used once there are more than max_entries.
+    """
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._pixmaps = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._pixmaps)
+
+    def get(self, key, render):
+        """The pixmap for 'key', calling render() to build it on a miss."""
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+            self.hits += 1
+            return pixmap
+        self.misses += 1
+        pixmap = render()
+        self._pixmaps[key] = pixmap
+        if len(self._pixmaps) > self.max_entries:
+            self._pixmaps.popitem(last=False)
+        return pixmap
+
+    def clear(self):
+        self._pixmaps.clear()
+
+class StaticLayer:
+    """
+    A widget background that only changes with its size: drawn once by
+    render(painter) into a pixmap, and redrawn only when the widget's
+    size or device pixel ratio changes or invalidate() is called.
+    """
+    def __init__(self, render):
+        self.render = render
+        self.renders = 0
+        self._key = None
+        self._pixmap = None
+
+    def invalidate(self):
+        self._pixmap = None
+
+    def pixmap(self, widget):
+        dpr = widget.devicePixelRatioF()
+        key = (widget.width(), widget.height(), dpr)
+        if self._pixmap is None or key != self._key:
+            self._pixmap = QPixmap(int(widget.width() * dpr), int(widget.height() * dpr))
+            self._pixmap.setDevicePixelRatio(dpr)
+            self._pixmap.fill(Qt.transparent)
+            painter = QPainter(self._pixmap)
+            self.render(painter)
+            painter.end()
+            self._key = key
+            self.renders += 1
+        return self._pixmap
+
+
 class GlowButton(QPushButton):
+    glow_cache = GlowCache()
+
     def __init__(self, text="", parent=None):
         super().__init__(text, parent)
         self._glowStrength = 0.0
@@ -68,8 +147,14 @@ class GlowButton(QPushButton):
         return self._glowStrength
 
     def setGlowStrength(self, value):
+        changed = self.glowLevel(value) != self.glowLevel()
         self._glowStrength = value
-        self.update()  # re-paint when changed
+        if changed:
+            self.update()  # re-paint only when the drawn level changes
+
+    def glowLevel(self, value=None):
+        """glowStrength quantized to 0..GLOW_LEVELS."""
+        return round((self._glowStrength if value is None else value) * GLOW_LEVELS)
 
     @pyqtProperty(float)
     def glowStrength(self):
@@ -84,39 +169,62 @@ class GlowButton(QPushButton):
         # Paint normal button (background & default text)
         super().paintEvent(event)
 
-        if self._glowStrength > 0 and self.text():
+        level = self.glowLevel()
+        if level > 0 and self.text():
+            # The glow is the same for every button with this text, font,
+            # size and level, so it's drawn once and blitted from then on
+            dpr = self.devicePixelRatioF()
+            key = (self.text(), self.font().key(), self.width(), self.height(), dpr,
+                   self.inactiveColor.rgba(), self.activeColor.rgba(), level)
+            glow = self.glow_cache.get(key, lambda: self.renderGlow(level / GLOW_LEVELS, dpr))
             painter = QPainter(self)
-            painter.setRenderHint(QPainter.TextAntialiasing)
-
-            # Interpolate text color
-            text_color = interpolate_color(self.inactiveColor, self.activeColor, self._glowStrength)
-
-            fm = painter.fontMetrics()
-            text_width = fm.horizontalAdvance(self.text())
-            # We'll center the text. Use int() so no TypeError
-            x = int((self.width() - text_width) / 2)
-            y = int((self.height() + fm.ascent() - fm.descent()) / 2)
-
-            # Subtle glow radius & alpha
-            radius = 1  # smaller radius => less intense
-            base_alpha = int(100 * self._glowStrength)  # up to 100, not too bright
-
-            # Paint multiple offsets with partial alpha
-            for dx in range(-radius, radius+1):
-                for dy in range(-radius, radius+1):
-                    dist2 = dx*dx + dy*dy
-                    if dist2 == 0:
-                        continue
-                    local_alpha = base_alpha - (dist2 * 20)
-                    if local_alpha < 0:
-                        continue
-                    glow_col = QColor(text_color.red(), text_color.green(), text_color.blue(), local_alpha)
-                    painter.setPen(glow_col)
-                    painter.drawText(x+dx, y+dy, self.text())
-
-            # Finally, main text on top
-            painter.setPen(text_color)
-            painter.drawText(x, y, self.text())
+            painter.drawPixmap(0, 0, glow)
+            painter.end()
+
+    def renderGlow(self, strength, dpr=1.0):
+        """The glow-text layer for 'strength' as a transparent, button-sized pixmap."""
+        pixmap = QPixmap(int(self.width() * dpr), int(self.height() * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setFont(self.font())
+        self.drawGlow(painter, strength)
+        painter.end()
+        return pixmap
+
+    def drawGlow(self, painter, strength):
+        """Draw the label with a soft glow, brighter as 'strength' goes 0..1."""
+        painter.setRenderHint(QPainter.TextAntialiasing)
+
+        # Interpolate text color
+        text_color = interpolate_color(self.inactiveColor, self.activeColor, strength)
+
+        fm = painter.fontMetrics()
+        text_width = fm.horizontalAdvance(self.text())
+        # We'll center the text. Use int() so no TypeError
+        x = int((self.width() - text_width) / 2)
+        y = int((self.height() + fm.ascent() - fm.descent()) / 2)
+
+        # Subtle glow radius & alpha
+        radius = 1  # smaller radius => less intense
+        base_alpha = int(100 * strength)  # up to 100, not too bright
+
+        # Paint multiple offsets with partial alpha
+        for dx in range(-radius, radius+1):
+            for dy in range(-radius, radius+1):
+                dist2 = dx*dx + dy*dy
+                if dist2 == 0:
+                    continue
+                local_alpha = base_alpha - (dist2 * 20)
+                if local_alpha < 0:
+                    continue
+                glow_col = QColor(text_color.red(), text_color.green(), text_color.blue(), local_alpha)
+                painter.setPen(glow_col)
+                painter.drawText(x+dx, y+dy, self.text())
+
+        # Finally, main text on top
+        painter.setPen(text_color)
+        painter.drawText(x, y, self.text())
 
 
 # --------------------------------------------------------------------
@@ -150,44 +258,168 @@ APP_ICONS = {
     "Crunchyroll": "./img/crunchyroll.png",
 }
 
+class IconCache:
+    """
+    Decodes each icon file once, on a worker thread if asked, and keeps a
+    'master' copy shrunk to fit master_size (the logos are up to 3840 px
+    wide; a button never needs more than a few hundred). Button-sized
+    pixmaps are scaled from the master per (size, device pixel ratio)
+    and kept, least-recently-used first out past max_variants.
+
+    Masters are QImages, so load()/preload() are safe from any thread;
+    pixmap() must be called on the GUI thread.
+    """
+    def __init__(self, master_size=512, max_variants=128):
+        self.master_size = master_size
+        self.max_variants = max_variants
+        self.decodes = 0
+
+        self._masters = {}
+        self._variants = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+
+    def load(self, path):
+        """The master QImage for 'path' (None if it can't be read), decoding it on first use."""
+        with self._lock:
+            if path in self._masters:
+                return self._masters[path]
+        img = QImage(path)
+        if not img.isNull() and (img.width() > self.master_size or img.height() > self.master_size):
+            img = img.scaled(self.master_size, self.master_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        master = None if img.isNull() else img
+        with self._lock:
+            self.decodes += 1
+            return self._masters.setdefault(path, master)
+
+    def is_loaded(self, path):
+        with self._lock:
+            return path in self._masters
+
+    def load_async(self, path, on_loaded=None):
+        """Decode 'path' on the icon thread, then call on_loaded(path) from that thread."""
+        self._queue.put((path, on_loaded))
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="icon-load", daemon=True)
+            self._worker.start()
+
+    def preload(self, paths):
+        """Queue every path for decoding, so later setImage calls are instant."""
+        for path in paths:
+            self.load_async(path)
+
+    def pixmap(self, path, w, h, dpr=1.0):
+        """'path' scaled to fit w x h logical pixels at 'dpr', or None."""
+        key = (path, w, h, dpr)
+        pixmap = self._variants.get(key)
+        if pixmap is not None:
+            self._variants.move_to_end(key)
+            return pixmap
+        master = self.load(path)
+        if master is None or w <= 0 or h <= 0:
+            return None
+        img = master.scaled(int(w * dpr), int(h * dpr), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        pixmap = QPixmap.fromImage(img)
+        pixmap.setDevicePixelRatio(dpr)
+        self._variants[key] = pixmap
+        if len(self._variants) > self.max_variants:
+            self._variants.popitem(last=False)
+        return pixmap
+
+    def _run(self):
+        while True:
+            path, on_loaded = self._queue.get()
+            self.load(path)
+            if on_loaded:
+                try:
+                    on_loaded(path)
+                except RuntimeError:
+                    pass  # the button asking for it was deleted meanwhile
+
+
 class AppLaunchButton(GlowButton):
     """
     A GlowButton that can show a custom icon in a 'dim' or 'bright' state,
     depending on glowStrength. Right-click changes self.command_name
     and can also change the image, if desired.
     """
+    icons = IconCache()
+
+    # Emitted from the icon thread once the image for a path is decoded
+    imageLoaded = pyqtSignal(str)
+
     def __init__(self, text="", command_name="", parent=None):
         super().__init__(text, parent)
         self.command_name = command_name
+        self.menu_hook = None  # optional callable(menu, button) to add more actions
+        self.app_source = None  # optional callable returning menuApps()-style entries
         
         self._image = None    # We'll store the QPixmap
-        self._imageScaled = None  # We'll store a scaled version that fits the button
+        self._imagePath = None
+        self.imageLoaded.connect(self._onImageLoaded)
+
+    def imageSize(self):
+        # Scale it to ~70% of the button size (like you do with setIconSize)
+        return int(self.width() * 0.7), int(self.height() * 0.7)
 
     def setImage(self, image_path):
-        """Load the image from 'image_path' and store it. We'll paint it in paintEvent()."""
-        px = QPixmap(image_path)
-        if not px.isNull():
-            # Scale it to ~70% of the button size (like you do with setIconSize)
-            w = int(self.width() * 0.7)
-            h = int(self.height() * 0.7)
-            self._image = px.scaled(w, h, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        """Show the image from 'image_path'. We'll paint it in paintEvent()."""
+        self._imagePath = image_path
+        self._refreshImage()
+
+    def setImageInBackground(self, image_path):
+        """setImage, but decode on the icon thread if the image isn't cached yet."""
+        self._imagePath = image_path
+        if self.icons.is_loaded(image_path):
+            self._refreshImage()
         else:
-            self._image = None
+            self.icons.load_async(image_path, self.imageLoaded.emit)
+
+    def _onImageLoaded(self, image_path):
+        if image_path == self._imagePath:
+            self._refreshImage()
 
+    def _refreshImage(self):
+        if self._imagePath:
+            self._image = self.icons.pixmap(self._imagePath, *self.imageSize(), self.devicePixelRatioF())
+        else:
+            self._image = None
         self.update()  # repaint
 
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self._imagePath:
+            self._refreshImage()  # scale for the new size, from the cache
+
+    def menuApps(self):
+        """(label, command, icon path or None) for each app in the right-click menu."""
+        if self.app_source:
+            apps = self.app_source()
+            if apps:
+                return apps
+        return [(label, cmd, APP_ICONS.get(label)) for label, cmd in TOP_APPS]
+
     def mousePressEvent(self, event):
         if event.button() == Qt.RightButton:
-            # Show a context menu listing the top apps
+            # Show a context menu listing the apps (installed ones, once known)
             menu = QMenu(self)
-            for (app_label, app_cmd) in TOP_APPS:
+            for (app_label, app_cmd, app_icon) in self.menuApps():
                 action = menu.addAction(app_label)
-                def handler(checked=False, cmd=app_cmd, lbl=app_label):
+                if app_icon:
+                    icon = self.icons.pixmap(app_icon, 16, 16, self.devicePixelRatioF())
+                    if icon is not None:
+                        action.setIcon(QIcon(icon))
+                def handler(checked=False, cmd=app_cmd, lbl=app_label, icon_path=app_icon):
                     self.command_name = cmd
-                    icon_path = APP_ICONS.get(lbl)
-                    if icon_path:
-                        self.setImage(icon_path)
+                    self.setToolTip(lbl)
+                    self.setImage(icon_path)
+                    # No icon (yet): fall back to the name, cut to fit
+                    self.setText("" if icon_path else QFontMetrics(self.font()).elidedText(
+                        lbl, Qt.ElideRight, self.width() - 6))
                 action.triggered.connect(handler)
+            if self.menu_hook:
+                self.menu_hook(menu, self)
             menu.exec_(event.globalPos())
         else:
             # Normal left-click => pass to GlowButton
@@ -197,6 +429,10 @@ class AppLaunchButton(GlowButton):
         # 1) Let the GlowButton draw background + text
         super().paintEvent(event)
 
+        # Moved to a screen with a different scale factor: rescale from the cache
+        if self._image and self._image.devicePixelRatio() != self.devicePixelRatioF():
+            self._refreshImage()
+
         # 2) If we have an image, paint it with partial opacity
         if self._image:
             painter = QPainter(self)
@@ -208,17 +444,298 @@ class AppLaunchButton(GlowButton):
 
             painter.setOpacity(alpha_factor)
 
-            # Center the pixmap in the button
-            x = (self.width()  - self._image.width())  // 2
-            y = (self.height() - self._image.height()) // 2
+            # Center the pixmap in the button (its size is in device pixels)
+            dpr = self._image.devicePixelRatio()
+            x = int((self.width()  - self._image.width() / dpr) / 2)
+            y = int((self.height() - self._image.height() / dpr) / 2)
             painter.drawPixmap(x, y, self._image)
             painter.end()
 
 # --------------------------------------------------------------------
-# 3) RokuRemote - the main window
+# 3) Qt signal bridges - background results back onto the GUI thread
+# --------------------------------------------------------------------
+class CommandSignals(QObject):
+    """Carries CommandPipeline, TextStreamer and DevicePoller results back onto the GUI thread."""
+    result = pyqtSignal(str, object)
+    typing_progress = pyqtSignal(int, int)
+    typing_done = pyqtSignal(int, int, str, bool)
+    macro_step = pyqtSignal(int, int)
+    macro_done = pyqtSignal(int, int, str, bool)
+    device_state = pyqtSignal(object)
+
+
+class DiscoverySignals(QObject):
+    """Carries background discovery events back onto the GUI thread."""
+    roku_announced = pyqtSignal(str, object)
+    cache_checked = pyqtSignal(bool, object)
+    # device-info fetched for a Roku that was adopted without it
+    device_info = pyqtSignal(str, object)
+    # RokuScan events
+    host_found = pyqtSignal(object)
+    roku_found = pyqtSignal(str, object, str)
+    scan_progress = pyqtSignal(float, float)
+    scan_finished = pyqtSignal(object, bool)
+    # AppCatalog refreshed (the catalog object)
+    apps_updated = pyqtSignal(object)
+    # HealthMonitor: "down"/"up"/"moved", ip, DeviceInfo or None
+    health_changed = pyqtSignal(str, str, object)
+
+
+# --------------------------------------------------------------------
+# 4) KeyHold - press-and-hold for the D-pad
+# --------------------------------------------------------------------
+class KeyHold(QObject):
+    """
+    Press-and-hold for D-pad buttons. A quick tap is an ordinary
+    /keypress. Held past hold_delay ms, the key is sent as /keydown and
+    the release as /keyup, so the Roku scrolls by itself for two
+    requests in total.
+
+    In "repeat" mode, or when a /keydown fails, the held key is resent as
+    /keypress instead, starting every repeat_interval ms and speeding up
+    by 'acceleration' per press down to min_interval ms.
+
+    A tap is only sent from clicked(), which Qt emits when the pointer
+    is released over the button, so sliding off a button sends nothing.
+
+    Whatever happens, a key that went down gets its /keyup: on release,
+    on release_all() (focus loss, window close, switching Rokus) and
+    after a failed keydown.
+    """
+    KEYS = ("up", "down", "left", "right")
+
+    @classmethod
+    def key_for(cls, command):
+        """The D-pad key a button's 'command' presses, or "" if it isn't one to hold."""
+        action, _, key = command.rpartition("/")
+        return key if action == "/keypress" and key.lower() in cls.KEYS else ""
+
+    def __init__(self, send, mode="keydown", hold_delay=300, repeat_interval=150,
+                 min_interval=40, acceleration=0.85, parent=None):
+        super().__init__(parent)
+        self.send = send
+        self.mode = mode
+        self.hold_delay = hold_delay
+        self.repeat_interval = repeat_interval
+        self.min_interval = min_interval
+        self.acceleration = acceleration
+
+        self.key = ""           # key currently held, e.g. "up"
+        self.state = ""         # "", "pending", "down" or "repeat"
+        self.tap = ""           # key released before hold_delay, waiting for clicked()
+        self._interval = repeat_interval
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._on_timer)
+
+    def press(self, key):
+        if self.key:
+            self.release(self.key)
+        self.tap = ""
+        self.key = key
+        self.state = "pending"
+        self._timer.start(self.hold_delay)
+
+    def release(self, key=None):
+        if not self.key or (key and key != self.key):
+            return
+        self._timer.stop()
+        key, state = self.key, self.state
+        self.key, self.state = "", ""
+        if state == "pending":
+            self.tap = key      # it was just a tap, if Qt follows up with clicked
+        elif state == "down":
+            self.send(f"/keyup/{key}")
+
+    def clicked(self, key):
+        if self.tap == key:
+            self.send(f"/keypress/{key}")
+        self.tap = ""
+
+    def release_all(self):
+        """Let go of the held key without tapping it; a key that is down still gets its keyup."""
+        self.release()
+        self.tap = ""
+
+    def on_result(self, command, results):
+        """Feed CommandPipeline results back in so a failed keydown can't leave a key stuck."""
+        if not command.startswith("/keydown/") or all(r[1] for r in results):
+            return
+        key = command[len("/keydown/"):]
+        # The keydown may still have reached the Roku, so always undo it
+        self.send(f"/keyup/{key}")
+        if self.key == key and self.state == "down":
+            self._start_repeat()
+
+    def _on_timer(self):
+        if self.state == "pending":
+            if self.mode == "keydown":
+                self.state = "down"
+                self.send(f"/keydown/{self.key}")
+            else:
+                self._start_repeat()
+        elif self.state == "repeat":
+            self.send(f"/keypress/{self.key}")
+            self._interval = max(self.min_interval, int(self._interval * self.acceleration))
+            self._timer.start(self._interval)
+
+    def _start_repeat(self):
+        self.state = "repeat"
+        self._interval = self.repeat_interval
+        self.send(f"/keypress/{self.key}")
+        self._timer.start(self._interval)
+
+
+# --------------------------------------------------------------------
+# 5) FadeController - one timer fades every button's glow
+# --------------------------------------------------------------------
+class FadeController(QObject):
+    """
+    Fades the glowStrength of a list of buttons towards a target from a
+    single timer, instead of one QPropertyAnimation per button per fade.
+    Asking for the fade that is already running, or for the value the
+    buttons already have, does nothing.
+    """
+    def __init__(self, buttons, duration=500, interval=16, parent=None):
+        super().__init__(parent)
+        self.buttons = buttons      # shared with the owner, so buttons added later are faded too
+        self.duration = duration
+        self.target = None
+        self.fades_started = 0      # for benchmarks/bench_fade.py
+        self.ticks = 0
+
+        self._curve = QEasingCurve(QEasingCurve.InOutQuad)
+        self._from = []             # (button, glowStrength when this fade started)
+        self._started_at = 0.0
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._on_tick)
+
+    def is_running(self):
+        return self._timer.isActive()
+
+    def fade_to(self, target, instant=False):
+        if instant:
+            self._timer.stop()
+            self.target = target
+            for btn in self.buttons:
+                btn.glowStrength = target
+            return
+        if target == self.target and (self.is_running() or
+                                      all(btn.glowStrength == target for btn in self.buttons)):
+            return
+        self.target = target
+        self._from = [(btn, btn.glowStrength) for btn in self.buttons]
+        self._started_at = time.monotonic()
+        self.fades_started += 1
+        self._timer.start()
+
+    def _on_tick(self):
+        self.ticks += 1
+        t = min(1.0, (time.monotonic() - self._started_at) * 1000 / self.duration)
+        k = self._curve.valueForProgress(t)
+        for btn, start in self._from:
+            btn.glowStrength = start + (self.target - start) * k
+        if t >= 1.0:
+            self._timer.stop()
+
+
+# --------------------------------------------------------------------
+# 6) DiagnosticsDialog - command latency percentiles and export
+# --------------------------------------------------------------------
+class DiagnosticsDialog(QDialog):
+    """
+    p50/p95/p99 of every device/path/phase in a LatencyStats, refreshed
+    once a second while open, plus on-demand JSON and Prometheus export.
+    """
+    COLUMNS = ("Device", "Path", "Phase", "Count", "p50 ms", "p95 ms", "p99 ms", "Max ms")
+
+    def __init__(self, latency, parent=None):
+        super().__init__(parent)
+        self.latency = latency
+        self.setWindowTitle("Command latency")
+        self.resize(720, 320)
+
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        self.summary = QLabel("")
+        layout.addWidget(self.summary)
+
+        buttons = QHBoxLayout()
+        for label, handler in (("Copy JSON", self.copy_json), ("Copy Prometheus", self.copy_prometheus),
+                               ("Save...", self.save), ("Reset", self.reset)):
+            btn = QPushButton(label)
+            btn.clicked.connect(handler)
+            buttons.addWidget(btn)
+        layout.addLayout(buttons)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        rows = self.latency.snapshot()
+        self.table.setRowCount(len(rows) * 3)
+        sent = errors = 0
+        for i, row in enumerate(rows):
+            sent += row["server"]["count"]
+            errors += row["errors"]
+            for j, phase in enumerate(("queued", "connect", "server")):
+                stats = row[phase]
+                cells = (row["device"], row["path"], phase, str(stats["count"]),
+                         *(f"{stats[k] * 1000:.1f}" for k in ("p50", "p95", "p99", "max")))
+                for col, text in enumerate(cells):
+                    self.table.setItem(i * 3 + j, col, QTableWidgetItem(text))
+        self.table.resizeColumnsToContents()
+        self.summary.setText(f"{sent} commands timed, {errors} failed")
+
+    def copy_json(self):
+        QApplication.clipboard().setText(self.latency.to_json())
+
+    def copy_prometheus(self):
+        QApplication.clipboard().setText(self.latency.to_prometheus())
+
+    def save(self):
+        path, chosen = QFileDialog.getSaveFileName(
+            self, "Save latency stats", "roku-latency.json", "JSON (*.json);;Prometheus (*.prom *.txt)")
+        if not path:
+            return
+        text = self.latency.to_json() if "JSON" in chosen else self.latency.to_prometheus()
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        except OSError as e:
+            self.summary.setText(f"Couldn't save: {e}")
+
+    def reset(self):
+        self.latency.reset()
+        self.refresh()
+
+
+# --------------------------------------------------------------------
+# 7) RokuRemote - the main window
 # --------------------------------------------------------------------
+IDLE_RESET_THROTTLE = 0.25  # seconds between idle-timer restarts
+# /query/media-player states worth showing next to the app name
+PLAYER_STATES = {"play": "playing", "pause": "paused", "buffer": "buffering", "startup": "starting"}
+
 class RokuRemote(QMainWindow):
-    def __init__(self):
+    def __init__(self, port=ECP_PORT, startup_report=False, latency_stats=True):
         super().__init__()
         self.setFixedSize(220, 400)
         self.setWindowTitle("Roku Remote")
@@ -226,16 +743,94 @@ class RokuRemote(QMainWindow):
         self.setAttribute(Qt.WA_TranslucentBackground)
         self.dragging = False  # for window dragging
 
-        self.IP = ""
-        self.found = False
+        self.IP = ""  # the active Roku; see found for whether it is answering
+
+        # Commands go out on a worker thread; results come back as a signal
+        self.command_signals = CommandSignals(self)
+        self.command_signals.result.connect(self.on_command_result)
+        self.command_signals.typing_progress.connect(self.on_typing_progress)
+        self.command_signals.typing_done.connect(self.on_typing_done)
+        self.command_signals.macro_step.connect(self.on_macro_step)
+        self.command_signals.macro_done.connect(self.on_macro_done)
+        self.command_signals.device_state.connect(self.on_device_state)
+        self.pool = ECPConnectionPool(connect_timeout=1.0, read_timeout=3.0, port=port)
+        # Per-command timings for the diagnostics view; None measures nothing
+        self.latency = LatencyStats() if latency_stats else None
+        self.diagnostics = None
+        self.pipeline = CommandPipeline(self.pool, on_result=self.command_signals.result.emit,
+                                        latency=self.latency)
+        # What the active Roku is showing; idles until adopt_roku gives it a target
+        self.poller = DevicePoller(self.pool, on_change=self.command_signals.device_state.emit,
+                                   on_reply=self.on_device_reply).start()
+        self.device_cache = DeviceCache()
+
+        # Every Roku found; self.IP is the active one
+        self.devices = DeviceRegistry()
+        self.broadcast = False
+        self.deep_scan = False  # sweep every network even when SSDP already found Rokus
+
+        # D-pad arrows repeat while held (see KeyHold)
+        self.key_hold = KeyHold(self.send_command, mode="keydown", parent=self)
+
+        # Macros can be recorded from and bound to any button's right-click menu
+        self.macros = MacroLibrary()
+        self.recorder = MacroRecorder()
+        self.macro_player = None
+        self.macro_speed = 1.0  # >1 replays faster than recorded
+
+        # Search tab typing; pacing is seconds between characters
+        self.typer = None
+        self.typing_pacing = 0.0
+
+        # Rokus that announce themselves over SSDP get picked up without a scan
+        self.discovery_signals = DiscoverySignals(self)
+        self.discovery_signals.roku_announced.connect(self.on_roku_announced)
+        self.discovery_signals.cache_checked.connect(self.on_cache_checked)
+        self.discovery_signals.device_info.connect(self.on_device_info)
+        self.discovery_signals.host_found.connect(self.on_scan_host)
+        self.discovery_signals.roku_found.connect(self.on_scan_roku)
+        self.discovery_signals.scan_progress.connect(self.on_scan_progress)
+        self.discovery_signals.scan_finished.connect(self.on_scan_finished)
+        self.discovery_signals.apps_updated.connect(self.on_apps_updated)
+        self.discovery_signals.health_changed.connect(self.on_health_changed)
+        # Opens after repeated failures to the active Roku; presses then fail fast
+        # while it is probed, and it is looked for again if it changed address
+        self.health = HealthMonitor(port=port, on_state=self.discovery_signals.health_changed.emit)
+        self.app_catalog = None  # channels on the active Roku, see load_app_catalog
+        self.app_catalog_key = None
+        self.scan = None
+        self.ssdp_listener = SSDPListener(on_device=self._on_ssdp_notify)
+        try:
+            self.ssdp_listener.start()
+        except OSError:
+            # Port 1900 is taken or not allowed; scanning still works
+            self.ssdp_listener = None
 
         # Keep references to all GlowButtons for fade logic
         self.remote_buttons = []
+        self.chrome = StaticLayer(self.paintChrome)
+        self.fader = FadeController(self.remote_buttons, duration=500, parent=self)
+
+        # Cold start: only the Remote tab is built before the first paint.
+        # Other tabs are built when first selected, and work that can wait
+        # (decoding the big launch-button images) runs right after that paint.
+        self.startup_marks = {}
+        self.startup_report = startup_report
+        self.startup_command = None  # sent right after the first paint, for timing runs
+        self.after_paint = []
+        self.tab_builders = {}
+        self.connect_status = ("Click 'Scan' to find Roku", "color: white; font-size: 12pt;")
+        self.connect_label = None
+        self.scan_button = None
+        self.device_list = None
+        self.scan_hosts_text = ""
+        self.scan_hosts_label = None
 
         # Idle Timers & Animations
         self.idle_timer = QTimer(self)
         self.idle_timer.setInterval(10_000)  # 10s
         self.idle_timer.timeout.connect(self.fade_out_buttons)
+        self.idle_reset_at = 0.0
 
         # Main widget
         self.centralWidget = QWidget(self)
@@ -246,14 +841,16 @@ class RokuRemote(QMainWindow):
         self.tabs.setGeometry(0, 0, self.width(), self.height())
         self.tabs.setStyleSheet(
             "QTabWidget::pane { border: 0; } "
-            "QTabBar::tab { background: #4B0082; color: white; padding: 10px; border-radius: 5px; margin: 2px; } "
+            "QTabBar { font-size: 9pt; } "
+            "QTabBar::tab { background: #4B0082; color: white; padding: 10px 6px; border-radius: 5px; margin: 2px; } "
             "QTabBar::tab:selected { background: #7c4dff; } "
         )
 
         # Add tabs
         self.add_remote_tab()
-        self.add_typing_tab()
-        self.add_connect_tab()
+        self.add_lazy_tab("Search", self.add_typing_tab)
+        self.add_lazy_tab("Connect", self.add_connect_tab)
+        self.tabs.currentChanged.connect(self.build_tab)
 
         # Close button top-right corner
         self.close_button = QPushButton(self)
@@ -270,43 +867,72 @@ class RokuRemote(QMainWindow):
         # Start with text in dim mode
         self.fade_out_buttons(instant=True)
 
+        # Reconnect to the last Roku without waiting for a scan
+        self.restore_cached_roku()
+        self.mark_startup("window built")
+
+    # ---------------------------
+    # STARTUP
+    # ---------------------------
+    def mark_startup(self, name):
+        """Record (once) how long after STARTUP_T0 'name' happened."""
+        if name in self.startup_marks:
+            return
+        self.startup_marks[name] = (time.perf_counter() - STARTUP_T0) * 1000
+        if self.startup_report:
+            print(f"startup: {name:<14} {self.startup_marks[name]:7.1f} ms", file=sys.stderr, flush=True)
+
+    def run_after_paint(self, func, *args):
+        """Run func(*args) once the window has painted (straight away if it already has)."""
+        if "first paint" in self.startup_marks:
+            func(*args)
+        else:
+            self.after_paint.append((func, args))
+
+    def on_first_paint(self):
+        work, self.after_paint = self.after_paint, []
+        for func, args in work:
+            func(*args)
+        self.mark_startup("deferred done")
+        if self.startup_command:
+            self.send_command(self.startup_command)
+
     # ---------------------------
     # IDLE LOGIC
     # ---------------------------
     def reset_idle_timer(self):
         """User is interacting; fade in the button text and restart the idle timer."""
         self.fade_in_buttons()
-        self.idle_timer.start()
+        # Mouse moves arrive hundreds of times a second while dragging; the
+        # 10 s countdown doesn't need restarting more often than this
+        now = time.monotonic()
+        if now - self.idle_reset_at >= IDLE_RESET_THROTTLE or not self.idle_timer.isActive():
+            self.idle_reset_at = now
+            self.idle_timer.start()
 
     def fade_in_buttons(self):
-        """Animate all buttons from current glowStrength to 1.0."""
-        for btn in self.remote_buttons:
-            anim = QPropertyAnimation(btn, b"glowStrength", self)
-            anim.setDuration(500)
-            anim.setStartValue(btn.glowStrength)
-            anim.setEndValue(1.0)
-            anim.setEasingCurve(QEasingCurve.InOutQuad)
-            anim.start()
-            btn._currentAnim = anim
+        """Fade all buttons up to 1.0 (a no-op if they are there or on the way)."""
+        self.fader.fade_to(1.0)
 
     def fade_out_buttons(self, instant=False):
-        """Animate all buttons to 0.0 after 10s inactivity."""
-        for btn in self.remote_buttons:
-            if instant:
-                btn.glowStrength = 0.0
-                continue
-
-            anim = QPropertyAnimation(btn, b"glowStrength", self)
-            anim.setDuration(500)
-            anim.setStartValue(btn.glowStrength)
-            anim.setEndValue(0.0)
-            anim.setEasingCurve(QEasingCurve.InOutQuad)
-            anim.start()
-            btn._currentAnim = anim
+        """Fade all buttons to 0.0 after 10s inactivity."""
+        self.fader.fade_to(0.0, instant=instant)
 
     # ---------------------------
     # TABS
     # ---------------------------
+    def add_lazy_tab(self, title, builder):
+        """Add an empty page now; builder(page) fills it in when it is first shown."""
+        page = QWidget()
+        self.tab_builders[page] = builder
+        self.tabs.addTab(page, title)
+
+    def build_tab(self, index):
+        page = self.tabs.widget(index)
+        builder = self.tab_builders.pop(page, None)
+        if builder:
+            builder(page)
+
     def add_remote_tab(self):
         remote_tab = QWidget()
         layout = QVBoxLayout(remote_tab)
@@ -318,7 +944,12 @@ class RokuRemote(QMainWindow):
         self.remote_status_label.setAlignment(Qt.AlignCenter)
         self.remote_status_label.setStyleSheet("QLabel { color: white; font-size: 10pt; }")
         layout.addWidget(self.remote_status_label, alignment=Qt.AlignCenter)
-        
+
+        # What's on the TV, from DevicePoller
+        self.now_playing_label = QLabel("")
+        self.now_playing_label.setAlignment(Qt.AlignCenter)
+        self.now_playing_label.setStyleSheet("QLabel { color: #aaaaaa; font-size: 8pt; }")
+        layout.addWidget(self.now_playing_label, alignment=Qt.AlignCenter)
 
         # Power button
         pwr_btn = self.create_button("⏻", "/keypress/power", size=40)
@@ -345,21 +976,22 @@ class RokuRemote(QMainWindow):
         b_layout.setSpacing(5)
         b_layout.setContentsMargins(20, 5, 20, 5)
 
-        # Create B1
+        # Create B1-B4. The logos are big PNGs, so they are decoded off the
+        # GUI thread once the window has painted
         b1 = self.create_button("", "/launch/2285", size=(50, 30))
-        b1.setImage("./img/hulu.png")
+        self.run_after_paint(b1.setImageInBackground, "./img/hulu.png")
 
-        # Create B2
         b2 = self.create_button("", "/launch/12", size=(50, 30))
-        b2.setImage("./img/netflix.png")
+        self.run_after_paint(b2.setImageInBackground, "./img/netflix.png")
 
-        # Create B3
         b3 = self.create_button("", "/launch/61322", size=(50, 30))
-        b3.setImage("./img/max.png")
+        self.run_after_paint(b3.setImageInBackground, "./img/max.png")
 
-        # Create B4
         b4 = self.create_button("", "/launch/551012", size=(50, 30))
-        b4.setImage("./img/apple.png")
+        self.run_after_paint(b4.setImageInBackground, "./img/apple.png")
+
+        # ...followed by the rest, so right-click reassignment never waits on a decode
+        self.run_after_paint(AppLaunchButton.icons.preload, APP_ICONS.values())
 
         b_layout.addWidget(b1, 0, 0)
         b_layout.addWidget(b2, 0, 1)
@@ -369,8 +1001,7 @@ class RokuRemote(QMainWindow):
 
         self.tabs.addTab(remote_tab, "Remote")
 
-    def add_typing_tab(self):
-        typing_tab = QWidget()
+    def add_typing_tab(self, typing_tab):
         layout = QVBoxLayout(typing_tab)
         layout.setSpacing(10)
         layout.setContentsMargins(20, 20, 20, 20)
@@ -379,97 +1010,250 @@ class RokuRemote(QMainWindow):
         self.text_input.setPlaceholderText("Type your text here...")
         self.text_input.setFixedHeight(30)
         self.text_input.setStyleSheet("background-color: #606060; color: white; border-radius: 5px; padding: 5px;")
+        self.text_input.returnPressed.connect(self.on_enter_pressed)
         layout.addWidget(self.text_input)
 
-        enter_button = QPushButton("Enter", typing_tab)
-        enter_button.setFixedSize(80, 30)
-        enter_button.setFont(QFont("Arial", 10, QFont.Bold))
-        enter_button.setStyleSheet(
+        # Enter doubles as Cancel while a long paste is being typed
+        self.enter_button = QPushButton("Enter", typing_tab)
+        self.enter_button.setFixedSize(80, 30)
+        self.enter_button.setFont(QFont("Arial", 10, QFont.Bold))
+        self.enter_button.setStyleSheet(
             "QPushButton {"
             "  background-color: #4B0082; color: white; border-radius: 5px;"
             "} QPushButton:pressed { background-color: #7c4dff; }"
         )
-        enter_button.clicked.connect(self.on_enter_pressed)
-        layout.addWidget(enter_button, alignment=Qt.AlignCenter)
+        self.enter_button.clicked.connect(self.on_enter_pressed)
+        layout.addWidget(self.enter_button, alignment=Qt.AlignCenter)
 
-        # self.tabs.addTab(typing_tab, "Search")
+        self.typing_status_label = QLabel("")
+        self.typing_status_label.setAlignment(Qt.AlignCenter)
+        self.typing_status_label.setWordWrap(True)
+        self.typing_status_label.setStyleSheet("QLabel { color: white; font-size: 10pt; }")
+        layout.addWidget(self.typing_status_label, alignment=Qt.AlignCenter)
+        layout.addStretch()
 
-    def add_connect_tab(self):
-        connect_tab = QWidget()
+    def add_connect_tab(self, connect_tab):
         connect_layout = QVBoxLayout(connect_tab)
         connect_layout.setSpacing(10)
         connect_layout.setContentsMargins(20, 20, 20, 20)
 
-        self.connect_label = QLabel("Click 'Scan' to find Roku")
-        self.connect_label.setStyleSheet("QLabel { color: white; font-size: 12pt; }")
+        self.connect_label = QLabel()
         connect_layout.addWidget(self.connect_label, alignment=Qt.AlignCenter)
+        self.set_connect_status(*self.connect_status)
 
-        scan_button = QPushButton("Scan")
-        scan_button.setFixedSize(80, 30)
-        scan_button.setFont(QFont("Arial", 10, QFont.Bold))
-        scan_button.setStyleSheet(
+        scanning = self.scan is not None and self.scan.is_running()
+        self.scan_button = QPushButton("Cancel" if scanning else "Scan")
+        self.scan_button.setFixedSize(80, 30)
+        self.scan_button.setFont(QFont("Arial", 10, QFont.Bold))
+        self.scan_button.setStyleSheet(
             "QPushButton {"
             "  background-color: #4B0082; color: white; border-radius: 5px;"
             "} QPushButton:pressed { background-color: #7c4dff; }"
         )
-        scan_button.clicked.connect(self.scan_network_for_roku)
-        connect_layout.addWidget(scan_button, alignment=Qt.AlignCenter)
-
-        self.tabs.addTab(connect_tab, "Connect")
+        # Scan doubles as Cancel while a scan is running
+        self.scan_button.clicked.connect(self.scan_network_for_roku)
+        connect_layout.addWidget(self.scan_button, alignment=Qt.AlignCenter)
+
+        # Click a Roku to make it the target; tick the ones to broadcast to
+        self.device_list = QListWidget()
+        self.device_list.setStyleSheet(
+            "QListWidget { background-color: #2b2b2b; color: white; border: 1px solid #4B0082; "
+            "border-radius: 5px; font-size: 9pt; } "
+            "QListWidget::item:selected { background-color: #7c4dff; }"
+        )
+        self.device_list.itemClicked.connect(self.on_device_clicked)
+        self.device_list.itemChanged.connect(self.on_device_checked)
+        connect_layout.addWidget(self.device_list)
+
+        # Hosts streaming in from the ARP sweep, each probed as it answers
+        self.scan_hosts_label = QLabel(self.scan_hosts_text)
+        self.scan_hosts_label.setAlignment(Qt.AlignCenter)
+        self.scan_hosts_label.setWordWrap(True)
+        self.scan_hosts_label.setStyleSheet("QLabel { color: #a0a0a0; font-size: 8pt; }")
+        connect_layout.addWidget(self.scan_hosts_label)
+
+        self.broadcast_check = QCheckBox("Send to all checked")
+        self.broadcast_check.setStyleSheet("QCheckBox { color: white; font-size: 9pt; }")
+        self.broadcast_check.toggled.connect(self.set_broadcast)
+        connect_layout.addWidget(self.broadcast_check, alignment=Qt.AlignCenter)
+
+        # Normally the ARP sweep only runs when nothing quicker found a Roku
+        self.deep_scan_check = QCheckBox("Deep scan")
+        self.deep_scan_check.setToolTip("ARP-sweep the network even when SSDP found Rokus")
+        self.deep_scan_check.setStyleSheet("QCheckBox { color: white; font-size: 9pt; }")
+        self.deep_scan_check.setChecked(self.deep_scan)
+        self.deep_scan_check.toggled.connect(self.set_deep_scan)
+        connect_layout.addWidget(self.deep_scan_check, alignment=Qt.AlignCenter)
+
+        diagnostics_button = QPushButton("Latency...")
+        diagnostics_button.setStyleSheet(
+            "QPushButton {"
+            "  background-color: #4B0082; color: white; border-radius: 5px;"
+            "  font-size: 8pt; padding: 3px 10px;"
+            "} QPushButton:pressed { background-color: #7c4dff; }"
+            " QPushButton:disabled { color: #808080; }"
+        )
+        diagnostics_button.setEnabled(self.latency is not None)
+        diagnostics_button.clicked.connect(self.show_diagnostics)
+        connect_layout.addWidget(diagnostics_button, alignment=Qt.AlignCenter)
+        self.refresh_device_list()
+
+    def show_diagnostics(self):
+        if self.diagnostics is None:
+            self.diagnostics = DiagnosticsDialog(self.latency, self)
+        self.diagnostics.show()
+        self.diagnostics.raise_()
+
+    def set_connect_status(self, text, style="color: white;"):
+        """Connect tab status line; kept until the tab is built if it hasn't been yet."""
+        self.connect_status = (text, style)
+        if self.connect_label is not None:
+            self.connect_label.setText(text)
+            self.connect_label.setStyleSheet(style)
+
+    def set_scan_hosts_text(self, text):
+        self.scan_hosts_text = text
+        if self.scan_hosts_label is not None:
+            self.scan_hosts_label.setText(text)
 
     # ---------------------------
     # NETWORK SCAN
     # ---------------------------
     def get_all_subnets(self):
-        subnets = []
         try:
-            output = subprocess.check_output("ipconfig", text=True).splitlines()
-            for line in output:
-                if "IPv4 Address" in line or "Subnet Mask" in line:
-                    ip_match = re.search(r"(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})", line)
-                    if ip_match:
-                        ip = ip_match.group(1)
-                        subnet = '.'.join(ip.split('.')[:-1]) + '.1/24'
-                        subnets.append(subnet)
-            return list(set(subnets))
+            return local_networks()
         except Exception as e:
-            self.connect_label.setText(f"Failed to fetch subnets: {e}")
-            self.connect_label.setStyleSheet("color: red;")
+            self.set_connect_status(f"Failed to fetch subnets: {e}", "color: red;")
             return []
 
-    def scan_network_for_roku(self):
-        self.IP = ""
-        self.found = False
+    def adopt_roku(self, ip, info=None, mac=""):
+        """Make 'ip' the Roku that commands go to, and remember it for next launch."""
+        if ip != self.IP:
+            self.key_hold.release_all()  # a held key's keyup belongs to the old Roku
+        self.register_roku(ip, info, mac)
+        self.IP = ip
+        self.devices.set_active(ip)
+        self.refresh_device_list()
+        self.show_roku_found(ip)
+        self.load_app_catalog(ip, (info or {}).get("serial-number", ""))
+        self.poller.set_target(ip)
+        self.poller.resume()
+        self.health.set_target(ip, (info or {}).get("serial-number", ""), mac or device_mac(info or {}))
+        try:
+            self.device_cache.save(ip, info, mac)
+        except OSError:
+            pass
+        if not info:
+            self.fetch_device_info(ip)
+
+    def fetch_device_info(self, ip):
+        """Look up a Roku adopted without device-info (e.g. --ip), so its serial is recorded."""
+        def _fetch():
+            info = query_device_info(ip, port=self.pool.port)
+            if info is not None:
+                self.discovery_signals.device_info.emit(ip, info)
+        threading.Thread(target=_fetch, name="roku-device-info", daemon=True).start()
+
+    def on_device_info(self, ip, info):
+        if ip == self.IP:
+            self.adopt_roku(ip, info)
+
+    def register_roku(self, ip, info=None, mac=""):
+        """Add a Roku to the registry and open a connection to it ahead of the first press."""
+        if self.devices.add(ip, info, mac):
+            self.pool.warm(ip)
+        self.refresh_device_list()
 
-        subnets = self.get_all_subnets()
-        if not subnets:
-            self.connect_label.setText("No subnets found to scan")
-            self.connect_label.setStyleSheet("color: red;")
+    # ---------------------------
+    # DEVICES
+    # ---------------------------
+    def refresh_device_list(self):
+        if self.device_list is None:
+            return  # Connect tab not built yet; it fills the list when it is
+        self.device_list.blockSignals(True)
+        self.device_list.clear()
+        for device in self.devices.devices():
+            ip = device['ip']
+            item = QListWidgetItem(self.devices.label(ip))
+            item.setData(Qt.UserRole, ip)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if self.devices.is_checked(ip) else Qt.Unchecked)
+            if device.get('last_result'):
+                item.setToolTip(device['last_result'])
+            self.device_list.addItem(item)
+            if ip == self.devices.active:
+                self.device_list.setCurrentItem(item)
+        self.device_list.blockSignals(False)
+
+    def on_device_clicked(self, item):
+        ip = item.data(Qt.UserRole)
+        if ip != self.IP:
+            device = self.devices.get(ip)
+            self.adopt_roku(ip, device['info'], device['mac'])
+
+    def on_device_checked(self, item):
+        self.devices.set_checked(item.data(Qt.UserRole), item.checkState() == Qt.Checked)
+
+    def set_broadcast(self, enabled):
+        self.broadcast = enabled
+
+    def set_deep_scan(self, enabled):
+        self.deep_scan = enabled
+
+    def restore_cached_roku(self):
+        """
+        Use the cached Roku straight away if it is fresh, and double-check it
+        with one device-info request in the background. A stale or missing
+        entry falls through to a normal scan.
+        """
+        entry = self.device_cache.load()
+        if entry is None:
+            return
+        if not self.device_cache.is_fresh(entry):
+            QTimer.singleShot(0, self.scan_network_for_roku)
             return
 
-        for subnet in subnets:
-            self.connect_label.setText(f"Scanning {subnet}...")
-            self.connect_label.setStyleSheet("color: white;")
-            QApplication.processEvents()
-
-            arp = ARP(pdst=subnet)
-            ether = Ether(dst="ff:ff:ff:ff:ff:ff")
-            packet = ether / arp
-            result = srp(packet, timeout=3, verbose=False)[0]
+        self.register_roku(entry["ip"], mac=entry.get("mac", ""))
+        self.devices.set_active(entry["ip"])
+        self.IP = entry["ip"]
+        self.set_connect_status(f"Reconnecting to {entry.get('name') or self.IP}...")
+        self.load_app_catalog(self.IP, entry.get("serial", ""))
+        self.health.set_target(self.IP, entry.get("serial", ""), entry.get("mac", ""))
+
+        def _check():
+            info = query_device_info(entry["ip"], port=self.pool.port, timeout=1.0)
+            ok = self.device_cache.matches(entry, info)
+            self.discovery_signals.cache_checked.emit(ok, (entry, info))
+        threading.Thread(target=_check, name="roku-cache-check", daemon=True).start()
+
+    def on_cache_checked(self, ok, result):
+        entry, info = result
+        if self.IP != entry["ip"]:
+            return  # something else was adopted in the meantime
+        if ok:
+            self.adopt_roku(entry["ip"], info, entry.get("mac", ""))
+        else:
+            self.scan_network_for_roku()
 
-            devices = []
-            for sent, received in result:
-                devices.append({'ip': received.psrc, 'mac': received.hwsrc})
+    def _on_ssdp_notify(self, device):
+        """SSDPListener callback (background thread): confirm, then hand over to the GUI."""
+        if device['ip'] in self.devices:
+            return
+        info = query_device_info(device['ip'], device['port'])
+        if info is not None:
+            self.discovery_signals.roku_announced.emit(device['ip'], info)
+
+    def on_roku_announced(self, ip, info):
+        if self.health.is_open and self.health.matches(info):
+            self.recover_roku(ip, info)
+        elif not self.IP:
+            self.adopt_roku(ip, info)
+        else:
+            self.register_roku(ip, info)
 
-            for device in devices:
-                try:
-                    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                    sock.settimeout(1)
-                    if sock.connect_ex((device['ip'], 8060)) == 0:
-                        self.IP = device['ip']
-                        self.found = True
-                        self.connect_label.setText(f"""
-Roku found at {self.IP}
+    def show_roku_found(self, ip):
+        self.set_connect_status(f"""
+Roku found at {ip}
 
 Make sure the Roku is not in Limited 
 or Guest mode.
@@ -482,47 +1266,467 @@ To fix:
     or 'Permissive' (not 'Limited').
 3) If in Guest Mode, sign out of
      Guest Mode.
-""")
-                        self.connect_label.setStyleSheet("color: green;")
-                        sock.close()
-                        return
-                except Exception:
-                    continue
+""", "color: green;")
+
+    def scan_network_for_roku(self):
+        """Start a background scan, or cancel the one that is running."""
+        if self.scan and self.scan.is_running():
+            self.scan.cancel()
+            return
+
+        self.key_hold.release_all()  # while there's still an IP for the keyup
+        self.IP = ""
+        self.health.set_target("")
+        self.scan_hosts = 0
+        self.set_scan_hosts_text("")
+
+        # An empty list still lets the SSDP stage run
+        subnets = self.get_all_subnets()
+
+        self.set_connect_status("Searching for Roku...")
+        if self.scan_button is not None:
+            self.scan_button.setText("Cancel")
+        signals = self.discovery_signals
+        # Rokus seen before are looked up by MAC in the neighbour table first
+        known_macs = [device['mac'] for device in self.devices.devices()]
+        entry = self.device_cache.load()
+        if entry:
+            known_macs.append(entry.get("mac", ""))
+        # Keep collecting after the first Roku so every device a stage finds lands in the registry
+        self.scan = RokuScan(
+            subnets, stop_on_first=False, deep=self.deep_scan, known_macs=known_macs,
+            on_host=signals.host_found.emit,
+            on_roku=signals.roku_found.emit,
+            on_progress=signals.scan_progress.emit,
+            on_done=signals.scan_finished.emit,
+        ).start()
+
+    def on_scan_host(self, device):
+        self.scan_hosts += 1
+        self.set_scan_hosts_text(f"{self.hosts_answered()}, checking {device['ip']}")
+
+    def hosts_answered(self):
+        return f"{self.scan_hosts} host{'' if self.scan_hosts == 1 else 's'} answered"
+
+    def on_scan_roku(self, ip, info, mac):
+        if self.health.is_open and self.health.matches(info):
+            self.recover_roku(ip, info, mac)
+        elif not self.IP:
+            self.adopt_roku(ip, info, mac)
+        else:
+            self.register_roku(ip, info, mac)
+
+    def on_scan_progress(self, percent, rate):
+        if self.IP:
+            return
+        self.set_connect_status(
+            f"Scanning... {percent:.0f}%\n{self.scan_hosts} hosts, {rate:.0f} hosts/s"
+        )
 
-        self.connect_label.setText("No Roku found on the network")
-        self.connect_label.setStyleSheet("color: red;")
+    def on_scan_finished(self, rokus, cancelled):
+        if self.scan_button is not None:
+            self.scan_button.setText("Scan")
+        if self.scan_hosts:
+            self.set_scan_hosts_text(self.hosts_answered())
+        if rokus or self.found:
+            return
+        if cancelled:
+            self.set_connect_status("Scan cancelled")
+        else:
+            self.set_connect_status("No Roku found on the network", "color: red;")
+
+    # ---------------------------
+    # APPS
+    # ---------------------------
+    def load_app_catalog(self, ip, serial=""):
+        """Use this Roku's cached channel list straight away; refetch it in the background if stale."""
+        key = serial or ip
+        if self.app_catalog is not None and self.app_catalog_key == key:
+            return
+        if serial and self.app_catalog is not None and self.app_catalog_key == ip:
+            # Same Roku, now with its serial: move the catalog rather than refetch it
+            try:
+                self.app_catalog.rename(serial)
+                self.app_catalog_key = serial
+            except OSError:
+                pass  # keep using it under the IP for this session
+            return
+        self.app_catalog = AppCatalog(key)
+        self.app_catalog_key = key
+        self.app_catalog.load()
+        AppLaunchButton.icons.preload(self.app_catalog.icons().values())
+        if not self.app_catalog.is_fresh():
+            self.refresh_app_catalog(ip)
+
+    def refresh_app_catalog(self, ip):
+        catalog = self.app_catalog
+        emit = self.discovery_signals.apps_updated.emit
+
+        def _refresh():
+            try:
+                catalog.refresh(self.pool, ip, on_apps=lambda apps: emit(catalog))
+            except (OSError, ValueError, ECPError):
+                return  # keep whatever was cached; the built-in list covers the rest
+            emit(catalog)
+        threading.Thread(target=_refresh, name="app-catalog", daemon=True).start()
+
+    def on_apps_updated(self, catalog):
+        if catalog is self.app_catalog:
+            AppLaunchButton.icons.preload(catalog.icons().values())
+
+    def menu_apps(self):
+        """Right-click menu entries from the active Roku's catalog ([] until there is one)."""
+        if self.app_catalog is None:
+            return []
+        icons = self.app_catalog.icons()
+        return [(app.name, f"/launch/{app.id}", icons.get(app.id))
+                for app in self.app_catalog.apps]
 
     # ---------------------------
     # TYPING
     # ---------------------------
     def on_enter_pressed(self):
+        """Type the text box on the Roku, or cancel typing that is still going."""
+        if self.typer and self.typer.is_running():
+            self.typer.cancel()
+            return
+        self.reset_idle_timer()
         text = self.text_input.text()
-        print(f"Entered text: {text}")
+        if not text:
+            return
+        if not self.found:
+            self.typing_status_label.setText(self.not_found_text())
+            self.typing_status_label.setStyleSheet("color: red;")
+            return
+
+        self.typer = TextStreamer(
+            self.IP, port=self.pool.port, pacing=self.typing_pacing,
+            connect_timeout=self.pool.connect_timeout, read_timeout=self.pool.read_timeout,
+            latency=self.latency, on_result=self.on_device_reply,
+        )
+        self.typing_started = time.perf_counter()
+        self.enter_button.setText("Cancel")
+        self.typer.start(
+            text,
+            on_progress=self.command_signals.typing_progress.emit,
+            on_done=self.command_signals.typing_done.emit,
+        )
         self.text_input.clear()
 
+    def on_typing_progress(self, acked, total):
+        self.typing_status_label.setText(f"Typing... {acked}/{total}")
+        self.typing_status_label.setStyleSheet("color: white;")
+
+    def on_typing_done(self, acked, total, error, cancelled):
+        self.enter_button.setText("Enter")
+        elapsed = time.perf_counter() - self.typing_started
+        if error:
+            self.typing_status_label.setText(f"Typed {acked}/{total}, then: {error}")
+            self.typing_status_label.setStyleSheet("color: red;")
+        elif cancelled:
+            self.typing_status_label.setText(f"Cancelled after {acked}/{total}")
+            self.typing_status_label.setStyleSheet("color: white;")
+        else:
+            self.typing_status_label.setText(f"Typed {total} chars in {elapsed * 1000:.0f} ms")
+            self.typing_status_label.setStyleSheet("color: green;")
+
+    # ---------------------------
+    # MACROS
+    # ---------------------------
+    def add_macro_actions(self, menu, btn):
+        """AppLaunchButton menu hook: record a macro, or bind a saved one to 'btn'."""
+        menu.addSeparator()
+        if self.recorder.recording:
+            menu.addAction("Stop recording").triggered.connect(lambda: self.stop_recording(btn))
+        else:
+            menu.addAction("Record macro").triggered.connect(self.start_recording)
+        names = self.macros.names()
+        if names:
+            submenu = menu.addMenu("Run macro on click")
+            for name in names:
+                submenu.addAction(name).triggered.connect(
+                    lambda checked=False, n=name: self.bind_macro(btn, n))
+
+    def start_recording(self):
+        self.recorder.start()
+        self.remote_status_label.setText("Recording macro...")
+        self.remote_status_label.setStyleSheet("color: orange;")
+
+    def stop_recording(self, btn):
+        steps = self.recorder.stop()
+        if not steps:
+            self.remote_status_label.setText("Nothing recorded")
+            self.remote_status_label.setStyleSheet("color: white;")
+            return
+        name, ok = QInputDialog.getText(self, "Save macro", "Macro name:")
+        name = re.sub(r"[^\w.-]+", "_", name.strip())
+        if not ok or not name:
+            self.remote_status_label.setText("Macro discarded")
+            self.remote_status_label.setStyleSheet("color: white;")
+            return
+        try:
+            self.macros.save(name, steps)
+        except OSError as e:
+            self.remote_status_label.setText(f"Couldn't save macro: {e}")
+            self.remote_status_label.setStyleSheet("color: red;")
+            return
+        self.bind_macro(btn, name)
+        self.remote_status_label.setText(f"Saved '{name}' ({len(steps)} steps)")
+        self.remote_status_label.setStyleSheet("color: green;")
+
+    def bind_macro(self, btn, name):
+        btn.command_name = MACRO_PREFIX + name
+        btn.setImage(None)
+        btn.setText(name[:4])
+        btn.setToolTip(f"Macro: {name}")
+        btn.update()
+
+    def play_macro(self, name):
+        """Replay a saved macro on the active Roku, or cancel the one that is playing."""
+        if self.macro_player and self.macro_player.is_running():
+            self.macro_player.cancel()
+            return
+        if not self.found:
+            self.remote_status_label.setText(self.not_found_text())
+            self.remote_status_label.setStyleSheet("color: red;")
+            return
+        try:
+            steps = self.macros.load(name)
+        except (OSError, ValueError) as e:
+            self.remote_status_label.setText(f"Couldn't load '{name}': {e}")
+            self.remote_status_label.setStyleSheet("color: red;")
+            return
+        self.macro_player = MacroPlayer(self.pool, self.IP, steps, speed=self.macro_speed).start(
+            on_step=self.command_signals.macro_step.emit,
+            on_done=self.command_signals.macro_done.emit,
+        )
+
+    def on_macro_step(self, done, total):
+        self.remote_status_label.setText(f"Macro {done}/{total}")
+        self.remote_status_label.setStyleSheet("color: white;")
+
+    def on_macro_done(self, sent, total, error, cancelled):
+        self.poller.kick()
+        if error:
+            self.remote_status_label.setText(f"Macro stopped at {sent}/{total}: {error}")
+            self.remote_status_label.setStyleSheet("color: red;")
+        elif cancelled:
+            self.remote_status_label.setText(f"Macro cancelled at {sent}/{total}")
+            self.remote_status_label.setStyleSheet("color: white;")
+        else:
+            self.remote_status_label.setText(f"Macro done ({total} steps)")
+            self.remote_status_label.setStyleSheet("color: green;")
+
     # ---------------------------
     # COMMAND
     # ---------------------------
     def send_command(self, command):
         self.reset_idle_timer()
-        if not self.found:
+        if command.startswith(MACRO_PREFIX):
+            self.play_macro(command[len(MACRO_PREFIX):])
+            return
+        if not self.IP:
             self.remote_status_label.setText("Connect Roku first!")
             self.remote_status_label.setStyleSheet("color: red;")
             return
-        try:
-            url = f"http://{self.IP}:8060{command}"
-            requests.post(url)
-            self.remote_status_label.setText(f"Command '{command}' sent!")
+        if not self.found and not self.broadcast and not is_protected_command(command):
+            # Don't queue presses behind connect timeouts; recent ones are resent on
+            # reconnect. Keyups, power and launches still go out: they are never dropped.
+            held = self.health.hold(command)
+            self.remote_status_label.setText("Roku not responding - reconnecting..."
+                                             + (" (press kept)" if held else ""))
+            self.remote_status_label.setStyleSheet("color: orange;")
+            return
+        self.recorder.record(command)
+        if self.broadcast:
+            targets = self.devices.checked()
+            if not targets:
+                self.remote_status_label.setText("No Rokus checked!")
+                self.remote_status_label.setStyleSheet("color: red;")
+                return
+        else:
+            targets = self.IP
+        self.pipeline.submit(targets, command)
+
+    def on_hold_pressed(self, btn):
+        key = KeyHold.key_for(btn.command_name)
+        if key:
+            self.key_hold.press(key)
+
+    def on_hold_released(self, btn):
+        key = KeyHold.key_for(btn.command_name)
+        if key:
+            self.key_hold.release(key)
+
+    def on_hold_clicked(self, btn):
+        key = KeyHold.key_for(btn.command_name)
+        if key:
+            self.key_hold.clicked(key)
+        else:
+            # A hold button rebound to an app or macro behaves like any other button
+            self.send_command(btn.command_name)
+
+    def on_command_result(self, command, results):
+        """Runs on the GUI thread once the pipeline has sent 'command' to every target."""
+        self.mark_startup("first command")
+        self.key_hold.on_result(command, results)
+        self.poller.kick()
+        for ip, ok, seconds, message in results:
+            if ip == self.IP:
+                self.health.record(ok, ip)
+                if not ok and self.health.is_open and is_protected_command(command):
+                    self.health.hold(command)  # resent on reconnect rather than lost
+            device = self.devices.get(ip)
+            if device is not None:
+                device['last_result'] = f"{command}: {seconds * 1000:.0f} ms" if ok else f"{command}: {message}"
+
+        stats = self.pipeline.stats()
+        backlog = stats["queued"]
+        suffix = f" ({backlog} queued)" if backlog else ""
+        self.remote_status_label.setToolTip(
+            f"queued {backlog}, merged {stats['merged']}, "
+            f"dropped {stats['dropped_stale']} late / {stats['dropped_full']} overflow"
+        )
+        failed = [r for r in results if not r[1]]
+        if len(results) > 1:
+            slowest = max(seconds for _ip, _ok, seconds, _msg in results)
+            self.remote_status_label.setText(
+                f"'{command}' {len(results) - len(failed)}/{len(results)} ok, "
+                f"{slowest * 1000:.0f} ms{suffix}"
+            )
+            self.remote_status_label.setStyleSheet("color: red;" if failed else "color: green;")
+            self.refresh_device_list()
+        elif not failed:
+            self.remote_status_label.setText(f"Command '{command}' sent!{suffix}")
             self.remote_status_label.setStyleSheet("color: green;")
-        except Exception as e:
-            self.remote_status_label.setText(f"Error sending '{command}': {e}")
+        else:
+            message = failed[0][3]
+            self.remote_status_label.setText(f"Error sending '{command}': {message}{suffix}")
             self.remote_status_label.setStyleSheet("color: red;")
 
+    # ---------------------------
+    # HEALTH
+    # ---------------------------
+    @property
+    def found(self):
+        """True while there is an active Roku and its circuit isn't open."""
+        return bool(self.IP) and not self.health.is_open
+
+    def not_found_text(self):
+        return "Roku not responding - reconnecting..." if self.IP else "Connect Roku first!"
+
+    def on_device_reply(self, ip, ok):
+        """DevicePoller and TextStreamer callback (background thread): these count towards health too."""
+        self.health.record(ok, ip)
+
+    def on_health_changed(self, state, ip, info):
+        """HealthMonitor opened ("down") or closed ("up", "moved") the circuit for the active Roku."""
+        if state == "down":
+            if ip != self.IP:
+                return
+            for command in self.pipeline.drop_queued(ip):
+                self.health.hold(command)
+            self.poller.pause()
+            self.now_playing_label.setText("")
+            self.remote_status_label.setText("Roku not responding - reconnecting...")
+            self.remote_status_label.setStyleSheet("color: orange;")
+            self.set_connect_status(f"Lost contact with {ip}, retrying...", "color: orange;")
+        elif state == "up":
+            if ip != self.IP:
+                return
+            self.poller.resume()
+            self.resend_held(self.health.take_held(), "Reconnected")
+            self.show_roku_found(ip)
+        else:
+            self.recover_roku(ip, info)
+
+    def recover_roku(self, ip, info, mac=""):
+        """The Roku that stopped answering turned up at 'ip': switch to it and resend held presses."""
+        held = self.health.take_held()
+        old_ip = self.IP
+        self.adopt_roku(ip, info, mac)
+        if old_ip and old_ip != ip:
+            self.devices.remove(old_ip)
+            self.refresh_device_list()
+        self.resend_held(held, f"Roku moved to {ip}")
+
+    def resend_held(self, commands, status):
+        for command in commands:
+            self.pipeline.submit(self.IP, command)
+        suffix = f", resent {len(commands)} press(es)" if commands else ""
+        self.remote_status_label.setText(status + suffix)
+        self.remote_status_label.setStyleSheet("color: green;")
+
+    def on_device_state(self, state):
+        """DevicePoller saw the app or playback state change on the active Roku."""
+        if state["ip"] != self.IP:
+            return  # answer from the Roku we just switched away from
+        app, player = state["app"], state["player"]
+        if app is None:
+            self.now_playing_label.setText("")
+            return
+        text = app.name or "Home"
+        playing = PLAYER_STATES.get(player.state) if player else None
+        if playing:
+            text += f" - {playing}"
+        self.now_playing_label.setText(text)
+
+    def changeEvent(self, event):
+        # Losing focus mid-hold would never deliver the mouse release
+        if event.type() == QEvent.ActivationChange and not self.isActiveWindow():
+            self.key_hold.release_all()
+        # Nobody is looking at a minimised remote; stop polling the Roku
+        if event.type() == QEvent.WindowStateChange:
+            if self.isMinimized():
+                self.poller.pause()
+            elif self.isVisible() and not self.health.is_open:
+                self.poller.resume()
+        super().changeEvent(event)
+
+    def hideEvent(self, event):
+        self.key_hold.release_all()
+        self.poller.pause()
+        super().hideEvent(event)
+
+    def showEvent(self, event):
+        if not self.health.is_open:
+            self.poller.resume()
+        super().showEvent(event)
+
+    def closeEvent(self, event):
+        self.key_hold.release_all()
+        self.pipeline.stop()
+        self.poller.stop()
+        self.health.stop()
+        if self.diagnostics:
+            self.diagnostics.close()
+        self.pool.close()
+        if self.ssdp_listener:
+            self.ssdp_listener.stop()
+        if self.scan:
+            self.scan.cancel()
+        if self.typer:
+            self.typer.cancel()
+        if self.macro_player:
+            self.macro_player.cancel()
+        super().closeEvent(event)
+
     # ---------------------------
     # DRAW / STYLE
     # ---------------------------
     def paintEvent(self, event):
+        if "first paint" not in self.startup_marks:
+            self.mark_startup("first paint")
+            QTimer.singleShot(0, self.on_first_paint)
+
+        # Glow fades repaint the window under the buttons many times a
+        # second; the background only changes with the window size
         painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.chrome.pixmap(self))
+        painter.end()
+
+    def paintChrome(self, painter):
+        """Background, border and ribbon; drawn into self.chrome's pixmap."""
         painter.setRenderHint(QPainter.Antialiasing)
 
         # 1) Draw main gradient background
@@ -587,8 +1791,10 @@ To fix:
     # ---------------------------
     # CREATE BUTTON
     # ---------------------------
-    def create_button(self, text, command_name, size=40, circular=False):
+    def create_button(self, text, command_name, size=40, circular=False, hold=False):
         btn = AppLaunchButton(text=text, command_name=command_name)
+        btn.menu_hook = self.add_macro_actions
+        btn.app_source = self.menu_apps
         if isinstance(size, tuple):
             w, h = size
             btn.setFixedSize(w, h)
@@ -693,7 +1899,14 @@ To fix:
             """)
     
 
-        btn.clicked.connect(lambda: self.send_command(btn.command_name))
+        if hold:
+            # Taps still send a keypress; holding sends keydown/keyup (see KeyHold).
+            # The command is read at press time, since right-click can rebind it.
+            btn.pressed.connect(lambda: self.on_hold_pressed(btn))
+            btn.released.connect(lambda: self.on_hold_released(btn))
+            btn.clicked.connect(lambda: self.on_hold_clicked(btn))
+        else:
+            btn.clicked.connect(lambda: self.send_command(btn.command_name))
         self.remote_buttons.append(btn)
         return btn
 
@@ -708,24 +1921,26 @@ class DPadCrossWidget(QWidget):
         # We'll use an absolute layout approach for the arrow/OK so
         # we can position them exactly near the center, close together.
         # We'll just remove the QGridLayout entirely for total control.
-        self.up_btn = remote.create_button("▲", "/keypress/up", size=45, circular=False)
+        self.up_btn = remote.create_button("▲", "/keypress/up", size=45, circular=False, hold=True)
         self.up_btn.setParent(self)
 
-        self.left_btn = remote.create_button("◀", "/keypress/left", size=45)
+        self.left_btn = remote.create_button("◀", "/keypress/left", size=45, hold=True)
         self.left_btn.setParent(self)
 
         self.ok_btn = remote.create_button("OK", "/keypress/select", size=45)
         self.ok_btn.setParent(self)
 
-        self.right_btn= remote.create_button("▶", "/keypress/right", size=45)
+        self.right_btn= remote.create_button("▶", "/keypress/right", size=45, hold=True)
         self.right_btn.setParent(self)
 
-        self.down_btn = remote.create_button("▼", "/keypress/down", size=45)
+        self.down_btn = remote.create_button("▼", "/keypress/down", size=45, hold=True)
         self.down_btn.setParent(self)
 
         # We'll do the margin, corner radius for painting
         self._margin = 4
         self._cornerR = 15
+        # The purple cross only changes when the buttons move (resizeEvent)
+        self.cross = StaticLayer(self.paintCross)
 
     def resizeEvent(self, event):
         """
@@ -761,10 +1976,16 @@ class DPadCrossWidget(QWidget):
         self.left_btn.move(ok_x - 45 + gap, ok_y)
         # right is to the right of OK
         self.right_btn.move(ok_x + 45 - gap, ok_y)
+        self.cross.invalidate()
 
     def paintEvent(self, event):
         super().paintEvent(event)
         painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.cross.pixmap(self))
+        painter.end()
+
+    def paintCross(self, painter):
+        """Union of the five buttons' rounded rects, filled and outlined."""
         painter.setRenderHint(QPainter.Antialiasing)
 
         fillColor   = QColor("#4B0082")
@@ -783,15 +2004,38 @@ class DPadCrossWidget(QWidget):
             crossPath += subPath
 
         painter.drawPath(crossPath)
-        painter.end()
 
 
 
 # --------------------------------------------------------------------
-# 4) Main Entry
+# 8) Main Entry
 # --------------------------------------------------------------------
+def parse_args(argv):
+    """Our own options; whatever is left over goes to QApplication."""
+    parser = argparse.ArgumentParser(description="Roku remote control window")
+    parser.add_argument("--ip", help="talk to this Roku instead of the remembered one")
+    parser.add_argument("--port", type=int, default=ECP_PORT, help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--startup-report", nargs="?", const=True, metavar="COMMAND",
+        help="print startup timings to stderr; with COMMAND (e.g. /keypress/home), "
+             "send it right after the first paint and quit once it is acknowledged",
+    )
+    parser.add_argument("--no-latency-stats", action="store_true",
+                        help="don't time commands for the Connect tab's latency view")
+    args, rest = parser.parse_known_args(argv[1:])
+    return args, argv[:1] + rest
+
+
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = RokuRemote()
+    args, qt_argv = parse_args(sys.argv)
+    app = QApplication(qt_argv)
+    window = RokuRemote(port=args.port, startup_report=bool(args.startup_report),
+                        latency_stats=not args.no_latency_stats)
+    if args.ip:
+        window.adopt_roku(args.ip)
+    if isinstance(args.startup_report, str):
+        window.startup_command = args.startup_report
+        window.command_signals.result.connect(lambda *_: app.quit())
+        QTimer.singleShot(5000, app.quit)  # don't hang if the Roku never answers
     window.show()
     sys.exit(app.exec_())
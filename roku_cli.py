@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""
+roku-remote - drive a Roku from the command line, no window needed.
+
+    roku-remote send home
+    roku-remote send down down select
+    roku-remote type "the office"
+    roku-remote query active-app
+    roku-remote launch 12
+    roku-remote discover --save
+
+The Roku is picked from --ip, then $ROKU_IP, then the one the remote
+app (or 'discover --save') last remembered. Only roku_ecp and the
+standard library are imported, so a single press is a few milliseconds
+of startup plus one round trip.
+"""
+import argparse
+import os
+import sys
+
+from roku_ecp import (
+    ECP_PORT, ECPClient, ECPError, DeviceCache, literal_paths, parse_apps,
+    query_device_info, ssdp_discover,
+)
+
+
+def resolve_ip(args):
+    """--ip, then $ROKU_IP, then the cached device; None if none of those are set."""
+    if args.ip:
+        return args.ip
+    if os.environ.get("ROKU_IP"):
+        return os.environ["ROKU_IP"]
+    entry = DeviceCache().load()
+    return entry["ip"] if entry else None
+
+
+# ---------------------------
+# COMMANDS
+# ---------------------------
+def cmd_send(client, args):
+    for key in args.keys:
+        client.keypress(key)
+
+
+def cmd_type(client, args):
+    total = len(list(literal_paths(args.text)))
+    sent = client.type(args.text, pacing=args.pacing)
+    if sent < total:
+        print(f"Typed {sent} of {total} characters", file=sys.stderr)
+        return 1
+
+
+def cmd_launch(client, args):
+    client.launch(args.app_id)
+
+
+def cmd_query(client, args):
+    if args.name == "active-app":
+        app = client.active_app()
+        print(f"{app.name} ({app.id})" if app.id else app.name)
+    elif args.name == "device-info":
+        for key, value in client.device_info().as_dict().items():
+            print(f"{key}: {value}")
+    elif args.name == "apps":
+        for app in parse_apps(client.query("apps")):
+            print(f"{app.id}\t{app.name}\t{app.version}")
+    else:
+        sys.stdout.write(client.query(args.name).decode("utf-8", "replace"))
+
+
+def cmd_discover(args):
+    devices = ssdp_discover(timeout=args.wait)
+    if not devices:
+        print("No Rokus answered", file=sys.stderr)
+        return 1
+    for device in devices:
+        info = query_device_info(device["ip"], port=device["port"], timeout=1.0) or {}
+        print(f"{device['ip']}\t{info.get('friendly-device-name') or info.get('model-name', '')}")
+    if args.save:
+        first = devices[0]
+        DeviceCache().save(first["ip"], query_device_info(first["ip"], port=first["port"]))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="roku-remote", description="Control a Roku over ECP.")
+    parser.add_argument("--ip", help="Roku address (default: $ROKU_IP, then the remembered Roku)")
+    parser.add_argument("--port", type=int, default=ECP_PORT)
+    parser.add_argument("--timeout", type=float, default=3.0, help="read timeout in seconds")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("send", help="press one or more keys (home, select, up, volumeup, ...)")
+    p.add_argument("keys", nargs="+", metavar="KEY")
+    p.set_defaults(func=cmd_send)
+
+    p = sub.add_parser("type", help="type text into the focused search box")
+    p.add_argument("text")
+    p.add_argument("--pacing", type=float, default=0.0, help="seconds between characters")
+    p.set_defaults(func=cmd_type)
+
+    p = sub.add_parser("launch", help="launch a channel by id (12 = Netflix, 837 = YouTube)")
+    p.add_argument("app_id")
+    p.set_defaults(func=cmd_launch)
+
+    p = sub.add_parser("query", help="print a /query/ result (active-app, device-info, apps, media-player)")
+    p.add_argument("name")
+    p.set_defaults(func=cmd_query)
+
+    p = sub.add_parser("discover", help="find Rokus on the local network with SSDP")
+    p.add_argument("--wait", type=float, default=1.0, help="seconds to wait for answers")
+    p.add_argument("--save", action="store_true", help="remember the first one found")
+    p.set_defaults(func=cmd_discover)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "discover":
+        return args.func(args) or 0
+
+    ip = resolve_ip(args)
+    if not ip:
+        print("No Roku to talk to: pass --ip, set ROKU_IP or run 'roku-remote discover --save'",
+              file=sys.stderr)
+        return 2
+    try:
+        with ECPClient(ip, port=args.port, read_timeout=args.timeout) as client:
+            return args.func(client, args) or 0
+    except (OSError, ECPError, ValueError) as e:
+        print(f"{ip}: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2483 @@
+"""
+roku_ecp - talk to Rokus over ECP (External Control Protocol) without Qt.
+
+Everything the remote needs that isn't a widget lives here: discovery
+(neighbour table, SSDP, ARP sweep), the keep-alive connection pool, /query/ reply parsing,
+the ordered command pipeline, text typing, macros and the device cache. ECPClient and
+AsyncECPClient wrap it all up for scripts; roku_cli.py is the command
+line front end.
+
+Only the cheap parts of the standard library are imported up front so
+scripts start fast. asyncio, concurrent.futures and scapy are imported
+where they are first needed.
+"""
+import array
+import ipaddress
+import json
+import os
+import re
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+import collections
+import urllib.parse
+import xml.etree.ElementTree as ET
+try:
+    import fcntl  # Linux/macOS only; used to read interface addresses
+except ImportError:
+    fcntl = None
+
+# --------------------------------------------------------------------
+# 1) ECPConnectionPool - keep-alive HTTP connections, per Roku
+# --------------------------------------------------------------------
+ECP_PORT = 8060
+
+class ECPError(Exception):
+    """The Roku answered an ECP request with an error status."""
+
+
+class ECPResponse:
+    """The parts of an HTTP response an ECP caller needs."""
+    __slots__ = ("status_code", "reason", "content")
+
+    def __init__(self, status_code, reason, content):
+        self.status_code = status_code
+        self.reason = reason
+        self.content = content
+
+    @property
+    def ok(self):
+        return 200 <= self.status_code < 300
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise ECPError(f"{self.status_code} {self.reason}")
+
+
+def request_bytes(method, host, path):
+    """One bodiless HTTP/1.1 request, ready for sendall."""
+    return f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: 0\r\n\r\n".encode("ascii")
+
+
+def read_response(reader):
+    """
+    Read one HTTP/1.1 response off a keep-alive (or pipelined) connection.
+    Returns (ECPResponse, will_close). Raises ConnectionError if the Roku
+    hung up before answering and ValueError on garbage.
+    """
+    status_line = reader.readline(1024)
+    if not status_line:
+        raise ConnectionResetError("Roku closed the connection")
+    parts = status_line.split(None, 2)
+    if len(parts) < 2 or not parts[1].isdigit():
+        raise ValueError(f"Bad response: {status_line!r}")
+    headers = {}
+    while True:
+        line = reader.readline(4096)
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.partition(b":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get(b"transfer-encoding", b"").lower() == b"chunked":
+        chunks = []
+        while True:
+            size = int(reader.readline(1024).split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                # Skip any trailers up to the blank line
+                while reader.readline(4096) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            chunks.append(reader.read(size))
+            reader.read(2)
+        body = b"".join(chunks)
+    else:
+        length = int(headers.get(b"content-length", b"0") or 0)
+        body = reader.read(length) if length else b""
+        if len(body) < length:
+            raise ConnectionResetError("Roku closed the connection mid-reply")
+
+    reason = parts[2].strip().decode("latin-1") if len(parts) > 2 else ""
+    will_close = headers.get(b"connection", b"").lower() == b"close"
+    return ECPResponse(int(parts[1]), reason, body), will_close
+
+
+class _Connection:
+    """A socket plus its buffered reader."""
+    __slots__ = ("sock", "reader")
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.reader = sock.makefile("rb")
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+class ECPConnectionPool:
+    """
+    Keeps idle keep-alive connections to each Roku so key presses reuse
+    an open TCP connection instead of paying a handshake every time.
+    Roku closes idle sockets after a while; a request that fails because
+    its reused socket was already closed - or that times out on it, as
+    when the peer vanished without sending a reset - is resent once on a
+    fresh one.
+
+    ECP only ever needs bodiless requests, so this speaks HTTP/1.1 on a
+    plain socket; http.client (and the email package it drags in) would
+    cost more to import than a key press takes to send.
+    """
+    def __init__(self, connect_timeout=1.0, read_timeout=3.0, port=ECP_PORT, max_idle=2):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.port = port
+        self.max_idle = max_idle
+
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def url(self, ip, path):
+        return f"http://{ip}:{self.port}{path}"
+
+    def connect(self, ip):
+        """Open a new connection, with connect_timeout for the handshake and read_timeout after."""
+        sock = socket.create_connection((ip, self.port), timeout=self.connect_timeout)
+        sock.settimeout(self.read_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return _Connection(sock)
+
+    def _checkout(self, ip):
+        with self._lock:
+            idle = self._idle.get(ip)
+            if idle:
+                return idle.pop(), True
+        return self.connect(ip), False
+
+    def _checkin(self, ip, conn):
+        with self._lock:
+            idle = self._idle.setdefault(ip, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def request(self, method, ip, path, timing=None):
+        """
+        Send one request and read the reply. If 'timing' is a dict, the
+        seconds spent opening a connection and then waiting on the Roku
+        are stored in timing["connect"] and timing["server"].
+        """
+        if timing is not None:
+            start = time.perf_counter()
+        conn, reused = self._checkout(ip)
+        if timing is not None:
+            timing["connect"] = time.perf_counter() - start
+        data = request_bytes(method, f"{ip}:{self.port}", path)
+        try:
+            resp, will_close = self._roundtrip(conn, data)
+        except (ConnectionError, socket.timeout):
+            conn.close()
+            if not reused:
+                raise
+            if timing is not None:
+                reconnect = time.perf_counter()
+            conn = self.connect(ip)
+            if timing is not None:
+                timing["connect"] += time.perf_counter() - reconnect
+            try:
+                resp, will_close = self._roundtrip(conn, data)
+            except BaseException:
+                conn.close()
+                raise
+        except BaseException:
+            conn.close()
+            raise
+        if will_close:
+            conn.close()
+        else:
+            self._checkin(ip, conn)
+        if timing is not None:
+            timing["server"] = time.perf_counter() - start - timing["connect"]
+        return resp
+
+    @staticmethod
+    def _roundtrip(conn, data):
+        conn.sock.sendall(data)
+        return read_response(conn.reader)
+
+    def post(self, ip, path):
+        return self.request("POST", ip, path)
+
+    def get(self, ip, path):
+        return self.request("GET", ip, path)
+
+    def warm(self, ip):
+        """Open the connection to 'ip' in the background so the first press is fast."""
+        def _warm():
+            try:
+                self.get(ip, "/query/device-info")
+            except Exception:
+                pass
+        threading.Thread(target=_warm, name="ecp-warm", daemon=True).start()
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle.values():
+                for conn in idle:
+                    conn.close()
+            self._idle.clear()
+
+
+# --------------------------------------------------------------------
+# 2) Replies - /query/ parsers into slotted records
+# --------------------------------------------------------------------
+# Fields pulled out of /query/device-info; everything else is ignored.
+DEVICE_INFO_FIELDS = (
+    "serial-number", "device-id", "vendor-name", "model-name",
+    "friendly-device-name", "wifi-mac", "ethernet-mac", "network-type", "power-mode",
+)
+XML_CHUNK = 512  # bytes fed to the parser between checks for "got everything"
+
+
+class _Record:
+    """
+    Base for parsed /query/ replies: a fixed set of string fields in
+    __slots__, compared by value. get() and [] read a field by its ECP
+    name ("serial-number"), so code written for plain dicts keeps working.
+    """
+    __slots__ = ()
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values.get(name, ""))
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def __getitem__(self, key):
+        name = key.replace("-", "_")
+        if name not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, name)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def as_dict(self):
+        """Plain {ECP name: value}, e.g. for JSON."""
+        return {name.replace("_", "-"): getattr(self, name) for name in self.__slots__}
+
+
+class DeviceInfo(_Record):
+    __slots__ = tuple(field.replace("-", "_") for field in DEVICE_INFO_FIELDS)
+
+
+class App(_Record):
+    """An <app> from /query/apps or /query/active-app."""
+    __slots__ = ("id", "name", "type", "version")
+
+    # Spelled out: catalogs run to hundreds of apps and the generic __init__ is 4x slower
+    def __init__(self, id="", name="", type="", version=""):
+        self.id = id
+        self.name = name
+        self.type = type
+        self.version = version
+
+
+class MediaPlayer(_Record):
+    """/query/media-player: state is play, pause, buffer, close, ...; plugin is the app's name."""
+    __slots__ = ("state", "plugin", "position", "duration")
+
+
+# Only device-info is streamed: it wants 9 of ~70 fields and can stop early.
+# Replies that are read in full go through ET.fromstring, whose C tree
+# builder beats a pull parser's per-element events on time and peak memory.
+def _events(xml_bytes, events=("end",)):
+    """
+    (event, element) pairs from an XMLPullParser fed XML_CHUNK bytes at a
+    time, so a caller that has what it needs can stop before the rest of
+    the reply is even tokenised. Raises ET.ParseError on bad XML.
+    """
+    parser = ET.XMLPullParser(events)
+    for start in range(0, len(xml_bytes), XML_CHUNK):
+        parser.feed(xml_bytes[start:start + XML_CHUNK])
+        yield from parser.read_events()
+    parser.close()
+
+
+_DEVICE_INFO_SLOTS = dict(zip(DEVICE_INFO_FIELDS, DeviceInfo.__slots__))
+
+def parse_device_info(xml_bytes):
+    """The DEVICE_INFO_FIELDS of a /query/device-info reply as a DeviceInfo, or None if it isn't one."""
+    values = {}
+    last = None
+    try:
+        for _, element in _events(xml_bytes):
+            slot = _DEVICE_INFO_SLOTS.get(element.tag)
+            if slot is not None:
+                values[slot] = (element.text or "").strip()
+                if len(values) == len(_DEVICE_INFO_SLOTS):
+                    break  # the other ~60 fields are of no interest
+            last = element
+        else:
+            # Read to the end (some firmware leaves fields out): the last element closed is the root
+            if last is None or last.tag != "device-info":
+                return None
+    except ET.ParseError:
+        return None
+    return DeviceInfo(**values)
+
+
+def parse_apps(xml_bytes):
+    """[App, ...] from a /query/apps reply ([] if unreadable)."""
+    try:
+        root = ET.fromstring(xml_bytes)
+    except ET.ParseError:
+        return []
+    return [App(app.get("id"), (app.text or "").strip(), app.get("type", ""), app.get("version", ""))
+            for app in root.iter("app") if app.get("id")]
+
+
+def parse_active_app(xml_bytes):
+    """The App in a /query/active-app reply (None if unreadable)."""
+    try:
+        app = ET.fromstring(xml_bytes).find("app")
+    except ET.ParseError:
+        return None
+    if app is None:
+        return None
+    return App(app.get("id", ""), (app.text or "").strip(), app.get("type", ""), app.get("version", ""))
+
+
+def parse_media_player(xml_bytes):
+    """A MediaPlayer from /query/media-player (None if unreadable)."""
+    try:
+        root = ET.fromstring(xml_bytes)
+    except ET.ParseError:
+        return None
+    if root.tag != "player":
+        return None
+    plugin = root.find("plugin")
+    return MediaPlayer(state=root.get("state", ""),
+                       plugin=plugin.get("name", "") if plugin is not None else "",
+                       position=(root.findtext("position") or "").strip(),
+                       duration=(root.findtext("duration") or "").strip())
+
+
+class ReplyCache:
+    """
+    The last body and parsed record per key (usually (ip, path)). parse()
+    hands back the previous record when the same bytes come back, which
+    for a poller or a re-check of a known Roku is nearly every time.
+    """
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def parse(self, key, data, parser):
+        """parser(data), unless data is what was last parsed for key."""
+        with self._lock:
+            last = self._entries.get(key)
+            if last is not None and last[0] == data:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return last[1]
+        record = parser(data)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (data, record)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return record
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# --------------------------------------------------------------------
+# 3) Discovery - probe candidate hosts and confirm they are Rokus
+# --------------------------------------------------------------------
+def device_mac(info):
+    """The MAC of the interface the Roku is actually using, per its device-info."""
+    if info.get("network-type") == "ethernet" and info.get("ethernet-mac"):
+        return info["ethernet-mac"].lower()
+    return (info.get("wifi-mac") or info.get("ethernet-mac") or "").lower()
+
+def probe_ecp_port(ip, port=ECP_PORT, timeout=1.0):
+    """True if something accepts TCP connections on ip:port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        return sock.connect_ex((ip, port)) == 0
+
+# A known Roku is re-checked at every launch and rescan; its device-info rarely changes
+device_info_replies = ReplyCache()
+
+def query_device_info(ip, port=ECP_PORT, timeout=2.0):
+    """Fetch and parse /query/device-info into a DeviceInfo, or None if ip isn't answering like a Roku."""
+    try:
+        with socket.create_connection((ip, port), timeout=timeout) as sock:
+            sock.sendall(request_bytes("GET", f"{ip}:{port}", "/query/device-info"))
+            with sock.makefile("rb") as reader:
+                resp, _ = read_response(reader)
+    except (OSError, ValueError):
+        return None
+    if resp.status_code != 200:
+        return None
+    return device_info_replies.parse((ip, port), resp.content, parse_device_info)
+
+def confirm_roku(ip, port=ECP_PORT, timeout=1.0):
+    """Probe ip's ECP port and, if open, confirm it with device-info. Returns the DeviceInfo or None."""
+    try:
+        if not probe_ecp_port(ip, port, timeout):
+            return None
+    except OSError:
+        return None
+    return query_device_info(ip, port, timeout=2 * timeout)
+
+# SSDP: Rokus answer M-SEARCH for "roku:ecp" and announce themselves with NOTIFY
+SSDP_ADDR = ("239.255.255.250", 1900)
+SSDP_ST = "roku:ecp"
+
+def parse_ssdp_message(data):
+    """Split an SSDP datagram into (start_line, headers); header names are upper-cased."""
+    lines = data.decode("utf-8", "replace").replace("\r\n", "\n").split("\n")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().upper()] = value.strip()
+    return lines[0].strip(), headers
+
+def ssdp_device(headers):
+    """Build a device dict from an SSDP LOCATION header, or None if there isn't a usable one."""
+    location = headers.get("LOCATION", "")
+    parts = urllib.parse.urlsplit(location)
+    if not parts.hostname:
+        return None
+    return {
+        'ip': parts.hostname,
+        'port': parts.port or ECP_PORT,
+        'location': location,
+        'usn': headers.get("USN", ""),
+    }
+
+def ssdp_discover(timeout=0.4, target=SSDP_ADDR, search_target=SSDP_ST, sends=2, limit=None):
+    """
+    Multicast an M-SEARCH for Rokus and collect every answer that arrives
+    within 'timeout' seconds, or until 'limit' devices have answered.
+    Returns a list of device dicts (see ssdp_device), one per LOCATION.
+    'target' can point at a unicast address, which is handy for a local
+    stand-in responder.
+    """
+    request = (
+        "M-SEARCH * HTTP/1.1\r\n"
+        f"HOST: {target[0]}:{target[1]}\r\n"
+        'MAN: "ssdp:discover"\r\n'
+        f"ST: {search_target}\r\n"
+        "MX: 1\r\n"
+        "\r\n"
+    ).encode()
+
+    found = {}
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP) as sock:
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+        # UDP can drop a datagram; a second copy costs nothing
+        for _ in range(sends):
+            sock.sendto(request, target)
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            sock.settimeout(remaining)
+            try:
+                data, _addr = sock.recvfrom(2048)
+            except socket.timeout:
+                break
+            start, headers = parse_ssdp_message(data)
+            if not start.startswith("HTTP/1.1 200") or headers.get("ST") != search_target:
+                continue
+            device = ssdp_device(headers)
+            if device:
+                found.setdefault(device['location'], device)
+                if limit and len(found) >= limit:
+                    break
+    return list(found.values())
+
+
+class SSDPListener:
+    """
+    Listens for the NOTIFY announcements Rokus multicast when they boot or
+    join the network, and calls on_device(device_dict) from a background
+    thread for every "ssdp:alive" with NT roku:ecp.
+    """
+    def __init__(self, on_device, bind=("", SSDP_ADDR[1]), group=SSDP_ADDR[0],
+                 search_target=SSDP_ST):
+        self.on_device = on_device
+        self.bind = bind
+        self.group = group
+        self.search_target = search_target
+
+        self._sock = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._sock.getsockname() if self._sock else None
+
+    def start(self):
+        """Bind and start listening. Raises OSError if the port can't be bound."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, "SO_REUSEPORT"):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        try:
+            sock.bind(self.bind)
+            if self.group:
+                mreq = struct.pack("4s4s", socket.inet_aton(self.group), socket.inet_aton("0.0.0.0"))
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+        except OSError:
+            sock.close()
+            raise
+        sock.settimeout(0.5)
+        self._sock = sock
+        self._thread = threading.Thread(target=self._run, name="ssdp-listen", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(1.0)
+        if self._sock:
+            self._sock.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                data, _addr = self._sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            start, headers = parse_ssdp_message(data)
+            if not start.startswith("NOTIFY"):
+                continue
+            if headers.get("NT") != self.search_target or headers.get("NTS") != "ssdp:alive":
+                continue
+            device = ssdp_device(headers)
+            if device:
+                self.on_device(device)
+
+
+def arp_sweep(network, on_reply, timeout=3.0, cancel=None, on_tick=None):
+    """
+    Broadcast an ARP who-has for every address in 'network' and call
+    on_reply({'ip', 'mac'}) for each host as its answer arrives, instead
+    of waiting for the whole window like srp() does. Listens for up to
+    'timeout' seconds, or until the 'cancel' Event is set; on_tick(frac)
+    reports how much of the window has passed.
+    """
+    # scapy takes the best part of a second to import, so only pay for it here
+    from scapy.all import ARP, Ether, AsyncSniffer, conf, sendp
+
+    net = ipaddress.ip_network(network, strict=False)
+    iface = conf.route.route(str(next(net.hosts(), net.network_address)))[0]
+    seen = set()
+
+    def _on_packet(pkt):
+        arp = pkt[ARP]
+        if arp.op != 2 or arp.psrc in seen:  # 2 = is-at
+            return
+        if ipaddress.ip_address(arp.psrc) not in net:
+            return
+        seen.add(arp.psrc)
+        on_reply({'ip': arp.psrc, 'mac': arp.hwsrc})
+
+    # Open the capture socket here so a missing raw-socket permission raises
+    # in this thread, rather than in AsyncSniffer's where it is only printed
+    listen = conf.L2listen(iface=iface)
+    ready = threading.Event()
+    sniffer = AsyncSniffer(opened_socket=listen, store=False, lfilter=lambda pkt: ARP in pkt,
+                           prn=_on_packet, started_callback=ready.set)
+    sniffer.start()
+    try:
+        if not ready.wait(1.0):
+            raise PermissionError(f"could not start listening for ARP replies on {iface}")
+        sendp(Ether(dst="ff:ff:ff:ff:ff:ff") / ARP(pdst=str(net)), iface=iface, verbose=False)
+        start = time.monotonic()
+        while True:
+            elapsed = time.monotonic() - start
+            if elapsed >= timeout:
+                break
+            if on_tick:
+                on_tick(elapsed / timeout)
+            if cancel is not None and cancel.wait(min(0.1, timeout - elapsed)):
+                break
+            elif cancel is None:
+                time.sleep(min(0.1, timeout - elapsed))
+    finally:
+        if sniffer.running:
+            sniffer.stop()
+        listen.close()
+    return len(seen)
+
+# MAC prefixes (OUIs) registered to Roku, Inc. Roku TVs made by TCL, Hisense
+# and others carry the TV maker's OUI, so those are only found by cached MAC.
+ROKU_OUIS = frozenset((
+    "00:0d:4b", "08:05:81", "10:59:32", "20:ef:bd", "84:ea:ed", "88:de:a9", "ac:3a:7a",
+    "ac:ae:19", "b0:a7:37", "b0:ee:7b", "b8:3e:59", "b8:a1:75", "c8:3a:6b", "cc:6d:a0",
+    "d0:4d:2c", "d8:31:34", "dc:3a:5e",
+))
+ATF_COM = 0x2  # /proc/net/arp flag: entry is complete (the host answered)
+
+def normalise_mac(mac):
+    """'B0-A7-37-1-2-3' (Windows, or macOS's unpadded octets) -> 'b0:a7:37:01:02:03'."""
+    return ":".join(part.zfill(2) for part in mac.lower().replace("-", ":").split(":"))
+
+def neighbour_table(path="/proc/net/arp"):
+    """
+    The hosts this machine already knows the MAC of, as [{'ip', 'mac'}],
+    read from the kernel's ARP cache without sending anything: /proc on
+    Linux, 'arp -a' elsewhere. Empty if the table can't be read.
+    """
+    neighbours = []
+    if sys.platform.startswith("linux"):
+        try:
+            with open(path, encoding="ascii") as f:
+                lines = f.read().splitlines()[1:]
+        except OSError:
+            return []
+        for line in lines:
+            fields = line.split()
+            if len(fields) < 4 or not int(fields[2], 16) & ATF_COM:
+                continue
+            neighbours.append({'ip': fields[0], 'mac': fields[3].lower()})
+        return neighbours
+
+    try:
+        output = subprocess.check_output(["arp", "-a"], text=True, timeout=2.0,
+                                         stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.SubprocessError):
+        return []
+    # Windows: "  192.168.1.20   b0-a7-37-12-34-56   dynamic"
+    # macOS/BSD: "? (192.168.1.20) at b0:a7:37:12:34:56 on en0 ifscope [ethernet]"
+    for match in re.finditer(r"(\d{1,3}(?:\.\d{1,3}){3})\)?\s+(?:at\s+)?"
+                             r"([0-9a-fA-F]{1,2}(?:[:-][0-9a-fA-F]{1,2}){5})\b", output):
+        neighbours.append({'ip': match.group(1), 'mac': normalise_mac(match.group(2))})
+    return neighbours
+
+def roku_neighbours(known_macs=(), table=None):
+    """
+    Entries of the neighbour table that are probably Rokus: a MAC in
+    'known_macs' (e.g. the cached device's), then any with a Roku OUI.
+    They still need confirming; this only saves sweeping for them.
+    """
+    known = {normalise_mac(mac) for mac in known_macs if mac}
+    table = neighbour_table() if table is None else table
+    neighbours = [n for n in table if n['mac'] != "00:00:00:00:00:00"]
+    return ([n for n in neighbours if n['mac'] in known]
+            + [n for n in neighbours if n['mac'] not in known and n['mac'][:8] in ROKU_OUIS])
+
+
+# --------------------------------------------------------------------
+# 4) Interfaces - which local networks to sweep
+# --------------------------------------------------------------------
+# Linux ioctl requests and interface flags (see netdevice(7))
+SIOCGIFFLAGS = 0x8913
+SIOCGIFADDR = 0x8915
+SIOCGIFNETMASK = 0x891B
+IFF_UP = 0x1
+IFF_LOOPBACK = 0x8
+IFF_RUNNING = 0x40
+
+# Bridges and virtual links that never have a Roku behind them
+VIRTUAL_IFACE_PREFIXES = ("docker", "br-", "veth", "virbr", "vmnet", "vboxnet", "tun", "tap", "wg")
+
+# Never ARP-sweep more than this many address bits around our own address;
+# a /16 corporate LAN would otherwise mean 65k probes.
+MIN_SWEEP_PREFIX = 22
+
+def _iface_ioctl(sock, request, name):
+    ifreq = struct.pack("256s", name.encode()[:15])
+    return fcntl.ioctl(sock.fileno(), request, ifreq)
+
+def linux_interfaces():
+    """
+    Yield (name, IPv4Interface) for every interface that is up and running,
+    read in-process with ioctl rather than by parsing a tool's output.
+    Loopback and container/VM bridges are skipped.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        for _index, name in socket.if_nameindex():
+            if name.startswith(VIRTUAL_IFACE_PREFIXES):
+                continue
+            try:
+                flags = struct.unpack_from("H", _iface_ioctl(sock, SIOCGIFFLAGS, name), 16)[0]
+                if flags & IFF_LOOPBACK or not (flags & IFF_UP and flags & IFF_RUNNING):
+                    continue
+                addr = socket.inet_ntoa(_iface_ioctl(sock, SIOCGIFADDR, name)[20:24])
+                mask = socket.inet_ntoa(_iface_ioctl(sock, SIOCGIFNETMASK, name)[20:24])
+            except OSError:
+                continue  # no IPv4 address on this interface
+            yield name, ipaddress.IPv4Interface(f"{addr}/{mask}")
+
+def ipconfig_interfaces():
+    """Yield (name, IPv4Interface) from Windows' ipconfig, pairing each address with its mask."""
+    output = subprocess.check_output("ipconfig", text=True).splitlines()
+    name, addr = "", None
+    for line in output:
+        if line and not line.startswith(" "):
+            name, addr = line.strip().rstrip(":"), None
+            continue
+        ip_match = re.search(r"(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})", line)
+        if not ip_match:
+            continue
+        if "IPv4 Address" in line:
+            addr = ip_match.group(1)
+        elif "Subnet Mask" in line and addr:
+            yield name, ipaddress.IPv4Interface(f"{addr}/{ip_match.group(1)}")
+            addr = None
+
+def default_route_interface():
+    """Last resort: the address we'd use to reach the internet, assumed to be a /24."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.connect(("192.0.2.1", 9))  # UDP connect sends nothing
+        return "default", ipaddress.IPv4Interface(f"{sock.getsockname()[0]}/24")
+
+def local_networks():
+    """
+    The IPv4 networks this machine is attached to, as CIDR strings ready
+    for an ARP sweep (e.g. '192.168.0.0/23').
+    """
+    if sys.platform == "win32":
+        interfaces = list(ipconfig_interfaces())
+    elif sys.platform.startswith("linux") and fcntl is not None:
+        interfaces = list(linux_interfaces())
+    else:
+        interfaces = [default_route_interface()]
+
+    networks = []
+    for _name, iface in interfaces:
+        if iface.ip.is_loopback or iface.ip.is_link_local:
+            continue
+        network = iface.network
+        if network.prefixlen < MIN_SWEEP_PREFIX:
+            network = ipaddress.IPv4Interface(f"{iface.ip}/{MIN_SWEEP_PREFIX}").network
+        if str(network) not in networks:
+            networks.append(str(network))
+    return networks
+
+
+# --------------------------------------------------------------------
+# 5) RokuScan - background, cancellable network scan
+# --------------------------------------------------------------------
+class RokuScan:
+    """
+    Looks for Rokus on a background thread: first the hosts already in
+    the kernel's neighbour table that have a MAC from 'known_macs' or a
+    Roku OUI (no packets sent beyond the probes), then SSDP, then an ARP
+    sweep of each network in 'networks'. Every host is probed the moment
+    it answers ARP, so results stream out while the sweep is still
+    listening. Each stage is a fallback for the ones before it: once a
+    stage has confirmed a Roku the later ones are skipped, so a Roku
+    found in the neighbour table costs no multicast or raw-socket
+    traffic at all. 'deep' runs every stage regardless. With
+    stop_on_first the scan ends at the first Roku; otherwise it keeps
+    collecting until done or cancel() is called.
+
+    Callbacks are optional and are called from background threads:
+      on_host(device)            a host answered ARP ({'ip', 'mac'})
+      on_roku(ip, info, mac)     a Roku was confirmed
+      on_progress(pct, rate)     pct in 0..100, rate in hosts checked/sec
+      on_done(rokus, cancelled)  once at the end; rokus is [(ip, info, mac)]
+    """
+    SSDP_SHARE = 0.1        # share of the progress bar given to SSDP
+    PROGRESS_INTERVAL = 0.1  # seconds between on_progress calls
+
+    def __init__(self, networks, stop_on_first=False, deep=False, use_ssdp=True,
+                 use_neighbours=True, known_macs=(), arp_timeout=3.0, probe_timeout=1.0,
+                 max_workers=32, on_host=None, on_roku=None, on_progress=None, on_done=None):
+        self.networks = list(networks)
+        self.stop_on_first = stop_on_first
+        self.deep = deep
+        self.use_ssdp = use_ssdp
+        self.use_neighbours = use_neighbours
+        self.known_macs = list(known_macs)
+        self.arp_timeout = arp_timeout
+        self.probe_timeout = probe_timeout
+        self.max_workers = max_workers
+        self.on_host = on_host
+        self.on_roku = on_roku
+        self.on_progress = on_progress
+        self.on_done = on_done
+
+        self.rokus = []
+        self.hosts_checked = 0
+        self._seen = set()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()  # cancel() was called
+        self._done = threading.Event()    # stop now: cancelled, or stop_on_first found one
+        self._started = 0.0
+        self._last_progress = 0.0
+        self._thread = None
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="roku-scan", daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+        self._done.set()
+
+    def wait(self, timeout=None):
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        from concurrent.futures import ThreadPoolExecutor
+        self._started = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="roku-probe")
+        try:
+            if self.use_neighbours:
+                for device in roku_neighbours(self.known_macs):
+                    self._check(executor, device['ip'], device['mac'])
+                self._wait_for_probes(lambda frac: 0.0)
+
+            if self.use_ssdp and not self._done.is_set() and not self._found_enough():
+                try:
+                    announced = ssdp_discover(limit=1 if self.stop_on_first else None)
+                except OSError:
+                    announced = []
+                for device in announced:
+                    self._check(executor, device['ip'], "")
+                self._wait_for_probes(lambda frac: self.SSDP_SHARE * frac)
+
+            share = (1.0 - self.SSDP_SHARE) / max(1, len(self.networks))
+            for index, network in enumerate(self.networks):
+                if self._done.is_set() or self._found_enough():
+                    break
+                base = self.SSDP_SHARE + index * share
+
+                def _on_reply(device):
+                    if self.on_host:
+                        self.on_host(device)
+                    self._check(executor, device['ip'], device['mac'])
+
+                from scapy.error import Scapy_Exception  # already loaded by the first sweep
+                try:
+                    arp_sweep(network, _on_reply, self.arp_timeout, self._done,
+                              on_tick=lambda frac: self._report(base + share * 0.8 * frac))
+                except (OSError, ValueError, Scapy_Exception):
+                    continue  # no permission to sniff, or a network scapy can't route
+                self._wait_for_probes(lambda frac: base + share * (0.8 + 0.2 * frac))
+        finally:
+            with self._lock:
+                for future in self._pending:
+                    future.cancel()
+            executor.shutdown(wait=False)
+            self._report(1.0, force=True)
+            if self.on_done:
+                self.on_done(list(self.rokus), self._cancel.is_set())
+
+    def _found_enough(self):
+        """True once a stage has confirmed a Roku and the remaining stages are only fallbacks."""
+        with self._lock:
+            return bool(self.rokus) and not self.deep
+
+    def _check(self, executor, ip, mac):
+        with self._lock:
+            if ip in self._seen or self._done.is_set():
+                return
+            self._seen.add(ip)
+            future = executor.submit(self._probe, ip, mac)
+            self._pending.add(future)
+        future.add_done_callback(self._forget)
+
+    def _forget(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def _probe(self, ip, mac):
+        if self._done.is_set():
+            return
+        info = confirm_roku(ip, timeout=self.probe_timeout)
+        with self._lock:
+            self.hosts_checked += 1
+            if info is None or self._done.is_set():
+                return
+            self.rokus.append((ip, info, mac))
+        if self.on_roku:
+            self.on_roku(ip, info, mac)
+        if self.stop_on_first:
+            self._done.set()
+
+    def _wait_for_probes(self, progress):
+        """Block until every submitted probe is done (or the scan is cancelled)."""
+        from concurrent.futures import wait
+        with self._lock:
+            total = max(1, len(self._pending))
+        while not self._done.is_set():
+            with self._lock:
+                pending = list(self._pending)
+            if not pending:
+                break
+            wait(pending, timeout=self.PROGRESS_INTERVAL)
+            self._report(progress(1.0 - min(1.0, len(self._pending) / total)))
+
+    def _report(self, fraction, force=False):
+        now = time.monotonic()
+        if not self.on_progress:
+            return
+        if not force and now - self._last_progress < self.PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+        elapsed = max(now - self._started, 1e-6)
+        self.on_progress(100.0 * min(1.0, fraction), self.hosts_checked / elapsed)
+
+
+# --------------------------------------------------------------------
+# 6) DeviceRegistry - every Roku we know about
+# --------------------------------------------------------------------
+class DeviceRegistry:
+    """
+    The Rokus discovered so far, keyed by IP in the order they were found.
+    One of them is the active target for normal presses; any number can
+    be checked to receive broadcast presses.
+    """
+    def __init__(self):
+        self._devices = {}
+        self._checked = set()
+        self.active = ""
+
+    def __len__(self):
+        return len(self._devices)
+
+    def __contains__(self, ip):
+        return ip in self._devices
+
+    def devices(self):
+        return list(self._devices.values())
+
+    def get(self, ip):
+        return self._devices.get(ip)
+
+    def add(self, ip, info=None, mac=""):
+        """Add or refresh a Roku; returns True if it wasn't known before."""
+        info = info or {}
+        device = self._devices.get(ip)
+        is_new = device is None
+        if is_new:
+            device = self._devices[ip] = {'ip': ip, 'mac': "", 'name': "", 'info': {}}
+            self._checked.add(ip)
+        if info:
+            device['info'] = info
+            device['name'] = info.get("friendly-device-name") or info.get("model-name", "")
+        device['mac'] = mac or device['mac'] or device_mac(info)
+        return is_new
+
+    def remove(self, ip):
+        """Forget a Roku, e.g. the old address of one that moved."""
+        self._devices.pop(ip, None)
+        self._checked.discard(ip)
+        if self.active == ip:
+            self.active = ""
+
+    def set_active(self, ip):
+        self.active = ip
+
+    def set_checked(self, ip, checked):
+        if checked:
+            self._checked.add(ip)
+        else:
+            self._checked.discard(ip)
+
+    def is_checked(self, ip):
+        return ip in self._checked
+
+    def checked(self):
+        return [ip for ip in self._devices if ip in self._checked]
+
+    def label(self, ip):
+        device = self._devices.get(ip)
+        name = device['name'] if device else ""
+        return f"{name} ({ip})" if name else ip
+
+
+# --------------------------------------------------------------------
+# 7) DeviceCache - remember the last Roku between launches
+# --------------------------------------------------------------------
+def config_dir():
+    """Per-user settings folder (%APPDATA% on Windows, XDG config elsewhere)."""
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    return os.path.join(base, "roku-remote")
+
+
+def _write_atomic(path, data):
+    """Write bytes to 'path' via a .tmp file and a rename, so a crash never leaves half a file behind."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class DeviceCache:
+    """
+    Stores the last Roku we talked to as a small JSON file:
+    {"ip", "mac", "serial", "name", "last_seen"}. An entry older than
+    max_age seconds is treated as stale.
+    """
+    def __init__(self, path=None, max_age=7 * 24 * 3600):
+        self.path = path or os.path.join(config_dir(), "device.json")
+        self.max_age = max_age
+
+    def load(self):
+        """The cached entry as a dict, or None if there isn't a readable one."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or not entry.get("ip"):
+            return None
+        return entry
+
+    def is_fresh(self, entry):
+        return time.time() - entry.get("last_seen", 0) < self.max_age
+
+    def save(self, ip, info=None, mac=""):
+        info = info or {}
+        entry = {
+            "ip": ip,
+            "mac": mac or device_mac(info),
+            "serial": info.get("serial-number", ""),
+            "name": info.get("friendly-device-name", ""),
+            "last_seen": time.time(),
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        _write_atomic(self.path, json.dumps(entry).encode("utf-8"))
+        return entry
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def matches(entry, info):
+        """True if device-info 'info' is from the same Roku as the cached entry."""
+        if info is None:
+            return False
+        if entry.get("serial"):
+            return info.get("serial-number") == entry["serial"]
+        return True
+
+
+# --------------------------------------------------------------------
+# 8) AppCatalog - installed channels and their icons, cached on disk
+# --------------------------------------------------------------------
+def _image_suffix(data):
+    if data.startswith(b"\x89PNG"):
+        return ".png"
+    if data.startswith(b"\xff\xd8"):
+        return ".jpg"
+    return ".img"
+
+
+def _icon_name(names, app):
+    """The file among 'names' holding this app version's icon, or None."""
+    prefix = f"{app.id}-{app.version}."
+    for name in names:
+        if name.startswith(prefix) and not name.endswith(".tmp"):
+            return name
+    return None
+
+
+class AppCatalog:
+    """
+    The channels installed on one Roku plus their icons, kept under
+    <config>/apps/<device>/: apps.json and icons/<id>-<version>.<ext>.
+    A fresh catalog is used as-is, so startup makes no requests; refresh()
+    refetches the list and downloads only icons whose app version changed.
+    """
+    def __init__(self, device, folder=None, max_age=24 * 3600):
+        self.folder = folder or self.folder_for(device)
+        self.max_age = max_age
+        self.apps = []
+        self.fetched = 0.0
+
+    @staticmethod
+    def folder_for(device):
+        safe = re.sub(r"[^A-Za-z0-9._-]", "_", device) or "unknown"
+        return os.path.join(config_dir(), "apps", safe)
+
+    def rename(self, device):
+        """
+        Move the catalog to 'device''s folder, replacing whatever was there;
+        for when a Roku first known by its IP turns out to have a serial.
+        """
+        import shutil
+        folder = self.folder_for(device)
+        if folder == self.folder:
+            return
+        if os.path.isdir(self.folder):
+            shutil.rmtree(folder, ignore_errors=True)
+            os.replace(self.folder, folder)
+        self.folder = folder
+
+    @property
+    def icon_folder(self):
+        return os.path.join(self.folder, "icons")
+
+    def load(self):
+        """Read the cached catalog; returns the app list ([] if there isn't one)."""
+        try:
+            with open(os.path.join(self.folder, "apps.json"), encoding="utf-8") as f:
+                data = json.load(f)
+            self.apps = [App(**app) for app in data["apps"]]
+            self.fetched = float(data.get("fetched", 0))
+        except (OSError, ValueError, KeyError, TypeError):
+            self.apps, self.fetched = [], 0.0
+        return self.apps
+
+    def is_fresh(self):
+        return bool(self.apps) and time.time() - self.fetched < self.max_age
+
+    def icons(self):
+        """{app id: icon path} for every app whose current version's icon is on disk."""
+        try:
+            names = set(os.listdir(self.icon_folder))
+        except OSError:
+            return {}
+        found = {}
+        for app in self.apps:
+            name = _icon_name(names, app)
+            if name is not None:
+                found[app.id] = os.path.join(self.icon_folder, name)
+        return found
+
+    def icon_path(self, app):
+        """Path of the cached icon for this app version, or None if it isn't downloaded."""
+        try:
+            name = _icon_name(os.listdir(self.icon_folder), app)
+        except OSError:
+            return None
+        return None if name is None else os.path.join(self.icon_folder, name)
+
+    def refresh(self, pool, ip, on_apps=None, on_icon=None, cancel=None):
+        """
+        Fetch /query/apps and any missing icons (blocking; run it on a worker
+        thread). on_apps(apps) fires once the list is saved, on_icon(app, path)
+        after each download. Returns the app list. A reply with no apps in it
+        raises ValueError and leaves the cached catalog and icons alone.
+        """
+        resp = pool.get(ip, "/query/apps")
+        resp.raise_for_status()
+        apps = parse_apps(resp.content)
+        if not apps:
+            raise ValueError(f"no apps in the /query/apps reply from {ip}")
+        self.apps, self.fetched = apps, time.time()
+        os.makedirs(self.icon_folder, exist_ok=True)
+        _write_atomic(os.path.join(self.folder, "apps.json"),
+                      json.dumps({"fetched": self.fetched,
+                                  "apps": [app.as_dict() for app in apps]}).encode("utf-8"))
+        if on_apps:
+            on_apps(apps)
+
+        wanted = set()
+        for app in apps:
+            if cancel is not None and cancel.is_set():
+                break
+            path = self.icon_path(app)
+            if path is None:
+                try:
+                    resp = pool.get(ip, f"/query/icon/{urllib.parse.quote(app.id, safe='')}")
+                except OSError:
+                    continue
+                if not resp.ok or not resp.content:
+                    continue
+                path = os.path.join(self.icon_folder,
+                                    f"{app.id}-{app.version}{_image_suffix(resp.content)}")
+                _write_atomic(path, resp.content)
+                if on_icon:
+                    on_icon(app, path)
+            wanted.add(os.path.basename(path))
+        else:
+            self._prune(wanted)
+        return apps
+
+    def _prune(self, keep):
+        """Drop icons of apps that were removed or updated since they were downloaded."""
+        try:
+            names = os.listdir(self.icon_folder)
+        except OSError:
+            return
+        for name in names:
+            if name not in keep:
+                try:
+                    os.remove(os.path.join(self.icon_folder, name))
+                except OSError:
+                    pass
+
+
+# --------------------------------------------------------------------
+# 9) LatencyStats - where each command's time went, as histograms
+# --------------------------------------------------------------------
+LATENCY_PHASES = ("queued", "connect", "server")
+# Prometheus bucket bounds (seconds); the histograms themselves are much finer
+PROMETHEUS_BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LatencyHistogram:
+    """
+    Log-linear (HDR-style) histogram of durations in microseconds, in a
+    fixed array of counters: values below 2**(sub_bits + 1) us are exact,
+    above that every power of two is split into 2**sub_bits buckets, so
+    percentiles are within ~3% with the default sub_bits=5. Anything
+    over max_seconds lands in the top bucket. ~2.8 KB however many
+    values are recorded.
+    """
+    def __init__(self, sub_bits=5, max_seconds=60.0):
+        self.sub_bits = sub_bits
+        self.max_us = int(max_seconds * 1e6)
+        self.count = 0
+        self.total = 0.0    # seconds, for the mean and Prometheus _sum
+        self.max = 0.0
+        self.counts = array.array("I", bytes(4 * (self._index(self.max_us) + 1)))
+
+    def _index(self, us):
+        shift = us.bit_length() - self.sub_bits - 1
+        if shift <= 0:
+            return us
+        return (shift << self.sub_bits) + (us >> shift)
+
+    def _value(self, index):
+        """Upper edge, in us, of the values that land in bucket 'index'."""
+        shift = (index >> self.sub_bits) - 1
+        if shift <= 0:
+            return index
+        return ((index - (shift << self.sub_bits) + 1) << shift) - 1
+
+    def record(self, seconds):
+        us = int(seconds * 1e6)
+        if us > self.max_us:
+            us = self.max_us
+        elif us < 0:
+            us = 0
+        # _index(), inlined: this runs for every command
+        shift = us.bit_length() - self.sub_bits - 1
+        self.counts[(shift << self.sub_bits) + (us >> shift) if shift > 0 else us] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        """Seconds below which p percent of the recorded values fall (0.0 if empty)."""
+        if not self.count:
+            return 0.0
+        rank = max(1, -(-self.count * p // 100))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self._value(index) / 1e6, self.max)
+        return self.max
+
+    def cumulative(self, bounds):
+        """[(bound, values <= bound)] for Prometheus-style buckets."""
+        out, seen, index = [], 0, 0
+        for bound in bounds:
+            limit = bound * 1e6
+            while index < len(self.counts) and self._value(index) <= limit:
+                seen += self.counts[index]
+                index += 1
+            out.append((bound, seen))
+        return out
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+def latency_path(command):
+    """The series a command is counted under: typed characters share one."""
+    if command.startswith("/keypress/Lit_"):
+        return "/keypress/Lit_"
+    return command
+
+
+class LatencyStats:
+    """
+    Per (device, ECP path) histograms of the three parts of a command's
+    time: 'queued' waiting in CommandPipeline, 'connect' opening a TCP
+    connection (0 when a kept-alive one was reused) and 'server' from
+    sending the request to reading the reply. Slow connects point at the
+    network; slow server time with quick connects points at the Roku.
+    Failed commands are only counted, under 'errors'.
+
+    Thread-safe. Once max_series device/path pairs exist, new ones are
+    counted under the path "other".
+    """
+    def __init__(self, max_series=128):
+        self.max_series = max_series
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _get(self, ip, path):
+        key = (ip, latency_path(path))
+        series = self._series.get(key)
+        if series is None:
+            if len(self._series) >= self.max_series:
+                key = (ip, "other")
+                series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    "errors": 0, **{phase: LatencyHistogram() for phase in LATENCY_PHASES}}
+        return series
+
+    def record(self, ip, path, queued, connect, server):
+        with self._lock:
+            series = self._get(ip, path)
+            series["queued"].record(queued)
+            series["connect"].record(connect)
+            series["server"].record(server)
+
+    def record_error(self, ip, path):
+        with self._lock:
+            self._get(ip, path)["errors"] += 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self):
+        """[{"device", "path", "errors", "queued": {...}, "connect": ..., "server": ...}], busiest first."""
+        with self._lock:
+            rows = [
+                {"device": ip, "path": path, "errors": series["errors"],
+                 **{phase: series[phase].summary() for phase in LATENCY_PHASES}}
+                for (ip, path), series in self._series.items()
+            ]
+        rows.sort(key=lambda row: row["server"]["count"] + row["errors"], reverse=True)
+        return rows
+
+    def to_json(self):
+        return json.dumps({"unit": "seconds", "series": self.snapshot()}, indent=2)
+
+    def to_prometheus(self, prefix="roku_ecp_command"):
+        """The histograms in the Prometheus text exposition format."""
+        def labels(ip, path, **extra):
+            pairs = {"device": ip, "path": path, **extra}
+            return ",".join(f'{k}="{_prometheus_escape(v)}"' for k, v in pairs.items())
+
+        lines = [f"# HELP {prefix}_seconds Time spent per ECP command, by phase.",
+                 f"# TYPE {prefix}_seconds histogram"]
+        errors = [f"# HELP {prefix}_errors_total ECP commands that failed.",
+                  f"# TYPE {prefix}_errors_total counter"]
+        with self._lock:
+            for (ip, path), series in self._series.items():
+                for phase in LATENCY_PHASES:
+                    hist = series[phase]
+                    buckets = hist.cumulative(PROMETHEUS_BOUNDS) + [("+Inf", hist.count)]
+                    for bound, n in buckets:
+                        lines.append(f"{prefix}_seconds_bucket{{{labels(ip, path, phase=phase, le=bound)}}} {n}")
+                    series_labels = labels(ip, path, phase=phase)
+                    lines.append(f"{prefix}_seconds_sum{{{series_labels}}} {hist.total!r}")
+                    lines.append(f"{prefix}_seconds_count{{{series_labels}}} {hist.count}")
+                errors.append(f"{prefix}_errors_total{{{labels(ip, path)}}} {series['errors']}")
+        return "\n".join(lines + errors) + "\n"
+
+
+def _prometheus_escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# --------------------------------------------------------------------
+# 10) CommandPipeline - ordered ECP dispatch off the GUI thread
+# --------------------------------------------------------------------
+# Keys whose repeated presses can be merged into one queued burst
+NAV_KEYS = ("up", "down", "left", "right", "fwd", "rev")
+
+def is_protected_command(command):
+    """Power, app launches and key releases are never merged or dropped."""
+    lowered = command.lower()
+    return lowered.startswith(("/launch/", "/keyup/", "/keypress/power"))
+
+def is_mergeable_command(command):
+    return command.startswith("/keypress/") and command[len("/keypress/"):].lower() in NAV_KEYS
+
+
+class _QueuedCommand:
+    """One queue entry: a command for some targets, pressed len(times) times in a row."""
+    __slots__ = ("targets", "command", "times")
+
+    def __init__(self, targets, command, pressed_at):
+        self.targets = targets
+        self.command = command
+        self.times = [pressed_at]
+
+
+class CommandPipeline:
+    """
+    Sends ECP commands from one background worker thread, strictly in the
+    order they were submitted. submit() returns immediately; each result
+    is reported through on_result(command, results), which is called from
+    the worker thread. 'results' has one (ip, ok, seconds, message) tuple
+    per target device.
+
+    A command submitted to several devices is sent to all of them at once
+    from a small fan-out pool, so it takes about as long as the slowest
+    single round trip.
+
+    The queue is bounded so a lagging Roku can't build up a backlog:
+      - repeats of the same arrow key are merged into one entry (a burst
+        of up to max_burst presses)
+      - presses that have waited longer than 'deadline' seconds are
+        dropped instead of arriving late
+      - when more than 'maxsize' entries are waiting, the oldest
+        droppable one makes room
+    Power, launch and keyup commands are never merged or dropped. The
+    'merged', 'dropped_stale' and 'dropped_full' counters say how often
+    each of these happened.
+
+    With a LatencyStats as 'latency', every send is timed into it; with
+    None (the default) nothing is measured.
+    """
+    def __init__(self, pool, on_result=None, fanout_workers=16,
+                 maxsize=32, deadline=1.5, max_burst=10, latency=None):
+        self.pool = pool
+        self.on_result = on_result
+        self.latency = latency
+        self.fanout_workers = fanout_workers
+        self.maxsize = maxsize
+        self.deadline = deadline
+        self.max_burst = max_burst
+
+        self.merged = 0
+        self.dropped_stale = 0
+        self.dropped_full = 0
+
+        self._items = collections.deque()
+        self._closed = False
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._fanout = None
+        self._thread = threading.Thread(target=self._run, name="ecp-dispatch", daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self):
+        """Presses waiting behind the one currently being sent."""
+        with self._lock:
+            return sum(len(item.times) for item in self._items)
+
+    @property
+    def in_flight(self):
+        """Requests currently on the wire (one per target device)."""
+        with self._lock:
+            return self._in_flight
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": sum(len(item.times) for item in self._items),
+                "in_flight": self._in_flight,
+                "merged": self.merged,
+                "dropped_stale": self.dropped_stale,
+                "dropped_full": self.dropped_full,
+            }
+
+    def submit(self, targets, command):
+        """Queue 'command' for one IP, or for every IP in a list."""
+        if isinstance(targets, str):
+            targets = [targets]
+        targets = list(targets)
+        now = time.monotonic()
+        with self._ready:
+            last = self._items[-1] if self._items else None
+            if (last is not None and last.command == command and last.targets == targets
+                    and is_mergeable_command(command) and len(last.times) < self.max_burst):
+                last.times.append(now)
+                self.merged += 1
+                self._ready.notify()
+                return
+            if len(self._items) >= self.maxsize and not self._evict_one():
+                if not is_protected_command(command):
+                    self.dropped_full += 1
+                    return
+            self._items.append(_QueuedCommand(targets, command, now))
+            self._ready.notify()
+
+    def drop_queued(self, target):
+        """
+        Take what is still queued for 'target' alone off the queue and return
+        those commands. Protected ones (keyups, power, launches) stay queued.
+        """
+        with self._lock:
+            dropped = [item for item in self._items
+                       if item.targets == [target] and not is_protected_command(item.command)]
+            for item in dropped:
+                self._items.remove(item)
+        return [item.command for item in dropped for _ in item.times]
+
+    def stop(self, timeout=1.0):
+        """Let the worker send what is still queued, then exit."""
+        with self._ready:
+            self._closed = True
+            self._ready.notify()
+        self._thread.join(timeout)
+        if self._fanout:
+            self._fanout.shutdown(wait=False)
+
+    def _evict_one(self):
+        """Drop the oldest droppable entry to make room; False if everything queued is protected."""
+        for item in self._items:
+            if not is_protected_command(item.command):
+                self._items.remove(item)
+                self.dropped_full += len(item.times)
+                return True
+        return False
+
+    def _next(self):
+        """Block for the next entry; None once stopped and drained."""
+        with self._ready:
+            while not self._items:
+                if self._closed:
+                    return None
+                self._ready.wait()
+            return self._items.popleft()
+
+    def _is_stale(self, command, pressed_at):
+        if not self.deadline or is_protected_command(command):
+            return False
+        if time.monotonic() - pressed_at <= self.deadline:
+            return False
+        with self._lock:
+            self.dropped_stale += 1
+        return True
+
+    def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            targets, command = item.targets, item.command
+            for pressed_at in item.times:
+                # Checked per press: a long burst can go stale while it is being sent
+                if self._is_stale(command, pressed_at):
+                    continue
+                if len(targets) == 1:
+                    results = [self._send(targets[0], command, pressed_at)]
+                else:
+                    if self._fanout is None:
+                        from concurrent.futures import ThreadPoolExecutor
+                        self._fanout = ThreadPoolExecutor(max_workers=self.fanout_workers,
+                                                          thread_name_prefix="ecp-fanout")
+                    results = list(self._fanout.map(
+                        lambda ip: self._send(ip, command, pressed_at), targets))
+                if self.on_result:
+                    self.on_result(command, results)
+
+    def _send(self, ip, command, pressed_at):
+        latency = self.latency
+        timing = {} if latency is not None else None
+        with self._lock:
+            self._in_flight += 1
+        start = time.perf_counter()
+        if latency is not None:
+            queued = time.monotonic() - pressed_at
+        try:
+            resp = self.pool.request("POST", ip, command, timing)
+            resp.raise_for_status()
+            ok, message = True, ""
+        except Exception as e:
+            ok, message = False, str(e)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        seconds = time.perf_counter() - start
+        if latency is not None:
+            if ok:
+                latency.record(ip, command, queued, timing["connect"], timing["server"])
+            else:
+                latency.record_error(ip, command)
+        return ip, ok, seconds, message
+
+
+# --------------------------------------------------------------------
+# 11) DevicePoller - what the Roku is showing, polled adaptively
+# --------------------------------------------------------------------
+class DevicePoller:
+    """
+    Polls /query/active-app and /query/media-player on a background thread
+    and calls on_change(state) only when the app or playback state really
+    changed. state is {"ip", "app", "player"}: an App and a MediaPlayer,
+    either None if the Roku didn't answer sensibly.
+
+    kick() (call it after each command) schedules a poll fast_interval
+    seconds later; kicks before it is due share that one poll, so mashing
+    a key doesn't poll once per press. The interval then doubles each
+    time nothing changed, up to max_interval, so an idle remote costs two
+    small requests every max_interval seconds. pause() stops polling outright until resume().
+    on_reply(ip, ok), if given, hears after every poll whether the Roku
+    could be reached at all, so a HealthMonitor notices an idle Roku
+    going away.
+    """
+    def __init__(self, pool, on_change, fast_interval=0.25, max_interval=30.0, on_reply=None):
+        self.pool = pool
+        self.on_change = on_change
+        self.on_reply = on_reply
+        self.fast_interval = fast_interval
+        self.max_interval = max_interval
+
+        self.ip = ""
+        self.state = None
+        self.polls = 0
+        self.interval = fast_interval
+        self._due = 0.0  # time.monotonic() of the next poll
+
+        self.replies = ReplyCache()  # skips parsing a reply identical to the last one
+        self._key = None
+        self._unreachable = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name="roku-poller", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._running.set()
+        self._wake.set()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+        self._poll_in(0.0)
+
+    def set_target(self, ip):
+        with self._lock:
+            if ip == self.ip:
+                return
+            self.ip = ip
+            self._key = None
+        self._poll_in(0.0)
+
+    def kick(self):
+        """Something just happened (a command went out): poll soon and often again."""
+        self._poll_in(self.fast_interval)
+
+    def _poll_in(self, seconds):
+        """Poll within 'seconds'; a poll already due sooner stays as it is."""
+        with self._lock:
+            self.interval = self.fast_interval
+            now = time.monotonic()
+            if now < self._due <= now + seconds:
+                return
+            self._due = now + seconds
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._running.wait()
+            with self._lock:
+                # Nothing to poll: sleep until set_target
+                timeout = max(0.0, self._due - time.monotonic()) if self.ip else None
+            if self._wake.wait(timeout):
+                self._wake.clear()
+                continue  # rescheduled, stopped or resumed: work out the wait again
+            if not self._running.is_set() or not self.ip:
+                continue
+            changed = self.poll()
+            with self._lock:
+                if changed:
+                    self.interval = self.fast_interval
+                else:
+                    self.interval = min(self.max_interval, self.interval * 2)
+                self._due = time.monotonic() + self.interval
+
+    def poll(self):
+        """Query the Roku once; returns True (and calls on_change) if what it shows changed."""
+        ip = self.ip
+        self.polls += 1
+        self._unreachable = False
+        app = self._query(ip, "/query/active-app", parse_active_app)
+        player = self._query(ip, "/query/media-player", parse_media_player)
+        if self.on_reply:
+            self.on_reply(ip, not self._unreachable)
+        # Playback position ticks every poll while something plays; that alone isn't a change
+        key = (ip, app and app.id, player and (player.state, player.plugin))
+        if key == self._key:
+            return False
+        self._key = key
+        self.state = {"ip": ip, "app": app, "player": player}
+        self.on_change(self.state)
+        return True
+
+    def _query(self, ip, path, parser):
+        try:
+            resp = self.pool.get(ip, path)
+        except (OSError, ValueError):
+            self._unreachable = True
+            return None
+        if not resp.ok:
+            return None
+        return self.replies.parse((ip, path), resp.content, parser)
+
+
+# --------------------------------------------------------------------
+# 12) HealthMonitor - circuit breaker and rediscovery for the active Roku
+# --------------------------------------------------------------------
+class HealthMonitor:
+    """
+    Watches the active Roku through the results of the commands sent to
+    it and of DevicePoller's polls. After 'threshold' failures in a row
+    the circuit opens: is_open turns True so callers can fail fast
+    (hold() keeps presses for later) instead of waiting out a timeout per
+    press, and a background thread probes the Roku, backing off from
+    probe_interval to max_probe_interval seconds between tries.
+
+    Held keypresses are kept for a few seconds and at most 'max_held' of
+    them. Protected commands (keyups, power, launches) are never evicted
+    or expired: a lost keyup would leave a key stuck down.
+
+    A probe is a TCP connect to the ECP port plus one device-info request,
+    and only counts if the serial (or MAC) matches, so a different device
+    that picked up the old IP isn't mistaken for it. After
+    'rediscover_after' failed probes, and as often again afterwards, the
+    Roku is looked for by serial/MAC among the devices discover() returns
+    (by default the neighbour table, then SSDP), in case it came back on a
+    new address.
+
+    on_state(state, ip, info) is called when the circuit opens ("down",
+    from the caller of record()) and from the probe thread when it closes
+    ("up", same IP; "moved", found at a new IP; info is its DeviceInfo).
+    """
+    HOLD_PREFIXES = ("/keypress/", "/launch/", "/keyup/")  # a held keydown could never be let go
+
+    def __init__(self, port=ECP_PORT, on_state=None, threshold=2, probe_interval=1.0,
+                 max_probe_interval=10.0, rediscover_after=3, discover=None, max_held=8):
+        self.port = port
+        self.on_state = on_state
+        self.threshold = threshold
+        self.probe_interval = probe_interval
+        self.max_probe_interval = max_probe_interval
+        self.rediscover_after = rediscover_after
+        self.discover = discover or self._discover
+
+        self.ip = ""
+        self.serial = ""
+        self.mac = ""
+        self.failures = 0
+        self.probes = 0
+        self.is_open = False
+
+        self.max_held = max_held
+        self._held = []  # (time held, command), oldest first
+        self._generation = 0
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def set_target(self, ip, serial="", mac=""):
+        """Watch 'ip' from now on ("" for nothing); closes the circuit and forgets held presses."""
+        with self._lock:
+            self._generation += 1
+            self.ip, self.serial, self.mac = ip, serial, (mac or "").lower()
+            self.failures = 0
+            self.is_open = False
+            self._held.clear()
+        self._wake.set()
+
+    def stop(self):
+        self.set_target("")
+
+    def matches(self, info):
+        """True if device-info 'info' is the Roku being watched; never when nothing identifies it."""
+        if info is None:
+            return False
+        if self.serial:
+            return info.get("serial-number") == self.serial
+        if self.mac:
+            return device_mac(info) == self.mac
+        return False
+
+    def record(self, ok, ip=None):
+        """Feed in the outcome of one command or poll; ignored if 'ip' isn't the watched Roku."""
+        with self._lock:
+            if ip is not None and ip != self.ip:
+                return
+            if ok:
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.is_open or not self.ip or self.failures < self.threshold:
+                return
+            self.is_open = True
+            self._wake.clear()
+            generation, ip = self._generation, self.ip
+        threading.Thread(target=self._probe, args=(generation,), name="roku-health",
+                         daemon=True).start()
+        if self.on_state:
+            self.on_state("down", ip, None)
+
+    def hold(self, command):
+        """Keep a press made while the circuit is open; False if it isn't worth keeping."""
+        if not command.lower().startswith(self.HOLD_PREFIXES):
+            return False
+        with self._lock:
+            self._held.append((time.monotonic(), command))
+            evictable = [entry for entry in self._held if not is_protected_command(entry[1])]
+            if len(evictable) > self.max_held:
+                self._held.remove(evictable[0])
+        return True
+
+    def take_held(self, max_age=3.0):
+        """
+        The held commands, oldest first, and clears them: every protected
+        one, and keypresses no older than max_age seconds.
+        """
+        now = time.monotonic()
+        with self._lock:
+            held, self._held = self._held, []
+        return [command for at, command in held
+                if is_protected_command(command) or now - at <= max_age]
+
+    def _current(self, generation):
+        return generation == self._generation and self.is_open
+
+    def _probe(self, generation):
+        interval = self.probe_interval
+        self.probes = 0
+        while True:
+            self._wake.wait(interval)
+            if not self._current(generation):
+                return
+            ip = self.ip
+            info = confirm_roku(ip, self.port, timeout=min(1.0, interval))
+            # With nothing to identify it by, any Roku back at its address will do
+            if self.matches(info) or (info is not None and not (self.serial or self.mac)):
+                self._close(generation, "up", ip, info)
+                return
+            self.probes += 1
+            if self.probes % self.rediscover_after == 0 and (self.serial or self.mac):
+                found = self._rediscover(ip)
+                if found and self._current(generation):
+                    self._close(generation, "moved", *found)
+                    return
+            interval = min(self.max_probe_interval, interval * 2)
+
+    def _discover(self):
+        return roku_neighbours([self.mac] if self.mac else ()) + ssdp_discover(timeout=1.0)
+
+    def _rediscover(self, old_ip):
+        """(ip, info) of the watched Roku at some other address, or None."""
+        try:
+            devices = self.discover()
+        except OSError:
+            return None
+        for device in devices:
+            if device["ip"] == old_ip:
+                continue
+            info = query_device_info(device["ip"], device.get("port", self.port), timeout=1.0)
+            if info is not None and self.matches(info):
+                return device["ip"], info
+        return None
+
+    def _close(self, generation, state, ip, info):
+        with self._lock:
+            if not self._current(generation):
+                return
+            self.is_open = False
+            self.failures = 0
+            self.ip = ip
+        if self.on_state:
+            self.on_state(state, ip, info)
+
+
+# --------------------------------------------------------------------
+# 13) TextStreamer - type text on the Roku with /keypress/Lit_
+# --------------------------------------------------------------------
+def literal_paths(text):
+    """ECP paths that type 'text': one Lit_ press per character, Enter for newlines."""
+    for ch in text:
+        if ch == "\n":
+            yield "/keypress/Enter"
+        elif ch != "\r":
+            # UTF-8 percent-encoding, so 'é' becomes Lit_%C3%A9
+            yield "/keypress/Lit_" + urllib.parse.quote(ch, safe="")
+
+
+class TextStreamer:
+    """
+    Types text on a Roku as a stream of /keypress/Lit_ presses. Presses
+    are pipelined on a single keep-alive socket: up to 'window' requests
+    are written before waiting for their responses, so a long paste costs
+    a handful of round trips instead of one per character. 'pacing'
+    spaces presses that many seconds apart (scheduled on a monotonic
+    clock), for on-screen keyboards that drop keys sent too quickly.
+
+    Each press's outcome goes to 'latency' (a LatencyStats) and to
+    on_result(ip, ok), as CommandPipeline's do; 'server' time is from
+    writing the press to reading its reply, and 'queued' is how long it
+    waited for room in the window.
+    """
+    def __init__(self, ip, port=ECP_PORT, window=8, pacing=0.0,
+                 connect_timeout=1.0, read_timeout=3.0, latency=None, on_result=None):
+        self.ip = ip
+        self.port = port
+        self.window = max(1, window)
+        self.pacing = pacing
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.latency = latency
+        self.on_result = on_result
+
+        self.acked = 0
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, text, on_progress=None, on_done=None):
+        """
+        Type 'text' on a background thread. on_progress(acked, total) and
+        on_done(acked, total, error, cancelled) are called from that thread.
+        """
+        def _run():
+            total = len(list(literal_paths(text)))
+            error = ""
+            try:
+                self.type(text, on_progress)
+            except (OSError, ValueError) as e:
+                error = str(e)
+            if on_done:
+                on_done(self.acked, total, error, self.cancelled)
+        self._thread = threading.Thread(target=_run, name="ecp-typing", daemon=True)
+        self._thread.start()
+        return self
+
+    def type(self, text, on_progress=None):
+        """Type 'text' and block until every press is acknowledged; returns how many were."""
+        paths = list(literal_paths(text))
+        total = len(paths)
+        host = f"{self.ip}:{self.port}"
+        self.acked = 0
+        pending = collections.deque()  # (path, queued, connect, sent) per press on the wire
+
+        start = time.perf_counter()
+        try:
+            sock = socket.create_connection((self.ip, self.port), timeout=self.connect_timeout)
+        except OSError:
+            self._report(paths[0] if paths else "/keypress/Lit_", False)
+            raise
+        connect = time.perf_counter() - start
+        try:
+            sock.settimeout(self.read_timeout)
+            # Don't let Nagle hold back a press while earlier ones are unacknowledged
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            reader = sock.makefile("rb")
+            next_at = time.monotonic()
+            try:
+                for path in paths:
+                    if self._cancel.is_set():
+                        break
+                    if self.pacing:
+                        delay = next_at - time.monotonic()
+                        if delay > 0 and self._cancel.wait(delay):
+                            break
+                        next_at += self.pacing
+                    due = time.perf_counter()
+                    while len(pending) >= self.window:
+                        self._read_ack(reader, pending)
+                        if on_progress:
+                            on_progress(self.acked, total)
+                    sent = time.perf_counter()
+                    sock.sendall(request_bytes("POST", host, path))
+                    pending.append((path, sent - due, connect, sent))
+                    connect = 0.0  # only the first press paid for the handshake
+                # Presses already on the wire will be typed; wait for them either way
+                while pending:
+                    self._read_ack(reader, pending)
+                    if on_progress:
+                        on_progress(self.acked, total)
+            finally:
+                reader.close()
+        finally:
+            sock.close()
+        return self.acked
+
+    def _read_ack(self, reader, pending):
+        """Read the reply to the oldest press on the wire and report it."""
+        path, queued, connect, sent = pending.popleft()
+        try:
+            _read_response(reader)
+        except (OSError, ValueError):
+            self._report(path, False)
+            raise
+        self.acked += 1
+        self._report(path, True, queued, connect, time.perf_counter() - sent)
+
+    def _report(self, path, ok, queued=0.0, connect=0.0, server=0.0):
+        if self.latency is not None:
+            if ok:
+                self.latency.record(self.ip, path, queued, connect, server)
+            else:
+                self.latency.record_error(self.ip, path)
+        if self.on_result:
+            self.on_result(self.ip, ok)
+
+
+def _read_response(reader):
+    """Read one pipelined response; raise ValueError on a non-2xx status."""
+    resp, _ = read_response(reader)
+    if not resp.ok:
+        raise ValueError(f"Roku answered {resp.status_code}")
+
+
+# --------------------------------------------------------------------
+# 14) Macros - record and replay timed ECP command sequences
+# --------------------------------------------------------------------
+# Buttons bound to a macro carry "macro:<name>" instead of an ECP path
+MACRO_PREFIX = "macro:"
+
+class MacroLibrary:
+    """
+    Saved macros, one small text file each. Every line is
+    "<ms since previous step> <ECP path>", e.g.
+
+        0 /keypress/home
+        1200 /launch/12
+        350 /keypress/down
+    """
+    HEADER = "# roku-remote macro v1"
+
+    def __init__(self, folder=None):
+        self.folder = folder or os.path.join(config_dir(), "macros")
+
+    def path(self, name):
+        return os.path.join(self.folder, f"{name}.macro")
+
+    def names(self):
+        try:
+            files = os.listdir(self.folder)
+        except OSError:
+            return []
+        return sorted(f[:-len(".macro")] for f in files if f.endswith(".macro"))
+
+    def save(self, name, steps):
+        """Write steps, a list of (seconds since start, command), as 'name'."""
+        os.makedirs(self.folder, exist_ok=True)
+        lines = [self.HEADER]
+        previous = 0.0
+        for offset, command in steps:
+            lines.append(f"{round((offset - previous) * 1000)} {command}")
+            previous = offset
+        with open(self.path(name), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def load(self, name):
+        """Read 'name' back as a list of (seconds since start, command)."""
+        steps = []
+        offset = 0.0
+        with open(self.path(name), encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                delay, command = line.split(None, 1)
+                offset += int(delay) / 1000.0
+                steps.append((offset, command))
+        return steps
+
+
+class MacroRecorder:
+    """Collects commands with their time since start() on the monotonic clock."""
+    def __init__(self):
+        self.steps = []
+        self._start = None
+
+    @property
+    def recording(self):
+        return self._start is not None
+
+    def start(self):
+        self.steps = []
+        self._start = time.monotonic()
+
+    def record(self, command):
+        if self._start is not None:
+            self.steps.append((time.monotonic() - self._start, command))
+
+    def stop(self):
+        self._start = None
+        return self.steps
+
+
+class MacroPlayer:
+    """
+    Replays macro steps to one Roku on a background thread. Each step is
+    scheduled at start + offset / speed on the monotonic clock rather than
+    by sleeping between steps, so a slow request doesn't push every later
+    step back. on_step(done, total) and on_done(sent, total, error,
+    cancelled) are called from that thread. A /keydown/ whose /keyup/
+    never got sent (cancelled, or a step failed) is let go at the end.
+    """
+    def __init__(self, pool, ip, steps, speed=1.0):
+        self.pool = pool
+        self.ip = ip
+        self.steps = list(steps)
+        self.speed = speed
+
+        self.sent = 0
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, on_step=None, on_done=None):
+        def _run():
+            error = ""
+            try:
+                self.play(on_step)
+            except Exception as e:
+                error = str(e)
+            if on_done:
+                on_done(self.sent, len(self.steps), error, self._cancel.is_set())
+        self._thread = threading.Thread(target=_run, name="macro-play", daemon=True)
+        self._thread.start()
+        return self
+
+    def play(self, on_step=None):
+        """Replay every step and return how many were sent; blocks until done or cancelled."""
+        total = len(self.steps)
+        self.sent = 0
+        held = []  # keys sent down and not yet up, oldest first
+        start = time.monotonic()
+        try:
+            for offset, command in self.steps:
+                delay = start + offset / self.speed - time.monotonic()
+                if delay > 0 and self._cancel.wait(delay):
+                    break
+                if self._cancel.is_set():
+                    break
+                action, _, key = command.rpartition("/")
+                # Counted before sending: a keydown that errors may still have reached the Roku
+                if action == "/keydown" and key not in held:
+                    held.append(key)
+                self.pool.post(self.ip, command).raise_for_status()
+                if action == "/keyup" and key in held:
+                    held.remove(key)
+                self.sent += 1
+                if on_step:
+                    on_step(self.sent, total)
+        finally:
+            for key in held:
+                try:
+                    self.pool.post(self.ip, f"/keyup/{key}")
+                except (OSError, ValueError):
+                    pass  # the Roku is gone; nothing more to do
+        return self.sent
+
+
+# --------------------------------------------------------------------
+# 15) ECPClient / AsyncECPClient - one Roku, for scripts and the CLI
+# --------------------------------------------------------------------
+def key_path(action, key):
+    """ECP path for a keypress/keydown/keyup of 'key' (already-escaped names pass through)."""
+    return f"/{action}/{urllib.parse.quote(key, safe='_')}"
+
+
+class ECPClient:
+    """
+    Blocking ECP calls against a single Roku. Shares an ECPConnectionPool
+    if given one, otherwise opens its own; use it as a context manager
+    (or call close) to drop the idle connections.
+    """
+    def __init__(self, ip, pool=None, port=ECP_PORT, connect_timeout=1.0, read_timeout=3.0):
+        self.ip = ip
+        self._owns_pool = pool is None
+        self.pool = pool or ECPConnectionPool(connect_timeout=connect_timeout,
+                                              read_timeout=read_timeout, port=port)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._owns_pool:
+            self.pool.close()
+
+    def post(self, path):
+        resp = self.pool.post(self.ip, path)
+        resp.raise_for_status()
+        return resp
+
+    def get(self, path):
+        resp = self.pool.get(self.ip, path)
+        resp.raise_for_status()
+        return resp.content
+
+    # ---------------------------
+    # KEYS / APPS
+    # ---------------------------
+    def keypress(self, key):
+        self.post(key_path("keypress", key))
+
+    def keydown(self, key):
+        self.post(key_path("keydown", key))
+
+    def keyup(self, key):
+        self.post(key_path("keyup", key))
+
+    def launch(self, app_id):
+        self.post(f"/launch/{urllib.parse.quote(str(app_id), safe='')}")
+
+    def type(self, text, on_progress=None, pacing=0.0):
+        """Type 'text' over one pipelined connection; returns how many characters were acknowledged."""
+        streamer = TextStreamer(self.ip, port=self.pool.port, pacing=pacing,
+                                connect_timeout=self.pool.connect_timeout,
+                                read_timeout=self.pool.read_timeout)
+        return streamer.type(text, on_progress)
+
+    # ---------------------------
+    # QUERIES
+    # ---------------------------
+    def query(self, name):
+        """Raw body of /query/<name> (e.g. "apps", "media-player")."""
+        return self.get(f"/query/{name}")
+
+    def device_info(self):
+        info = parse_device_info(self.query("device-info"))
+        if info is None:
+            raise ECPError("Unreadable device-info reply")
+        return info
+
+    def active_app(self):
+        app = parse_active_app(self.query("active-app"))
+        if app is None:
+            raise ECPError("Unreadable active-app reply")
+        return app
+
+
+class AsyncECPClient:
+    """
+    The same calls as ECPClient for asyncio code. Keeps one keep-alive
+    stream to the Roku and sends one request at a time over it; discovery
+    helpers are run in the default executor.
+    """
+    def __init__(self, ip, port=ECP_PORT, connect_timeout=1.0, read_timeout=3.0):
+        self.ip = ip
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._reader = None
+        self._writer = None
+        import asyncio  # only async callers pay for it
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def _connect(self):
+        import asyncio
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.ip, self.port), self.connect_timeout
+        )
+        sock = self._writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    async def request(self, method, path):
+        import asyncio
+        async with self._lock:
+            reused = self._writer is not None
+            if not reused:
+                await self._connect()
+            try:
+                resp = await asyncio.wait_for(self._roundtrip(method, path), self.read_timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if not reused:
+                    raise
+                # The Roku dropped our idle connection; resend once on a new one
+                try:
+                    await self._connect()
+                    resp = await asyncio.wait_for(self._roundtrip(method, path), self.read_timeout)
+                except BaseException:
+                    # Don't leave a request waiting on the stream for the next call to read
+                    await self.close()
+                    raise
+            except BaseException:
+                await self.close()
+                raise
+        return resp
+
+    async def _roundtrip(self, method, path):
+        self._writer.write(request_bytes(method, f"{self.ip}:{self.port}", path))
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Roku closed the connection")
+        parts = status_line.decode("latin-1").split(None, 2)
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise ECPError(f"Bad response: {status_line!r}")
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self._reader.readline()).split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    # Skip trailers up to the blank line
+                    while (await self._reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readexactly(2)
+            body = b"".join(chunks)
+        else:
+            length = int(headers.get("content-length", 0) or 0)
+            body = await self._reader.readexactly(length) if length else b""
+
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return ECPResponse(int(parts[1]), parts[2].strip() if len(parts) > 2 else "", body)
+
+    async def post(self, path):
+        resp = await self.request("POST", path)
+        resp.raise_for_status()
+        return resp
+
+    async def get(self, path):
+        resp = await self.request("GET", path)
+        resp.raise_for_status()
+        return resp.content
+
+    async def keypress(self, key):
+        await self.post(key_path("keypress", key))
+
+    async def keydown(self, key):
+        await self.post(key_path("keydown", key))
+
+    async def keyup(self, key):
+        await self.post(key_path("keyup", key))
+
+    async def launch(self, app_id):
+        await self.post(f"/launch/{urllib.parse.quote(str(app_id), safe='')}")
+
+    async def type(self, text):
+        """Type 'text' one press at a time over the shared connection; returns presses sent."""
+        sent = 0
+        for path in literal_paths(text):
+            await self.post(path)
+            sent += 1
+        return sent
+
+    async def query(self, name):
+        return await self.get(f"/query/{name}")
+
+    async def device_info(self):
+        info = parse_device_info(await self.query("device-info"))
+        if info is None:
+            raise ECPError("Unreadable device-info reply")
+        return info
+
+    async def active_app(self):
+        app = parse_active_app(await self.query("active-app"))
+        if app is None:
+            raise ECPError("Unreadable active-app reply")
+        return app
+
+    @staticmethod
+    async def discover(timeout=0.4):
+        """SSDP search without blocking the event loop; returns device dicts like ssdp_discover."""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: ssdp_discover(timeout=timeout))
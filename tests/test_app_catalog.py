@@ -0,0 +1,98 @@
+"""
+AppCatalog downloads only the icons it is missing, prunes icons of apps
+that were updated or removed, and never throws away a good catalog
+because of a bad /query/apps reply.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import roku_ecp  # noqa: E402
+from roku_ecp import AppCatalog, ECPResponse  # noqa: E402
+
+ROKU_IP = "192.168.1.20"
+APPS = b"""<apps>
+    <app id="12" type="appl" version="5.2">Netflix</app>
+    <app id="837" type="appl" version="2.21">YouTube</app>
+</apps>"""
+
+
+class CatalogPool:
+    """Answers /query/apps with 'apps' and every /query/icon/ with a tiny PNG; records the GETs."""
+    def __init__(self, apps=APPS):
+        self.apps = apps
+        self.gets = []
+
+    def get(self, ip, path):
+        self.gets.append(path)
+        if path == "/query/apps":
+            return ECPResponse(200, "OK", self.apps)
+        return ECPResponse(200, "OK", b"\x89PNG" + path.encode())
+
+
+class AppCatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder, True)
+
+    def catalog(self):
+        return AppCatalog(ROKU_IP, folder=self.folder)
+
+    def icon_files(self):
+        return sorted(os.listdir(os.path.join(self.folder, "icons")))
+
+    def test_refresh_downloads_missing_icons_only(self):
+        self.catalog().refresh(CatalogPool(), ROKU_IP)
+        self.assertEqual(self.icon_files(), ["12-5.2.png", "837-2.21.png"])
+
+        pool = CatalogPool()
+        catalog = self.catalog()
+        catalog.load()
+        self.assertTrue(catalog.is_fresh())
+        self.assertEqual(set(catalog.icons()), {"12", "837"})
+        catalog.refresh(pool, ROKU_IP)
+        self.assertEqual(pool.gets, ["/query/apps"])
+
+    def test_prunes_icons_of_updated_and_removed_apps(self):
+        self.catalog().refresh(CatalogPool(), ROKU_IP)
+        updated = b'<apps><app id="12" type="appl" version="5.3">Netflix</app></apps>'
+        pool = CatalogPool(updated)
+        self.catalog().refresh(pool, ROKU_IP)
+        self.assertEqual(pool.gets, ["/query/apps", "/query/icon/12"])
+        self.assertEqual(self.icon_files(), ["12-5.3.png"])
+
+    def test_cancelled_refresh_prunes_nothing(self):
+        self.catalog().refresh(CatalogPool(), ROKU_IP)
+        cancel = threading.Event()
+        cancel.set()
+        self.catalog().refresh(CatalogPool(b'<apps><app id="99" version="1">New</app></apps>'),
+                               ROKU_IP, cancel=cancel)
+        self.assertEqual(self.icon_files(), ["12-5.2.png", "837-2.21.png"])
+
+    def test_bad_reply_keeps_the_cached_catalog(self):
+        self.catalog().refresh(CatalogPool(), ROKU_IP)
+        for reply in (b"<apps><app id=", b"<apps/>"):
+            with self.assertRaises(ValueError):
+                self.catalog().refresh(CatalogPool(reply), ROKU_IP)
+        catalog = self.catalog()
+        self.assertEqual([app.id for app in catalog.load()], ["12", "837"])
+        self.assertEqual(self.icon_files(), ["12-5.2.png", "837-2.21.png"])
+
+    def test_rename_moves_the_catalog(self):
+        with mock.patch.object(roku_ecp, "config_dir", return_value=self.folder):
+            catalog = AppCatalog(ROKU_IP)
+            catalog.refresh(CatalogPool(), ROKU_IP)
+            catalog.rename("X00400ABCDEF")
+            self.assertFalse(os.path.exists(AppCatalog.folder_for(ROKU_IP)))
+            moved = AppCatalog("X00400ABCDEF")
+            self.assertEqual(len(moved.load()), 2)
+            self.assertEqual(len(moved.icons()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
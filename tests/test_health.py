@@ -0,0 +1,99 @@
+"""
+HealthMonitor opens the circuit after 'threshold' failures, keeps it
+open while probes fail or find some other device, and closes it when
+the same Roku answers again, at its old address or a new one.
+"""
+import os
+import sys
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import roku_ecp  # noqa: E402
+from roku_ecp import DeviceInfo, HealthMonitor  # noqa: E402
+
+ROKU_IP = "192.168.1.20"
+NEW_IP = "192.168.1.42"
+SERIAL = "X00400ABCDEF"
+
+
+class HealthMonitorTest(unittest.TestCase):
+    def setUp(self):
+        self.states = []
+        self.changed = threading.Event()
+        self.probes = []  # what confirm_roku answers, one per probe; None once used up
+        patcher = mock.patch.object(roku_ecp, "confirm_roku", side_effect=self.confirm)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def confirm(self, ip, port, timeout):
+        return self.probes.pop(0) if self.probes else None
+
+    def on_state(self, state, ip, info):
+        self.states.append((state, ip))
+        self.changed.set()
+
+    def monitor(self, serial=SERIAL, **kwargs):
+        health = HealthMonitor(on_state=self.on_state, probe_interval=0.01, max_probe_interval=0.02,
+                               discover=lambda: [], **kwargs)
+        health.set_target(ROKU_IP, serial)
+        self.addCleanup(health.stop)
+        return health
+
+    def wait_for(self, state):
+        for _ in range(100):
+            if self.states and self.states[-1][0] == state:
+                return
+            self.changed.wait(0.05)
+            self.changed.clear()
+        self.fail(f"no {state!r} after {self.states}")
+
+    def test_opens_after_threshold_failures_in_a_row(self):
+        health = self.monitor(threshold=2)
+        health.record(False, ROKU_IP)
+        health.record(True, ROKU_IP)
+        health.record(False, ROKU_IP)
+        self.assertFalse(health.is_open)
+        health.record(False, "192.168.1.99")  # another device's failure doesn't count
+        self.assertFalse(health.is_open)
+        health.record(False, ROKU_IP)
+        self.assertTrue(health.is_open)
+        self.assertEqual(self.states, [("down", ROKU_IP)])
+
+    def test_closes_once_the_same_roku_answers(self):
+        self.probes = [None, DeviceInfo(serial_number="SOMEONE-ELSE"), DeviceInfo(serial_number=SERIAL)]
+        health = self.monitor(threshold=1)
+        health.record(False, ROKU_IP)
+        self.wait_for("up")
+        self.assertFalse(health.is_open)
+        self.assertEqual(health.probes, 2)  # the other device at the old IP didn't count
+        self.assertEqual(self.states, [("down", ROKU_IP), ("up", ROKU_IP)])
+
+    def test_found_at_a_new_address(self):
+        health = self.monitor(threshold=1, rediscover_after=2)
+        health.discover = lambda: [{'ip': ROKU_IP}, {'ip': NEW_IP}]
+        with mock.patch.object(roku_ecp, "query_device_info", return_value=DeviceInfo(serial_number=SERIAL)):
+            health.record(False, ROKU_IP)
+            self.wait_for("moved")
+        self.assertEqual((health.ip, health.is_open), (NEW_IP, False))
+
+    def test_unidentified_roku_is_never_a_match(self):
+        health = self.monitor(serial="")
+        self.assertFalse(health.matches(DeviceInfo(serial_number=SERIAL)))
+        # ...but one answering at its own address still closes the circuit
+        self.probes = [DeviceInfo(serial_number=SERIAL)]
+        health.threshold = 1
+        health.record(False, ROKU_IP)
+        self.wait_for("up")
+
+    def test_held_presses_keep_protected_commands(self):
+        health = self.monitor(max_held=2)
+        for command in ("/keyup/up", "/keypress/up", "/keypress/down", "/keypress/left", "/keydown/up"):
+            health.hold(command)
+        self.assertEqual(health.take_held(), ["/keyup/up", "/keypress/down", "/keypress/left"])
+        self.assertEqual(health.take_held(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+LatencyHistogram percentiles stay within the bucket error the docstring
+promises, and LatencyStats renders valid Prometheus histograms.
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from roku_ecp import PROMETHEUS_BOUNDS, LatencyHistogram, LatencyStats  # noqa: E402
+
+
+class LatencyHistogramTest(unittest.TestCase):
+    def test_empty(self):
+        hist = LatencyHistogram()
+        self.assertEqual(hist.percentile(50), 0.0)
+        self.assertEqual(hist.summary()["mean"], 0.0)
+
+    def test_small_values_are_exact(self):
+        hist = LatencyHistogram()
+        for us in (10, 20, 30, 40, 50):
+            hist.record(us / 1e6)
+        self.assertEqual(hist.percentile(50), 30e-6)
+        self.assertEqual(hist.percentile(100), 50e-6)
+
+    def test_percentiles_within_bucket_error(self):
+        hist = LatencyHistogram()
+        for ms in range(1, 1001):
+            hist.record(ms / 1000)
+        for p, expected in ((50, 0.5), (95, 0.95), (99, 0.99)):
+            self.assertAlmostEqual(hist.percentile(p), expected, delta=expected * 0.03)
+        self.assertEqual(hist.percentile(100), 1.0)
+        self.assertEqual(hist.count, 1000)
+        self.assertAlmostEqual(hist.summary()["mean"], 0.5005)
+
+    def test_values_over_max_land_in_the_top_bucket(self):
+        hist = LatencyHistogram(max_seconds=1.0)
+        hist.record(5.0)
+        self.assertEqual(hist.max, 5.0)
+        self.assertLessEqual(hist.percentile(50), 1.1)
+
+    def test_cumulative(self):
+        hist = LatencyHistogram()
+        for seconds in (0.002, 0.2, 3.0):
+            hist.record(seconds)
+        self.assertEqual(hist.cumulative((0.001, 0.01, 1.0, 10.0)),
+                         [(0.001, 0), (0.01, 1), (1.0, 2), (10.0, 3)])
+
+
+class PrometheusTest(unittest.TestCase):
+    def test_histogram_lines(self):
+        stats = LatencyStats()
+        stats.record("10.0.0.5", "/keypress/Lit_a", 0.0, 0.001, 0.02)
+        stats.record("10.0.0.5", "/keypress/Lit_b", 0.0, 0.0, 0.2)
+        stats.record_error("10.0.0.5", "/keypress/Lit_c")
+        lines = stats.to_prometheus().splitlines()
+
+        self.assertIn("# TYPE roku_ecp_command_seconds histogram", lines)
+        labels = 'device="10.0.0.5",path="/keypress/Lit_",phase="server"'
+        buckets = [line for line in lines if line.startswith(f"roku_ecp_command_seconds_bucket{{{labels}")]
+        self.assertEqual(len(buckets), len(PROMETHEUS_BOUNDS) + 1)
+        self.assertIn(f'roku_ecp_command_seconds_bucket{{{labels},le="0.025"}} 1', lines)
+        self.assertIn(f'roku_ecp_command_seconds_bucket{{{labels},le="+Inf"}} 2', lines)
+        self.assertIn(f"roku_ecp_command_seconds_count{{{labels}}} 2", lines)
+        self.assertIn('roku_ecp_command_errors_total{device="10.0.0.5",path="/keypress/Lit_"} 1', lines)
+
+    def test_label_values_are_escaped(self):
+        stats = LatencyStats()
+        stats.record("10.0.0.5", '/launch/"12"', 0.0, 0.0, 0.01)
+        self.assertIn('path="/launch/\\"12\\""', stats.to_prometheus())
+
+
+if __name__ == "__main__":
+    unittest.main()
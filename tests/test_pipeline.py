@@ -0,0 +1,116 @@
+"""
+CommandPipeline keeps its queue short: repeated arrows merge, presses
+that waited too long are dropped, and a full queue makes room - but
+power, launches and keyups are never merged or dropped.
+"""
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from roku_ecp import CommandPipeline, ECPResponse, is_mergeable_command, is_protected_command  # noqa: E402
+
+ROKU_IP = "192.168.1.20"
+
+
+class GatedPool:
+    """Stands in for ECPConnectionPool; every request waits for 'gate' so commands pile up behind it."""
+    def __init__(self):
+        self.gate = threading.Event()
+        self.busy = threading.Event()
+        self.sent = []
+
+    def request(self, method, ip, path, timing=None):
+        self.busy.set()
+        self.gate.wait(5)
+        self.sent.append(path)
+        if timing is not None:
+            timing.update(connect=0.0, server=0.0)
+        return ECPResponse(200, "OK", b"")
+
+
+class CommandRulesTest(unittest.TestCase):
+    def test_protected_commands(self):
+        for command in ("/keypress/Power", "/keypress/PowerOff", "/launch/12", "/keyup/up"):
+            self.assertTrue(is_protected_command(command), command)
+        for command in ("/keypress/up", "/keydown/up", "/keypress/Home"):
+            self.assertFalse(is_protected_command(command), command)
+
+    def test_only_navigation_keypresses_merge(self):
+        self.assertTrue(is_mergeable_command("/keypress/Down"))
+        self.assertTrue(is_mergeable_command("/keypress/Fwd"))
+        self.assertFalse(is_mergeable_command("/keypress/Select"))
+        self.assertFalse(is_mergeable_command("/keydown/up"))
+
+
+class CommandPipelineTest(unittest.TestCase):
+    def pipeline(self, **kwargs):
+        """A pipeline whose worker is stuck sending a first Select, so later submits stay queued."""
+        pool = GatedPool()
+        pipeline = CommandPipeline(pool, **kwargs)
+        self.addCleanup(pipeline.stop)
+        self.addCleanup(pool.gate.set)
+        pipeline.submit(ROKU_IP, "/keypress/Select")
+        self.assertTrue(pool.busy.wait(5))
+        return pipeline, pool
+
+    def drain(self, pipeline, pool):
+        pool.gate.set()
+        pipeline.stop(timeout=5)
+        return pool.sent[1:]
+
+    def test_repeated_arrows_merge_and_are_all_sent(self):
+        pipeline, pool = self.pipeline()
+        for _ in range(3):
+            pipeline.submit(ROKU_IP, "/keypress/up")
+        pipeline.submit(ROKU_IP, "/keypress/Select")
+        pipeline.submit(ROKU_IP, "/keypress/Select")
+        self.assertEqual(pipeline.merged, 2)
+        self.assertEqual(pipeline.queue_depth, 5)
+        self.assertEqual(self.drain(pipeline, pool), ["/keypress/up"] * 3 + ["/keypress/Select"] * 2)
+
+    def test_bursts_stop_at_max_burst(self):
+        pipeline, pool = self.pipeline(max_burst=2)
+        for _ in range(3):
+            pipeline.submit(ROKU_IP, "/keypress/left")
+        self.assertEqual(pipeline.merged, 1)
+        self.assertEqual(len(self.drain(pipeline, pool)), 3)
+
+    def test_stale_presses_are_dropped_but_not_keyups(self):
+        pipeline, pool = self.pipeline(deadline=0.05)
+        pipeline.submit(ROKU_IP, "/keypress/down")
+        pipeline.submit(ROKU_IP, "/keyup/down")
+        time.sleep(0.1)
+        self.assertEqual(self.drain(pipeline, pool), ["/keyup/down"])
+        self.assertEqual(pipeline.dropped_stale, 1)
+
+    def test_full_queue_evicts_the_oldest_droppable_entry(self):
+        pipeline, pool = self.pipeline(maxsize=2)
+        pipeline.submit(ROKU_IP, "/keypress/Home")
+        pipeline.submit(ROKU_IP, "/launch/12")
+        pipeline.submit(ROKU_IP, "/keypress/Back")
+        self.assertEqual(pipeline.dropped_full, 1)
+        self.assertEqual(self.drain(pipeline, pool), ["/launch/12", "/keypress/Back"])
+
+    def test_full_queue_of_protected_commands_still_takes_protected_ones(self):
+        pipeline, pool = self.pipeline(maxsize=1)
+        pipeline.submit(ROKU_IP, "/launch/12")
+        pipeline.submit(ROKU_IP, "/keypress/Home")
+        pipeline.submit(ROKU_IP, "/keyup/up")
+        self.assertEqual(pipeline.dropped_full, 1)
+        self.assertEqual(self.drain(pipeline, pool), ["/launch/12", "/keyup/up"])
+
+    def test_drop_queued_leaves_protected_commands(self):
+        pipeline, pool = self.pipeline()
+        pipeline.submit(ROKU_IP, "/keypress/up")
+        pipeline.submit(ROKU_IP, "/keypress/up")
+        pipeline.submit(ROKU_IP, "/keyup/left")
+        pipeline.submit([ROKU_IP, "192.168.1.21"], "/keypress/Home")
+        self.assertEqual(pipeline.drop_queued(ROKU_IP), ["/keypress/up", "/keypress/up"])
+        self.assertEqual(self.drain(pipeline, pool), ["/keyup/left", "/keypress/Home", "/keypress/Home"])
+
+
+if __name__ == "__main__":
+    unittest.main()
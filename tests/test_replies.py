@@ -0,0 +1,81 @@
+"""
+The /query/ reply parsers, on the captured replies in benchmarks/samples/.
+"""
+import os
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from roku_ecp import (  # noqa: E402
+    XML_CHUNK, App, DeviceInfo, MediaPlayer, parse_active_app, parse_apps, parse_device_info,
+    parse_media_player,
+)
+
+
+def sample(name):
+    with open(os.path.join(ROOT, "benchmarks", "samples", name), "rb") as f:
+        return f.read()
+
+
+class DeviceInfoTest(unittest.TestCase):
+    def test_sample(self):
+        info = parse_device_info(sample("device-info.xml"))
+        self.assertEqual(info, DeviceInfo(
+            serial_number="X00400ABCDEF", device_id="S00000ABCDEF", vendor_name="Roku",
+            model_name="Roku Ultra", friendly_device_name="Living Room",
+            wifi_mac="d8:31:34:a0:b1:c2", ethernet_mac="d8:31:34:a0:b1:c3",
+            network_type="wifi", power_mode="PowerOn"))
+        self.assertEqual(info["serial-number"], "X00400ABCDEF")
+        self.assertIsNone(info.get("udn"))
+
+    def test_stops_before_the_end_of_the_reply(self):
+        # Everything wanted is in the first chunks, so a broken tail is never read
+        data = sample("device-info.xml")
+        self.assertGreater(len(data), 4 * XML_CHUNK)
+        self.assertIsNotNone(parse_device_info(data[:-2 * XML_CHUNK] + b"<<garbage"))
+
+    def test_missing_fields_are_empty(self):
+        info = parse_device_info(b"<device-info><serial-number>X1</serial-number></device-info>")
+        self.assertEqual(info.serial_number, "X1")
+        self.assertEqual(info.wifi_mac, "")
+
+    def test_not_device_info(self):
+        self.assertIsNone(parse_device_info(sample("apps.xml")))
+        self.assertIsNone(parse_device_info(b"<html><body>Not Found</body></html>"))
+        self.assertIsNone(parse_device_info(b"<device-info><serial"))
+
+
+class AppsTest(unittest.TestCase):
+    def test_sample(self):
+        apps = parse_apps(sample("apps.xml"))
+        self.assertEqual(len(apps), 30)
+        self.assertEqual(apps[0], App("tvinput.dtv", "Live TV", "tvin", "1.0.0"))
+        self.assertEqual(apps[1], App("12", "Netflix", "appl", "5.2.98079015"))
+        self.assertEqual(len({app.id for app in apps}), 30)
+
+    def test_unreadable(self):
+        self.assertEqual(parse_apps(b"<apps><app id="), [])
+
+    def test_active_app(self):
+        self.assertEqual(parse_active_app(sample("active-app.xml")),
+                         App("12", "Netflix", "appl", "5.2.98079015"))
+        self.assertIsNone(parse_active_app(b"<active-app/>"))
+
+
+class MediaPlayerTest(unittest.TestCase):
+    def test_sample(self):
+        self.assertEqual(parse_media_player(sample("media-player.xml")), MediaPlayer(
+            state="play", plugin="Netflix", position="1532844 ms", duration="2707000 ms"))
+
+    def test_idle_player(self):
+        self.assertEqual(parse_media_player(b'<player error="false" state="close"/>'),
+                         MediaPlayer(state="close"))
+
+    def test_not_a_player(self):
+        self.assertIsNone(parse_media_player(sample("active-app.xml")))
+        self.assertIsNone(parse_media_player(b"<player"))
+
+
+if __name__ == "__main__":
+    unittest.main()
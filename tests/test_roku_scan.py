@@ -0,0 +1,87 @@
+"""
+RokuScan's stages are fallbacks: once one confirms a Roku, the later
+ones (SSDP multicast, the scapy ARP sweep) must not run unless a deep
+scan was asked for.
+
+    python -m pytest tests
+"""
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import roku_ecp  # noqa: E402
+from roku_ecp import DeviceInfo, RokuScan  # noqa: E402
+
+ROKU_IP = "192.168.1.20"
+ROKU_MAC = "b0:a7:37:12:34:56"
+
+
+class ScanStagesTest(unittest.TestCase):
+    def scan(self, neighbours=(), announced=(), confirmed=True, **kwargs):
+        """Run a RokuScan over one network with every stage stubbed; returns (scan, stage mocks)."""
+        info = DeviceInfo(serial_number="X00400ABCDEF") if confirmed else None
+        stages = {
+            "neighbours": mock.patch.object(roku_ecp, "roku_neighbours", return_value=list(neighbours)),
+            "ssdp": mock.patch.object(roku_ecp, "ssdp_discover", return_value=list(announced)),
+            "sweep": mock.patch.object(roku_ecp, "arp_sweep", return_value=0),
+            "confirm": mock.patch.object(roku_ecp, "confirm_roku", return_value=info),
+        }
+        mocks = {name: patcher.start() for name, patcher in stages.items()}
+        for patcher in stages.values():
+            self.addCleanup(patcher.stop)
+        scan = RokuScan(["192.168.1.0/24"], **kwargs).start()
+        scan.wait(5)
+        self.assertFalse(scan.is_running())
+        return scan, mocks
+
+    def test_known_mac_in_neighbour_table_skips_ssdp_and_sweep(self):
+        scan, mocks = self.scan(neighbours=[{'ip': ROKU_IP, 'mac': ROKU_MAC}], known_macs=[ROKU_MAC])
+        mocks["neighbours"].assert_called_once_with([ROKU_MAC])
+        self.assertEqual([ip for ip, _info, _mac in scan.rokus], [ROKU_IP])
+        mocks["ssdp"].assert_not_called()
+        mocks["sweep"].assert_not_called()
+
+    def test_roku_oui_in_neighbour_table_skips_ssdp_and_sweep(self):
+        scan, mocks = self.scan(neighbours=[{'ip': ROKU_IP, 'mac': ROKU_MAC}])
+        self.assertEqual(len(scan.rokus), 1)
+        mocks["ssdp"].assert_not_called()
+        mocks["sweep"].assert_not_called()
+
+    def test_ssdp_answer_skips_sweep(self):
+        scan, mocks = self.scan(announced=[{'ip': ROKU_IP, 'port': 8060}])
+        mocks["ssdp"].assert_called_once()
+        self.assertEqual(len(scan.rokus), 1)
+        mocks["sweep"].assert_not_called()
+
+    def test_nothing_found_falls_through_to_sweep(self):
+        scan, mocks = self.scan()
+        mocks["ssdp"].assert_called_once()
+        mocks["sweep"].assert_called_once()
+        self.assertEqual(scan.rokus, [])
+
+    def test_deep_scan_runs_every_stage(self):
+        _scan, mocks = self.scan(neighbours=[{'ip': ROKU_IP, 'mac': ROKU_MAC}], deep=True)
+        mocks["ssdp"].assert_called_once()
+        mocks["sweep"].assert_called_once()
+
+    def test_unconfirmed_neighbour_falls_through(self):
+        # A Roku OUI alone isn't a Roku: it has to answer device-info first
+        scan, mocks = self.scan(neighbours=[{'ip': ROKU_IP, 'mac': ROKU_MAC}], confirmed=False)
+        mocks["confirm"].assert_called_once()
+        self.assertEqual(scan.rokus, [])
+        mocks["ssdp"].assert_called_once()
+        mocks["sweep"].assert_called_once()
+
+    def test_stop_on_first_is_not_a_cancel(self):
+        done = []
+        scan, _mocks = self.scan(neighbours=[{'ip': ROKU_IP, 'mac': ROKU_MAC}], stop_on_first=True,
+                                 on_done=lambda rokus, cancelled: done.append(cancelled))
+        self.assertEqual(len(scan.rokus), 1)
+        self.assertFalse(scan.cancelled)
+        self.assertEqual(done, [False])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+TextStreamer types text as percent-encoded Lit_ presses, in order, and
+stops promptly when cancelled - still waiting for presses already sent.
+"""
+import os
+import sys
+import threading
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+from fake_roku import FakeRoku  # noqa: E402
+from roku_ecp import LatencyStats, TextStreamer, literal_paths  # noqa: E402
+
+
+class LiteralPathsTest(unittest.TestCase):
+    def test_encoding(self):
+        self.assertEqual(list(literal_paths("a B/é\r\n?")), [
+            "/keypress/Lit_a", "/keypress/Lit_%20", "/keypress/Lit_B", "/keypress/Lit_%2F",
+            "/keypress/Lit_%C3%A9", "/keypress/Enter", "/keypress/Lit_%3F",
+        ])
+
+
+class TextStreamerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.roku = FakeRoku().start()
+        cls.addClassCleanup(cls.roku.stop)
+
+    def setUp(self):
+        self.roku.commands.clear()
+
+    def streamer(self, **kwargs):
+        return TextStreamer(self.roku.host, port=self.roku.port, **kwargs)
+
+    def test_types_every_character_in_order(self):
+        results = []
+        latency = LatencyStats()
+        text = "hello, wörld\n" * 3
+        typed = self.streamer(window=4, latency=latency,
+                              on_result=lambda ip, ok: results.append(ok)).type(text)
+        self.assertEqual(typed, len(text))
+        self.assertEqual(self.roku.commands, list(literal_paths(text)))
+        self.assertEqual(results, [True] * len(text))
+        counts = {row["path"]: row["server"]["count"] for row in latency.snapshot()}
+        self.assertEqual(counts, {"/keypress/Lit_": len(text) - 3, "/keypress/Enter": 3})
+
+    def test_cancel(self):
+        done = threading.Event()
+        outcome = []
+        streamer = self.streamer(pacing=0.02)
+
+        def on_progress(acked, total):
+            if acked == 3:
+                streamer.cancel()
+
+        def on_done(*args):
+            outcome.append(args)
+            done.set()
+
+        streamer.start("x" * 200, on_progress=on_progress, on_done=on_done)
+        self.assertTrue(done.wait(5))
+        acked, total, error, cancelled = outcome[0]
+        self.assertTrue(cancelled)
+        self.assertEqual((total, error), (200, ""))
+        self.assertLessEqual(acked, 3 + streamer.window)  # what was on the wire when it stopped
+        self.assertEqual(len(self.roku.commands), acked)  # nothing sent went unacknowledged
+
+    def test_cancelled_before_starting_sends_nothing(self):
+        streamer = self.streamer()
+        streamer.cancel()
+        self.assertEqual(streamer.type("abc"), 0)
+        self.assertEqual(self.roku.commands, [])
+
+
+if __name__ == "__main__":
+    unittest.main()